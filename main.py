@@ -3,11 +3,18 @@ import argparse
 import logging
 import sys
 import json
-from typing import Dict, Any, List, Optional
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, List, Optional, Set
 
-from scripts.python.scraper import AmazonScraper, scrape_amazon_product
-from scripts.python.review_analyzer import ReviewAnalyzer, analyze_product_reviews
-from scripts.python.ai_summarizer import ReviewSummarizer, summarize_reviews
+from scripts.python.metrics import METRICS, collect_timings, count, in_current_context, timed
+
+# Product details, reviews and similar products are fetched concurrently
+STAGE_WORKERS = 3
+
+# The scraper, analyzer and summarizer pull in requests, BeautifulSoup and the
+# LLM clients; they are imported by the functions that use them so that
+# `--help` and argument errors return without paying for those imports
 
 def setup_logging(verbose: bool = False) -> None:
     """Configure logging for the application."""
@@ -31,6 +38,7 @@ def setup_logging(verbose: bool = False) -> None:
 
 def extract_product_details(url: str) -> Dict[str, Any]:
     """Extract product description, specifications, image URL, and price."""
+    from scripts.python.scraper import scrape_amazon_product
     description, specs, image_url, price = scrape_amazon_product(url)
     
     return {
@@ -40,27 +48,45 @@ def extract_product_details(url: str) -> Dict[str, Any]:
         "price": price
     }
 
-def extract_and_analyze_reviews(url: str, max_pages: int = 3) -> Dict[str, Any]:
-    """Extract reviews and analyze them."""
-    reviews, analysis = analyze_product_reviews(url, max_pages)
+def extract_and_analyze_reviews(url: str, max_pages: int = 3, start_page: int = 1,
+                                on_page: Optional[Callable[[int, List[Dict[str, Any]]], None]] = None,
+                                previous_reviews: Optional[List[Dict[str, Any]]] = None,
+                                keep_reviews: Optional[int] = None,
+                                max_reviews: Optional[int] = None,
+                                known_fingerprints: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """
+    Extract reviews and analyze them as they stream in, optionally resuming at start_page
+    after previous_reviews. With keep_reviews, only a sample of the reviews is kept. With
+    known_fingerprints, only the reviews newer than the known ones are fetched and returned.
+    """
+    from scripts.python.review_analyzer import analyze_product_reviews
+    reviews, analysis = analyze_product_reviews(url, max_pages, start_page=start_page, on_page=on_page,
+                                                previous_reviews=previous_reviews, keep_reviews=keep_reviews,
+                                                max_reviews=max_reviews, known_fingerprints=known_fingerprints)
     
-    return {
+    review_data = {
         "reviews": reviews,
         "analysis": analysis
     }
+    if known_fingerprints is not None:
+        review_data["incremental"] = {"known_reviews": len(known_fingerprints),
+                                      "new_reviews": analysis["total_reviews"]}
+    return review_data
 
 def find_similar_products(url: str) -> List[Dict[str, Any]]:
     """Find similar products listed on the product page."""
+    from scripts.python.review_analyzer import ReviewAnalyzer
     analyzer = ReviewAnalyzer()
     return analyzer.find_similar_products(url)
 
 def generate_ai_summary(reviews: List[Dict[str, Any]], api_key: Optional[str] = None) -> Dict[str, Any]:
     """Generate an AI-powered summary of the reviews."""
+    from scripts.python.ai_summarizer import summarize_reviews
     return summarize_reviews(reviews, api_key)
 
 def save_results_to_json(data: Dict[str, Any], output_file: str) -> None:
     """Save analysis results to a JSON file."""
-    with open(output_file, 'w', encoding='utf-8') as f:
+    with timed('output'), open(output_file, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
     
     logging.info(f"Results saved to {output_file}")
@@ -145,6 +171,11 @@ def print_summary(data: Dict[str, Any]) -> None:
         safe_print(f"\nTotal Reviews: {analysis.get('total_reviews', 0)}")
         safe_print(f"Average Rating: {analysis.get('average_rating', 0)} stars")
         
+        near_duplicates = analysis.get("near_duplicates", {})
+        if near_duplicates.get("cluster_count"):
+            safe_print(f"Near-Duplicate Reviews: {near_duplicates['duplicate_review_count']} in {near_duplicates['cluster_count']} clusters "
+                       f"(adjusted average rating: {near_duplicates['adjusted_average_rating']} stars)")
+        
         # Rating distribution
         if "rating_counts" in analysis:
             safe_print("\nRating Distribution:")
@@ -222,9 +253,36 @@ def print_summary(data: Dict[str, Any]) -> None:
     
     safe_print("="*80)
 
+def run_stage(description: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run one pipeline stage, logging its error and returning None so the other stages still complete."""
+    try:
+        return func(*args, **kwargs)
+    except Exception as e:
+        logging.error(f"Error {description}: {str(e)}")
+        return None
+
+def journaled_stage(journal: Optional[Any], asin: Optional[str], stage: str,
+                    func: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a stage so a completed output is reused from the journal and a new one is recorded in it."""
+    if journal is None or asin is None:
+        return func
+    
+    def run(*args, **kwargs):
+        if journal.is_done(asin, stage):
+            logging.info(f"Reusing {stage} of {asin} from the journal")
+            return journal.load_output(asin, stage)
+        output = func(*args, **kwargs)
+        journal.record_stage(asin, stage, output)
+        return output
+    return run
+
 def process_product(url: str, output_file: Optional[str] = None, 
                    max_review_pages: int = 3, api_key: Optional[str] = None,
-                   skip_similar: bool = False, verbose: bool = False) -> Dict[str, Any]:
+                   skip_similar: bool = False, verbose: bool = False,
+                   journal: Optional[Any] = None, writer: Optional[Any] = None,
+                   profiler: Optional[Any] = None, keep_reviews: Optional[int] = None,
+                   max_reviews: Optional[int] = None, store: Optional[Any] = None,
+                   incremental: bool = False) -> Dict[str, Any]:
     """
     Process a product URL and perform all analyses.
     
@@ -235,10 +293,42 @@ def process_product(url: str, output_file: Optional[str] = None,
         api_key (str, optional): API key for AI service
         skip_similar (bool): Skip finding similar products
         verbose (bool): Enable verbose logging
+        journal (CrawlJournal, optional): Journal of completed work. Stages it already
+            holds are reused, review fetches resume at the next page, and completed
+            stages and review pages are recorded in it
+        writer (ResultWriter, optional): Streaming output. Review pages are written as
+            they are parsed (if the writer writes reviews) and the result once complete
+        profiler (StageProfiler, optional): Profiles the stages of the products it samples;
+            their stages then run one at a time
+        keep_reviews (int, optional): Keep a uniform sample of at most this many reviews in
+            the result and for the summary; the review analysis still covers every review
+        max_reviews (int, optional): Stop fetching review pages after this many reviews
+        store (ProductStore, optional): Database the result is written to once complete
+        incremental (bool): Only fetch the reviews newer than those in the store and return
+            just those, marked with an ``incremental`` block in the review data
         
     Returns:
-        Dict[str, Any]: Complete analysis results
+        Dict[str, Any]: Complete analysis results, with the milliseconds spent per
+            stage in ``timings``
     """
+    with collect_timings() as timings:
+        review_options = {name: value for name, value in (("keep_reviews", keep_reviews),
+                                                          ("max_reviews", max_reviews)) if value is not None}
+        if incremental and store is not None:
+            from scripts.python.insight_store import extract_asin
+            asin = extract_asin(url)
+            if asin is not None:
+                review_options["known_fingerprints"] = store.known_fingerprints(asin)
+            else:
+                logging.warning(f"No ASIN in {url}, fetching all of its reviews")
+        return _process_product(url, output_file, max_review_pages, api_key, skip_similar,
+                                verbose, journal, writer, profiler, review_options, store, timings)
+
+def _process_product(url: str, output_file: Optional[str], max_review_pages: int,
+                     api_key: Optional[str], skip_similar: bool, verbose: bool,
+                     journal: Optional[Any], writer: Optional[Any], profiler: Optional[Any],
+                     review_options: Dict[str, Any], store: Optional[Any], timings: Any) -> Dict[str, Any]:
+    """Run the stages of process_product while its timings are collected."""
     # Setup logging
     setup_logging(verbose)
     
@@ -253,42 +343,114 @@ def process_product(url: str, output_file: Optional[str] = None,
         "similar_products": []
     }
     
-    # 1. Extract product details
-    logging.info("Step 1: Extracting product details")
-    try:
-        result["product_details"] = extract_product_details(url)
-        logging.info("Product details extracted successfully")
-    except Exception as e:
-        logging.error(f"Error extracting product details: {str(e)}")
+    asin, resume = None, {}
+    if journal is not None:
+        from scripts.python.insight_store import extract_asin
+        asin = extract_asin(url)
+        if asin is None:
+            logging.warning(f"No ASIN in {url}, processing it without the journal")
+        elif not journal.is_done(asin, "reviews"):
+            start_page, previous_reviews = journal.resume_reviews(asin)
+            resume = dict(start_page=start_page, previous_reviews=previous_reviews,
+                          on_page=lambda page, reviews: journal.record_page(asin, page, reviews))
+            if start_page > 1:
+                logging.info(f"Resuming reviews of {asin} at page {start_page}")
+    if writer is not None and writer.reviews:
+        record_page = resume.get("on_page")
+        
+        def on_page(page, reviews):
+            if record_page is not None:
+                record_page(page, reviews)
+            with timed('output'):
+                writer.write_reviews(url, page, reviews)
+        resume["on_page"] = on_page
+    failed = []
     
-    # 2. Extract and analyze reviews
-    logging.info("Step 2: Extracting and analyzing reviews")
-    try:
-        result["review_data"] = extract_and_analyze_reviews(url, max_pages=max_review_pages)
-        logging.info(f"Extracted {len(result['review_data'].get('reviews', []))} reviews")
-    except Exception as e:
-        logging.error(f"Error extracting reviews: {str(e)}")
+    profile_label = profiler.sample(url) if profiler is not None else None
     
-    # 3. Generate AI summary if we have reviews
-    if result["review_data"].get("reviews"):
-        logging.info("Step 3: Generating AI summary")
-        try:
-            result["ai_summary"] = generate_ai_summary(
-                result["review_data"]["reviews"], 
-                api_key=api_key
-            )
-            logging.info("AI summary generated successfully")
-        except Exception as e:
-            logging.error(f"Error generating AI summary: {str(e)}")
+    def stage(name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap a stage with the journal, the profiler and its timer."""
+        func = journaled_stage(journal, asin, name, func)
+        if profile_label is not None:
+            func = profiler.wrap(profile_label, name, func)
+        return timed(name)(func)
     
-    # 4. Find similar products if not skipped
-    if not skip_similar:
-        logging.info("Step 4: Finding similar products")
+    # Stages run as a small dependency graph: product details, reviews and similar
+    # products are independent and run concurrently; the summary starts as soon as
+    # the reviews are ready. Each stage logs and isolates its own errors.
+    with ThreadPoolExecutor(max_workers=STAGE_WORKERS) as executor:
+        # 1. Extract product details
+        logging.info("Step 1: Extracting product details")
+        details_future = executor.submit(in_current_context(run_stage), "extracting product details",
+                                         stage("product_details", extract_product_details), url)
+        
+        # 2. Extract and analyze reviews
+        logging.info("Step 2: Extracting and analyzing reviews")
+        reviews_future = executor.submit(in_current_context(run_stage), "extracting reviews",
+                                         stage("reviews", extract_and_analyze_reviews),
+                                         url, max_pages=max_review_pages, **resume, **review_options)
+        
+        # 4. Find similar products if not skipped
+        similar_future = None
+        if not skip_similar:
+            logging.info("Step 4: Finding similar products")
+            similar_future = executor.submit(in_current_context(run_stage), "finding similar products",
+                                             stage("similar_products", find_similar_products), url)
+        
+        review_data = reviews_future.result()
+        if review_data is not None:
+            result["review_data"] = review_data
+            logging.info(f"Extracted {len(review_data.get('reviews', []))} reviews")
+        else:
+            failed.append("reviews")
+        
+        # 3. Generate AI summary if we have reviews, while the other stages finish
+        if result["review_data"].get("reviews"):
+            logging.info("Step 3: Generating AI summary")
+            summary = run_stage("generating AI summary", stage("ai_summary", generate_ai_summary),
+                                result["review_data"]["reviews"], api_key=api_key)
+            if summary is not None:
+                result["ai_summary"] = summary
+                logging.info("AI summary generated successfully")
+            else:
+                failed.append("ai_summary")
+        
+        product_details = details_future.result()
+        if product_details is not None:
+            result["product_details"] = product_details
+            logging.info("Product details extracted successfully")
+        else:
+            failed.append("product_details")
+        
+        if similar_future is not None:
+            similar_products = similar_future.result()
+            if similar_products is not None:
+                result["similar_products"] = similar_products
+                logging.info(f"Found {len(result['similar_products'])} similar products")
+            else:
+                failed.append("similar_products")
+    
+    for failed_stage in failed:
+        count('stage_failures', stage=failed_stage)
+    count('products')
+    result["timings"] = timings.as_dict()
+    
+    # A product is only complete in the journal once every stage succeeded, so a
+    # restarted crawl retries the failed stages
+    if journal is not None and asin is not None and not failed:
+        from scripts.python.crawl_journal import PRODUCT_STAGE
+        journal.record_stage(asin, PRODUCT_STAGE, result)
+    
+    if writer is not None:
+        with timed('output'):
+            writer.write_product(result)
+    
+    if store is not None:
         try:
-            result["similar_products"] = find_similar_products(url)
-            logging.info(f"Found {len(result['similar_products'])} similar products")
+            with timed('output'):
+                store.save_result(result)
         except Exception as e:
-            logging.error(f"Error finding similar products: {str(e)}")
+            logging.error(f"Error storing results: {str(e)}")
     
     # Save results if output file is specified
     if output_file:
@@ -300,8 +462,121 @@ def process_product(url: str, output_file: Optional[str] = None,
     # Print summary
     print_summary(result)
     
+    # Export after every product, so a long batch can be scraped while it runs
+    METRICS.write_prometheus()
+    
     return result
 
+def process_or_reuse(url: str, journal: Optional[Any], label: str, **options) -> Dict[str, Any]:
+    """Return the journaled result of a completed product, or process it."""
+    from scripts.python.crawl_journal import PRODUCT_STAGE
+    from scripts.python.insight_store import extract_asin
+    
+    asin = extract_asin(url)
+    if journal is not None and asin is not None and journal.is_done(asin, PRODUCT_STAGE):
+        logging.info(f"{label} Skipping {url}, already completed")
+        result = journal.load_output(asin, PRODUCT_STAGE)
+        if options.get("writer") is not None:
+            options["writer"].write_product(result)
+        if options.get("store") is not None:
+            options["store"].save_result(result)
+        return result
+    logging.info(f"{label} Processing {url}")
+    return process_product(url, journal=journal, **options)
+
+def process_batch(urls: List[str], journal: Optional[Any] = None, output_file: Optional[str] = None,
+                  **options) -> List[Dict[str, Any]]:
+    """
+    Process many product URLs, skipping products the journal already completed.
+    
+    Args:
+        urls (List[str]): Amazon product URLs
+        journal (CrawlJournal, optional): Journal shared by every run of this crawl
+        output_file (str, optional): Path to save all results as a JSON list
+        **options: Options forwarded to process_product
+        
+    Returns:
+        List[Dict[str, Any]]: Results in URL order. Empty when the results are
+            streamed to a writer or store and not saved to output_file, so memory stays constant
+    """
+    keep = keep_results(output_file, options)
+    results = []
+    for index, url in enumerate(urls, 1):
+        result = process_or_reuse(url, journal, f"[{index}/{len(urls)}]", **options)
+        if keep:
+            results.append(result)
+    
+    if output_file:
+        save_results_to_json(results, output_file)
+    return results
+
+def process_crawl(frontier: Any, journal: Optional[Any] = None, output_file: Optional[str] = None,
+                  **options) -> List[Dict[str, Any]]:
+    """
+    Crawl outwards from the frontier's seeds through similar products.
+    
+    Each product is processed once (or taken from the journal if it already
+    completed) and its similar products are queued until the frontier's depth,
+    breadth and product limits are reached.
+    
+    Args:
+        frontier (CrawlFrontier): Frontier holding the seed products
+        journal (CrawlJournal, optional): Journal shared by every run of this crawl
+        output_file (str, optional): Path to save all results as a JSON list
+        **options: Options forwarded to process_product; similar products are always searched
+        
+    Returns:
+        List[Dict[str, Any]]: Results in crawl order. Empty when the results are
+            streamed to a writer or store and not saved to output_file
+    """
+    options["skip_similar"] = False
+    keep = keep_results(output_file, options)
+    results = []
+    while True:
+        item = frontier.pop()
+        if item is None:
+            break
+        result = process_or_reuse(item.url, journal, f"[{frontier.popped}, depth {item.depth}]", **options)
+        if keep:
+            results.append(result)
+        added = frontier.expand(item, result.get("similar_products", []))
+        logging.info(f"Queued {added} similar products of {item.asin}, {len(frontier)} waiting")
+    
+    if output_file:
+        save_results_to_json(results, output_file)
+    return results
+
+def refresh_watched(scheduler: Any, budget: int, output_file: Optional[str] = None,
+                    **options) -> List[Dict[str, Any]]:
+    """
+    Refresh the watched products that are due, most overdue first.
+    
+    Args:
+        scheduler (RefreshScheduler): Watchlist with the products' change history
+        budget (int): Maximum number of products refreshed
+        output_file (str, optional): Path to save the refreshed results as a JSON list
+        **options: Options forwarded to process_product
+        
+    Returns:
+        List[Dict[str, Any]]: Results of the refreshed products. Empty when the
+            results are streamed to a writer or store and not saved to output_file
+    """
+    results = scheduler.run(lambda url: process_product(url, **options), budget,
+                            keep_results=keep_results(output_file, options))
+    
+    if output_file:
+        save_results_to_json(results, output_file)
+    return results
+
+def keep_results(output_file: Optional[str], options: Dict[str, Any]) -> bool:
+    """Whether a multi-product run must keep its results in memory: not when they are only streamed or stored."""
+    return bool(output_file) or (options.get("writer") is None and options.get("store") is None)
+
+def read_url_list(path: str) -> List[str]:
+    """Read product URLs from a file, one per line, ignoring blank lines and # comments."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
 def main():
     """Main entry point of the application."""
     parser = argparse.ArgumentParser(
@@ -311,15 +586,137 @@ def main():
     
     parser.add_argument(
         "url",
+        nargs="?",
         help="Amazon product URL to analyze"
     )
     
+    parser.add_argument(
+        "--batch",
+        help="Process every product URL in this file (one per line)",
+        default=None
+    )
+    
+    parser.add_argument(
+        "--journal",
+        help="Journal completed work to this file, so that rerunning an interrupted crawl with the same "
+             "--journal skips finished work and resumes review pagination. Removed once every product completed",
+        default=None
+    )
+    
+    parser.add_argument(
+        "--depth",
+        help="Follow similar products this many hops from the given products to find their competitive set",
+        type=int,
+        default=0
+    )
+    
+    parser.add_argument(
+        "--breadth",
+        help="With --depth, the number of similar products followed per product",
+        type=int,
+        default=10
+    )
+    
+    parser.add_argument(
+        "--max-products",
+        help="With --depth, stop after crawling this many products",
+        type=int,
+        default=None
+    )
+    
+    parser.add_argument(
+        "--watch",
+        help="Add the product URL or --batch URLs to the watchlist instead of processing them now",
+        action="store_true"
+    )
+    
+    parser.add_argument(
+        "--refresh-due",
+        help="Refresh the watched products whose predicted next change is due, within --budget",
+        action="store_true"
+    )
+    
+    parser.add_argument(
+        "--budget",
+        help="With --refresh-due, the maximum number of products refreshed in this run",
+        type=int,
+        default=100
+    )
+    
+    parser.add_argument(
+        "--watchlist",
+        help="Watchlist database with the change history of watched products "
+             "(WATCHLIST_PATH or .cache/watchlist.sqlite3 unless set)",
+        default=None
+    )
+    
     parser.add_argument(
         "-o", "--output",
         help="Save results to this JSON file",
         default=None
     )
     
+    parser.add_argument(
+        "--jsonl",
+        help="Stream results to this JSONL file, one line per product as it finishes "
+             "(gzip-compressed if the name ends in .gz)",
+        default=None
+    )
+    
+    parser.add_argument(
+        "--jsonl-reviews",
+        help="With --jsonl, also write one line per review as review pages are parsed",
+        action="store_true"
+    )
+    
+    parser.add_argument(
+        "--rotate-mb",
+        help="With --jsonl, rotate the file once it reaches this size in MB",
+        type=float,
+        default=None
+    )
+    
+    parser.add_argument(
+        "--db",
+        help="Also store results in this SQLite database of products, prices, specifications, "
+             "reviews and analyses (query it with scripts/python/product_store.py)",
+        default=None
+    )
+    
+    parser.add_argument(
+        "--incremental",
+        help="With --db, only fetch reviews newer than the stored ones, stopping at the first "
+             "review page without new reviews, and return just those",
+        action="store_true"
+    )
+    
+    parser.add_argument(
+        "--metrics",
+        help="Write stage timings and counters to this file in the Prometheus text format "
+             "(e.g. for the node_exporter textfile collector), updated after every product",
+        default=None
+    )
+    
+    parser.add_argument(
+        "--profile",
+        help="Profile every stage with cProfile and tracemalloc, writing pstats, allocation and "
+             "collapsed-stack reports per product to --profile-dir",
+        action="store_true"
+    )
+    
+    parser.add_argument(
+        "--profile-dir",
+        help="Directory of the --profile reports",
+        default="profiles"
+    )
+    
+    parser.add_argument(
+        "--profile-every",
+        help="With --profile in batch and crawl runs, profile only every Nth product",
+        type=int,
+        default=1
+    )
+    
     parser.add_argument(
         "-p", "--pages",
         help="Maximum number of review pages to scrape",
@@ -327,6 +724,21 @@ def main():
         default=3
     )
     
+    parser.add_argument(
+        "--keep-reviews",
+        help="Keep a uniform sample of at most this many reviews in the result and for the summary; "
+             "statistics still cover every review (stream them all with --jsonl-reviews)",
+        type=int,
+        default=None
+    )
+    
+    parser.add_argument(
+        "--max-reviews",
+        help="Stop fetching review pages once this many reviews were found",
+        type=int,
+        default=None
+    )
+    
     parser.add_argument(
         "-k", "--api-key",
         help="API key for AI service",
@@ -346,23 +758,92 @@ def main():
     )
     
     args = parser.parse_args()
+    if not args.url and not args.batch and not args.refresh_due:
+        parser.error("a product URL, --batch FILE or --refresh-due is required")
+    if args.watch and not (args.url or args.batch):
+        parser.error("--watch needs a product URL or --batch FILE")
+    if args.incremental and not args.db:
+        parser.error("--incremental needs --db, which holds the reviews fetched before")
     
+    journal = None
+    scheduler = None
+    writer = None
+    store = None
+    if args.metrics:
+        METRICS.export_path = Path(args.metrics)
     try:
-        # Process the product
-        process_product(
-            url=args.url,
-            output_file=args.output,
+        if args.jsonl:
+            from scripts.python.result_writer import ResultWriter
+            writer = ResultWriter(args.jsonl, reviews=args.jsonl_reviews,
+                                  max_bytes=int(args.rotate_mb * 1024 * 1024) if args.rotate_mb else None)
+        if args.db:
+            from scripts.python.product_store import ProductStore
+            store = ProductStore(args.db)
+        if args.journal:
+            from scripts.python.crawl_journal import CrawlJournal
+            setup_logging(args.verbose)
+            journal = CrawlJournal(args.journal)
+        
+        options = dict(
             max_review_pages=args.pages,
             api_key=args.api_key,
             skip_similar=args.skip_similar,
-            verbose=args.verbose
+            verbose=args.verbose,
+            writer=writer,
+            store=store,
+            incremental=args.incremental,
+            keep_reviews=args.keep_reviews,
+            max_reviews=args.max_reviews
         )
+        if args.profile:
+            from scripts.python.profiling import StageProfiler
+            options["profiler"] = StageProfiler(args.profile_dir, every=args.profile_every)
+        urls = read_url_list(args.batch) if args.batch else [args.url] if args.url else []
+        if args.watch or args.refresh_due:
+            from scripts.python.refresh_scheduler import RefreshScheduler
+            setup_logging(args.verbose)
+            scheduler = RefreshScheduler(args.watchlist)
+            if args.watch:
+                watched = [asin for asin in (scheduler.watch(url) for url in urls) if asin]
+                logging.info(f"Watching {len(watched)} products")
+            if args.refresh_due:
+                refresh_watched(scheduler, args.budget, output_file=args.output, **options)
+        elif args.depth > 0:
+            from scripts.python.crawl_frontier import CrawlFrontier
+            frontier = CrawlFrontier(urls, max_depth=args.depth, max_breadth=args.breadth,
+                                     max_products=args.max_products)
+            process_crawl(frontier, journal, output_file=args.output, **options)
+        elif args.batch:
+            process_batch(urls, journal, output_file=args.output, **options)
+        else:
+            # Process the product
+            process_product(url=args.url, output_file=args.output, journal=journal, **options)
+        
+        # A finished crawl must not be replayed by the next one
+        if journal is not None:
+            unfinished = journal.unfinished()
+            if unfinished:
+                logging.info(f"Keeping {args.journal} for {len(unfinished)} unfinished products; "
+                             "rerun with the same --journal to resume them")
+            else:
+                journal.remove()
+                journal = None
     except KeyboardInterrupt:
         logging.info("Process interrupted by user")
         sys.exit(1)
     except Exception as e:
         logging.error(f"Unexpected error: {str(e)}")
         sys.exit(1)
+    finally:
+        if journal is not None:
+            journal.close()
+        if scheduler is not None:
+            scheduler.close()
+        if writer is not None:
+            writer.close()
+        if store is not None:
+            store.close()
+        METRICS.write_prometheus()
     
     sys.exit(0)
 
@@ -24,6 +24,7 @@ document.addEventListener('DOMContentLoaded', () => {
     let numReviewsShown = 0;
     const reviewsPerLoad = 5;
     let isProductLoaded = false; // Track if product data is currently loaded
+    let currentProductData = null; // Sent with DeepSeek requests so concurrent users don't share files
 
     // Theme handling
     const prefersDarkScheme = window.matchMedia("(prefers-color-scheme: dark)");
@@ -148,14 +149,8 @@ document.addEventListener('DOMContentLoaded', () => {
                 const pythonResponse = await runPythonBackend(url);
                 
                 if (pythonResponse.success) {
-                    // If Python script succeeds, fetch the updated review.json
-                    const response = await fetch('../review.json?' + new Date().getTime()); // Add timestamp to prevent caching
-                    
-                    if (!response.ok) {
-                        throw new Error(`HTTP error! Status: ${response.status}`);
-                    }
-                    
-                    data = await response.json();
+                    // If Python script succeeds, read the stored product back from the product store
+                    data = await fetchStoredProduct(url);
                 } else {
                     throw new Error(pythonResponse.error || 'Failed to analyze URL with backend');
                 }
@@ -227,12 +222,27 @@ document.addEventListener('DOMContentLoaded', () => {
         deepseekContent.classList.add('hidden');
         
         try {
+            // Stream insights as they are generated, when the browser supports it
+            const streamResponse = await fetch('/run-deepseek-analysis-stream', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({ product: currentProductData })
+            });
+            
+            if (streamResponse.ok && streamResponse.body && window.TextDecoder) {
+                await renderDeepseekStream(streamResponse);
+                return;
+            }
+            
             // Call the DeepSeek API endpoint
             const response = await fetch('/run-deepseek-analysis', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
-                }
+                },
+                body: JSON.stringify({ product: currentProductData })
             });
             
             if (!response.ok) {
@@ -351,6 +361,28 @@ document.addEventListener('DOMContentLoaded', () => {
         deepseekContent.classList.remove('hidden');
     }
 
+    /**
+     * Fetches an analyzed product from the product store, falling back to review.json
+     * @param {string} url - The analyzed Amazon product URL
+     * @returns {Promise<Object>} - The product data in the review.json layout
+     */
+    async function fetchStoredProduct(url) {
+        const asinMatch = url.match(/\/(?:dp|gp\/product|product-reviews)\/([A-Z0-9]{10})/);
+        if (asinMatch) {
+            const stored = await fetch(`/api/products/${asinMatch[1]}`);
+            if (stored.ok) {
+                return await stored.json();
+            }
+            console.warn(`Product store lookup failed (${stored.status}), reading review.json`);
+        }
+        
+        const response = await fetch('../review.json?' + new Date().getTime()); // Add timestamp to prevent caching
+        if (!response.ok) {
+            throw new Error(`HTTP error! Status: ${response.status}`);
+        }
+        return await response.json();
+    }
+
     /**
      * Validates if the URL is from Amazon
      * @param {string} url - The URL to validate
@@ -485,9 +517,49 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    /**
+     * Renders NDJSON insight events from the streaming DeepSeek endpoint as they arrive
+     * @param {Response} response - The streaming fetch response
+     */
+    async function renderDeepseekStream(response) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        const partial = {};
+        let pending = '';
+        
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            pending += decoder.decode(value, { stream: true });
+            const lines = pending.split('\n');
+            pending = lines.pop();
+            
+            for (const line of lines) {
+                if (!line.trim()) continue;
+                const event = JSON.parse(line);
+                
+                if (event.type === 'insight') {
+                    // Collect each insight under its field and re-render what we have so far
+                    if (event.index === null) {
+                        partial[event.field] = event.value;
+                    } else {
+                        (partial[event.field] = partial[event.field] || []).push(event.value);
+                    }
+                    deepseekLoading.classList.add('hidden');
+                    deepseekContent.classList.remove('hidden');
+                    renderDeepseekAnalysis(partial);
+                } else if (event.type === 'done') {
+                    renderDeepseekAnalysis(event.analysis);
+                } else if (event.type === 'error') {
+                    throw new Error(event.error);
+                }
+            }
+        }
+    }
+
     /**
      * Renders the DeepSeek analysis in the UI
-     * @param {Object} data - The analysis data from DeepSeek
+     * @param {Object} data - The analysis data from DeepSeek, complete or partially streamed
      */
     function renderDeepseekAnalysis(data) {
         // Check if we have valid data
@@ -607,6 +679,7 @@ document.addEventListener('DOMContentLoaded', () => {
     function renderProductData(data) {
         // Set flag that product is loaded
         isProductLoaded = true;
+        currentProductData = data;
         
         // Product Card
         if (mainProductImageLink) {
@@ -781,6 +854,7 @@ document.addEventListener('DOMContentLoaded', () => {
         currentAllReviews = [];
         numReviewsShown = 0;
         isProductLoaded = false; // Reset product loaded flag
+        currentProductData = null;
         
         const reviewsList = document.getElementById('reviews-list');
         if(reviewsList) reviewsList.innerHTML = '';
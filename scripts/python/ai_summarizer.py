@@ -1,14 +1,16 @@
 import logging
 import json
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional, Tuple, Union
 import re
-import random
+from .term_frequency import TermCounter
+from .pros_cons import ProsConsExtractor
+from .sentiment_lexicon import SentimentScorer, summarize_scores
 
 class ReviewSummarizer:
     """
     A class to generate AI-powered summaries from Amazon product reviews.
-    This is a placeholder implementation that will be replaced with actual
-    Gemini API calls in production.
+    Key points, pros and cons are extracted locally from the review text;
+    the summary paragraph is still template-based.
     """
     
     def __init__(self, api_key: str = None):
@@ -37,51 +39,56 @@ class ReviewSummarizer:
                 'key_points': [],
                 'pros': [],
                 'cons': [],
-                'sentiment': "neutral"
+                'sentiment': "neutral",
+                'sentiment_scores': summarize_scores([], [])
             }
         
         self.logger.info(f"Generating summary for {len(reviews)} reviews")
         
-        # In a real implementation, this would call the Gemini API
-        # For now, we'll create a placeholder implementation
-        
-        # Extract the text content from reviews for processing
-        review_texts = [review['text'] for review in reviews if review['text']]
-        review_titles = [review['title'] for review in reviews if review['title']]
-        
         # Calculate average rating
         avg_rating = sum(review['rating'] for review in reviews) / len(reviews)
         
         # Generate placeholder summary based on rating
         summary = self._generate_placeholder_summary(reviews, avg_rating)
         
-        # Extract key points, pros and cons
-        key_points = self._extract_key_points(review_texts, review_titles)
-        pros, cons = self._extract_pros_cons(review_texts, review_titles, avg_rating)
+        # Extract key points, pros and cons by contrasting positive and negative reviews
+        extractor = ProsConsExtractor().fit(reviews)
+        key_points = self._extract_key_points(extractor)
+        pros, cons = self._extract_pros_cons(extractor, avg_rating)
         
-        # Determine overall sentiment
-        sentiment = "positive" if avg_rating >= 4.0 else "neutral" if avg_rating >= 3.0 else "negative"
+        # Determine overall sentiment from both the star rating and the review text
+        sentiment_scores = summarize_scores(reviews, SentimentScorer().score_reviews(reviews))
+        sentiment = self._overall_sentiment(avg_rating, sentiment_scores['mean_score'])
         
         return {
             'summary': summary,
             'key_points': key_points,
             'pros': pros,
             'cons': cons,
-            'sentiment': sentiment
+            'sentiment': sentiment,
+            'sentiment_scores': sentiment_scores
         }
     
+    def _overall_sentiment(self, avg_rating: float, mean_text_score: float) -> str:
+        """Blend the average star rating (mapped to [-1, 1]) with the mean text score."""
+        rating_score = (avg_rating - 3.0) / 2.0
+        combined = 0.5 * rating_score + 0.5 * mean_text_score
+        if combined >= 0.25:
+            return "positive"
+        if combined >= -0.1:
+            return "neutral"
+        return "negative"
+    
     def _generate_placeholder_summary(self, reviews: List[Dict[str, Any]], avg_rating: float) -> str:
         """Generate a placeholder summary based on reviews and rating."""
         # Count verified purchases
         verified_count = sum(1 for review in reviews if review['verified_purchase'])
         verified_percentage = (verified_count / len(reviews)) * 100 if reviews else 0
         
-        # Get the most common words from review titles (excluding stop words)
-        title_text = " ".join([review['title'] for review in reviews if review['title']])
-        common_words = self._extract_common_words(title_text, exclude_words=[
-            "the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "with", 
-            "about", "is", "are", "was", "were", "be", "this", "that", "it", "of"
-        ])
+        # Get the most common phrases from review titles (excluding stop words)
+        common_words = self._extract_common_words(
+            (review['title'] for review in reviews if review['title']), limit=3, ngram=2
+        )
         
         # Structure based on rating
         if avg_rating >= 4.5:
@@ -93,112 +100,57 @@ class ReviewSummarizer:
         else:
             return f"This product has received predominantly negative reviews with an average of {avg_rating:.1f} stars. {verified_percentage:.0f}% of reviews are from verified purchases. Customers frequently mention issues with {', '.join(common_words[:3])}. Many users report disappointment with their purchase."
     
-    def _extract_common_words(self, text: str, exclude_words: List[str] = None, limit: int = 5) -> List[str]:
-        """Extract the most common meaningful words from text."""
-        if not text:
-            return []
-            
-        exclude_words = exclude_words or []
-        
-        # Convert to lowercase and split into words
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
-        
-        # Remove excluded words
-        filtered_words = [word for word in words if word not in exclude_words]
-        
-        # Count word frequency
-        word_counts = {}
-        for word in filtered_words:
-            word_counts[word] = word_counts.get(word, 0) + 1
-        
-        # Sort by frequency
-        sorted_words = sorted(word_counts.items(), key=lambda x: x[1], reverse=True)
-        
-        # Return the most common words
-        return [word for word, count in sorted_words[:limit]]
-    
-    def _extract_key_points(self, review_texts: List[str], review_titles: List[str]) -> List[str]:
-        """Extract key points from review texts and titles."""
-        # This is a placeholder. In a real implementation, this would use 
-        # the AI model to extract key points.
+    def _extract_common_words(self, texts: Union[str, Iterable[str]], exclude_words: Iterable[str] = None,
+                              limit: int = 5, ngram: int = 1) -> List[str]:
+        """
+        Extract the most common meaningful words or phrases from review texts.
         
-        if not review_texts:
+        Args:
+            texts (Union[str, Iterable[str]]): A single text or an iterable of review texts.
+            exclude_words (Iterable[str], optional): Stop words to ignore. Defaults to STOP_WORDS.
+            limit (int): Maximum number of terms to return.
+            ngram (int): Largest phrase size. With ngram=2, bigrams that occur more than
+                once are preferred and single words fill any remaining slots.
+            
+        Returns:
+            List[str]: Most common terms, most frequent first.
+        """
+        if not texts:
             return []
-        
-        # Some placeholder key points based on common review topics
-        potential_points = [
-            "Product quality is mentioned in many reviews.",
-            "Ease of use is a common theme.",
-            "Value for money is frequently discussed.",
-            "Durability appears to be important to reviewers.",
-            "Customer service experience is mentioned by some users.",
-            "Shipping and delivery are noted in several reviews.",
-            "Product appearance and design are highlighted.",
-            "Functionality meets expectations according to most users.",
-            "Size and dimensions are mentioned in multiple reviews.",
-            "Instructions and documentation are discussed by some reviewers."
-        ]
-        
-        # Randomly select 3-5 key points
-        num_points = min(random.randint(3, 5), len(potential_points))
-        return random.sample(potential_points, num_points)
+        if isinstance(texts, str):
+            texts = [texts]
+        
+        counter = TermCounter(max_n=ngram, stop_words=exclude_words).update_many(texts)
+        
+        terms = []
+        for n in range(ngram, 0, -1):
+            min_count = 2 if n > 1 else 1
+            # Ask for extra candidates to make up for words covered by a chosen phrase
+            covered = sum(len(phrase.split()) for phrase in terms)
+            for term, _ in counter.most_common(limit + covered, n=n, min_count=min_count):
+                # Skip single words already covered by a chosen phrase
+                if term not in terms and not any(term in phrase.split() for phrase in terms):
+                    terms.append(term)
+            if len(terms) >= limit:
+                break
+        
+        return terms[:limit]
     
-    def _extract_pros_cons(self, 
-                           review_texts: List[str], 
-                           review_titles: List[str], 
-                           avg_rating: float) -> tuple[List[str], List[str]]:
-        """Extract pros and cons from review texts and titles."""
-        # This is a placeholder. In a real implementation, this would use 
-        # the AI model to identify pros and cons.
-        
-        pros = []
-        cons = []
-        
-        # Some placeholder pros and cons
-        potential_pros = [
-            "Good value for money",
-            "High-quality materials",
-            "Easy to use",
-            "Durable construction",
-            "Excellent customer service",
-            "Fast shipping",
-            "Attractive design",
-            "Functions as advertised",
-            "Good size/dimensions",
-            "Clear instructions"
-        ]
-        
-        potential_cons = [
-            "Higher price than alternatives",
-            "Quality issues reported",
-            "Difficult to use for some users",
-            "Durability concerns",
-            "Customer service issues mentioned",
-            "Shipping delays noted",
-            "Design limitations",
-            "Limited functionality",
-            "Size not as expected",
-            "Unclear instructions"
-        ]
-        
-        # Select pros and cons based on average rating
+    def _extract_key_points(self, extractor: ProsConsExtractor) -> List[str]:
+        """Extract key points: the most discussed phrases and how reviewers feel about them."""
+        return extractor.key_points(limit=5)
+    
+    def _extract_pros_cons(self, extractor: ProsConsExtractor, avg_rating: float) -> Tuple[List[str], List[str]]:
+        """Extract pros and cons as representative sentences from positive and negative reviews."""
+        # Show more pros than cons for highly rated products, and the reverse
         if avg_rating >= 4.0:
-            # More pros than cons for highly rated products
-            num_pros = random.randint(3, 5)
-            num_cons = random.randint(1, 2)
+            num_pros, num_cons = 5, 2
         elif avg_rating >= 3.0:
-            # Balanced pros and cons for average rated products
-            num_pros = random.randint(2, 4)
-            num_cons = random.randint(2, 4)
+            num_pros, num_cons = 4, 4
         else:
-            # More cons than pros for poorly rated products
-            num_pros = random.randint(1, 2)
-            num_cons = random.randint(3, 5)
-        
-        pros = random.sample(potential_pros, min(num_pros, len(potential_pros)))
-        cons = random.sample(potential_cons, min(num_cons, len(potential_cons)))
+            num_pros, num_cons = 2, 5
         
-        return pros, cons
+        return extractor.pros(num_pros), extractor.cons(num_cons)
     
     def highlight_key_points(self, reviews: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -1,15 +1,35 @@
 """
 Amazon Product Comparison Analyzer
-Runs DeepSeek comparison analysis on two Amazon products
+Runs DeepSeek comparison analysis on two Amazon products, or on a list of
+any number of products through a single comparison matrix
 """
 
 import os
 import sys
 import json
 import time
-import requests
+import argparse
+import contextlib
+import functools
 from pathlib import Path
-from dotenv import load_dotenv
+
+try:
+    from .llm_cache import get_response_cache, make_cache_key
+    from .llm_client import chat_completion, response_content
+    from .review_mapreduce import chunk_reviews, map_reduce
+    from .prompt_budget import estimate_tokens, prepare_reviews, select_reviews
+    from .product_digest import format_digest, get_product_digests, product_label
+    from .structured_output import (COMPARISON_SCHEMA, MATRIX_COMPARISON_SCHEMA, chat_repair,
+                                    complete_structured_output, recover_json)
+except ImportError:
+    # Run directly as a script by server.js
+    from llm_cache import get_response_cache, make_cache_key
+    from llm_client import chat_completion, response_content
+    from review_mapreduce import chunk_reviews, map_reduce
+    from prompt_budget import estimate_tokens, prepare_reviews, select_reviews
+    from product_digest import format_digest, get_product_digests, product_label
+    from structured_output import (COMPARISON_SCHEMA, MATRIX_COMPARISON_SCHEMA, chat_repair,
+                                   complete_structured_output, recover_json)
 
 # Get the directory of this script
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -21,15 +41,59 @@ comparison_prompt_path = os.path.join(script_dir, '../comparison_prompt.txt')
 comparison_result_path = os.path.join(script_dir, '../comparison_result.json')
 
 # DeepSeek API configuration
-load_dotenv(os.path.join(root_dir, '.env'))
-API_KEY = os.environ.get('DEEPSEEK_API_KEY')
+@functools.lru_cache(maxsize=None)
+def get_api_key():
+    """Return the DeepSeek API key, loading the .env file on first call rather than at import time"""
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(root_dir, '.env'))
+    return os.environ.get('DEEPSEEK_API_KEY')
 
-if API_KEY:
-    print(f"DEBUG (comparison_analyzer.py): Loaded API key ending with: ...{API_KEY[-4:]}")
-else:
-    print("DEBUG (comparison_analyzer.py): DEEPSEEK_API_KEY not found in environment variables.")
+API_BASE_URL = 'https://api.deepseek.com/v1'
+DEEPSEEK_MODEL = 'deepseek-chat'
+COMPARISON_SYSTEM_PROMPT = "You are a helpful assistant that analyzes Amazon products and compares them accurately. Always respond with valid JSON as instructed."
+COMPARISON_TEMPERATURE = 0.3  # Lower temperature for more consistent results
 
-API_ENDPOINT = 'https://api.deepseek.com/v1/chat/completions'
+# Estimated tokens of verbatim reviews per product; larger review sets are
+# condensed into a digest of all reviews plus a few samples
+REVIEW_TOKEN_BUDGET = 1500
+SAMPLE_TOKEN_BUDGET = 400
+REVIEW_DIGEST_SYSTEM_PROMPT = """You condense Amazon customer reviews into a compact digest. Respond only with valid JSON using this schema:
+{
+  "strengths": [{"point": "string", "mentions": "number (reviews mentioning it)", "quote": "string"}],
+  "complaints": [{"point": "string", "mentions": "number (reviews mentioning it)", "quote": "string"}],
+  "use_cases": ["string"]
+}
+Order each list by mentions, most frequent first."""
+
+MATRIX_PROMPT_HEADER = """
+You are an intelligent assistant comparing {count} competing Amazon products from digests of their product data and customer reviews. Help a seller see where each product wins, where it is weak, and who should buy which.
+
+Output a structured JSON with the following schema:
+{{
+  "comparison_matrix": [
+    {{
+      "feature": "string (e.g., 'Battery Life')",
+      "scores": {{"A": "number 1-5", "B": "number 1-5"}},
+      "best_product": "label",
+      "summary": "string (what separates the products here)"
+    }}
+  ],
+  "critical_weaknesses": [
+    {{
+      "feature": "string",
+      "worse_product": "label",
+      "issue": "string (what customers complained about)",
+      "severity": "low | medium | high"
+    }}
+  ],
+  "shared_strengths": ["string"],
+  "unique_selling_points": {{"A": ["string"], "B": ["string"]}},
+  "buyer_recommendation": "string (which buyer should pick which product, with reasoning)"
+}}
+
+Score every product ({labels}) on every feature in the matrix and use their labels as keys.
+Focus on what matters to buyers, not spec-sheet trivia, and back claims with the review themes.
+"""
 
 def read_comparison_data():
     """Read the comparison data from the JSON file"""
@@ -70,36 +134,36 @@ You are an intelligent assistant comparing two similar Amazon products based on
     Identify features to emphasize, improve, or de-emphasize
 
 Output a structured JSON with the following schema:
-{
+{{
   "product_advantages": [
-    {
+    {{
       "feature": "string (e.g., 'Battery Life')",
       "better_product": "A or B",
       "summary": "string (why this product wins here)",
       "quote": "string (optional review quote that supports it)"
-    }
+    }}
   ],
   "critical_weaknesses": [
-    {
+    {{
       "feature": "string (e.g., 'Build Quality')",
       "worse_product": "A or B",
       "issue": "string (what customers complained about)",
       "severity": "low | medium | high"
-    }
+    }}
   ],
   "shared_strengths": [
     "string", "string", "string"
   ],
-  "unique_selling_points": {
+  "unique_selling_points": {{
     "product_A": [
       "string (selling point unique to A)"
     ],
     "product_B": [
       "string (selling point unique to B)"
     ]
-  },
+  }},
   "buyer_recommendation": "string (short recommendation on which buyer would prefer A vs B, with reasoning)"
-}
+}}
 
 Focus on what matters to buyers, not spec-sheet trivia.
 Use review-backed insights, not assumptions.
@@ -131,14 +195,14 @@ Compare these products and provide your analysis as the JSON schema shown above.
         product_a_rating=product_a_analysis.get('average_rating', 0),
         product_a_review_count=product_a_analysis.get('total_reviews', 0),
         product_a_description=product_a_details.get('description', 'No description available'),
-        product_a_reviews=format_reviews(product_a_reviews[:8]),  # Limit to 8 reviews to avoid token limits
+        product_a_reviews=summarize_reviews(product_a_reviews),
         
         product_b_title=product_b_details.get('description', 'Unknown Product B'),
         product_b_price=product_b_details.get('price', 'Unknown Price'),
         product_b_rating=product_b_analysis.get('average_rating', 0),
         product_b_review_count=product_b_analysis.get('total_reviews', 0),
         product_b_description=product_b_details.get('description', 'No description available'),
-        product_b_reviews=format_reviews(product_b_reviews[:8])  # Limit to 8 reviews to avoid token limits
+        product_b_reviews=summarize_reviews(product_b_reviews)
     )
     
     return prompt
@@ -149,7 +213,7 @@ def format_reviews(reviews):
     for i, review in enumerate(reviews, 1):
         rating = review.get('rating', 'Unknown Rating')
         title = review.get('title', 'No Title')
-        content = review.get('content', 'No Content')
+        content = review.get('text') or review.get('content', 'No Content')
         
         formatted_reviews += f"Review {i}:\n"
         formatted_reviews += f"Rating: {rating}/5\n"
@@ -158,66 +222,185 @@ def format_reviews(reviews):
     
     return formatted_reviews
 
-def call_deepseek_api(prompt):
-    """Call the DeepSeek API with the given prompt"""
-    headers = {
-        'Content-Type': 'application/json',
-        'Authorization': f'Bearer {API_KEY}'
-    }
+def summarize_reviews(reviews):
+    """
+    Format a product's reviews for the comparison prompt.
+    Reviews that fit REVIEW_TOKEN_BUDGET are included verbatim; larger sets are
+    condensed by a map-reduce digest over every review, followed by a few samples.
+    """
+    prepared = prepare_reviews(reviews)
+    if sum(estimate_tokens(format_reviews_batch_line(review)) for review in prepared) <= REVIEW_TOKEN_BUDGET:
+        return format_reviews(prepared)
+    
+    batches = chunk_reviews(prepared, formatter=format_reviews_batch_line)
+    map_prompts = [
+        f"Reviews (batch {i} of {len(batches)}):\n\n{format_reviews(batch)}Condense these reviews into the JSON digest."
+        for i, batch in enumerate(batches, 1)
+    ]
+    
+    def reduce_prompt(partials):
+        partials_block = "\n\n".join(json.dumps(partial, ensure_ascii=False) for partial in partials)
+        return (f"These digests each cover a different batch of reviews of the same product:\n\n{partials_block}\n\n"
+                "Merge them into one digest with the same schema, combining duplicate points and summing their mentions.")
+    
+    try:
+        digest, failed = map_reduce(map_prompts, reduce_prompt, REVIEW_DIGEST_SYSTEM_PROMPT, model=DEEPSEEK_MODEL,
+                                    temperature=COMPARISON_TEMPERATURE, api_key=get_api_key(), base_url=API_BASE_URL)
+    except Exception as e:
+        print(f"Error condensing reviews: {e}")
+        digest = None
+    if digest is None:
+        return format_reviews(select_reviews(reviews, REVIEW_TOKEN_BUDGET, formatter=format_reviews_batch_line))
+    
+    covered = len(prepared) - sum(len(batches[i]) for i in failed)
+    heading = f"Digest of all {len(prepared)} reviews" if not failed else f"Digest of {covered} of {len(prepared)} reviews"
+    samples = select_reviews(reviews, SAMPLE_TOKEN_BUDGET, formatter=format_reviews_batch_line)
+    return (f"{heading}:\n{json.dumps(digest, indent=2)}\n\n"
+            f"Sample reviews:\n{format_reviews(samples)}")
+
+def format_reviews_batch_line(review):
+    """Format a single review, used to size review batches"""
+    return format_reviews([review])
+
+def generate_matrix_prompt(digests):
+    """Generate one comparison matrix prompt for any number of product digests"""
+    labels = [product_label(i) for i in range(len(digests))]
+    sections = "\n\n".join(format_digest(label, digest) for label, digest in zip(labels, digests))
+    header = MATRIX_PROMPT_HEADER.format(count=len(digests), labels=", ".join(labels))
+    return f"{header}\n{sections}\n\nCompare these products and provide your analysis as the JSON schema shown above.\n"
+
+def compare_products(products, use_cache=True):
+    """
+    Compare N products with a single matrix prompt built from cached digests.
+    Each product is digested once (locally, and reused across comparisons),
+    so the prompt and cost grow with N instead of N^2 pairwise runs.
+    Returns the comparison result with a 'products' legend, or None on failure.
+    """
+    digests = get_product_digests(products, use_cache=use_cache)
+    result = get_comparison_result(generate_matrix_prompt(digests), use_cache=use_cache,
+                                   schema=MATRIX_COMPARISON_SCHEMA)
+    if result is None:
+        return None
+    result['products'] = [
+        {"label": product_label(i), "title": digest['title'], "url": digest['url'], "price": digest['price']}
+        for i, digest in enumerate(digests)
+    ]
+    return result
+
+def get_comparison_result(prompt, use_cache=True, schema=COMPARISON_SCHEMA):
+    """
+    Run a comparison prompt, reusing the result of an identical earlier comparison if there is one.
+    The answer is validated against schema; missing or invalid sections are requested
+    again with one targeted repair call instead of rerunning the whole comparison.
+    """
+    cache = get_response_cache() if use_cache else None
+    cache_key = make_cache_key(DEEPSEEK_MODEL, COMPARISON_SYSTEM_PROMPT, prompt, COMPARISON_TEMPERATURE)
+    result = cache.get(cache_key) if cache else None
+    if result is not None:
+        print("Using cached comparison result")
+        return result
+    
+    # Call the DeepSeek API
+    api_response = call_deepseek_api(prompt)
+    if not api_response:
+        print("Error: Failed to get response from DeepSeek API")
+        return None
+    
+    # Recover and validate the JSON, repairing only the sections that need it
+    repair = chat_repair(COMPARISON_SYSTEM_PROMPT, prompt, DEEPSEEK_MODEL, temperature=COMPARISON_TEMPERATURE,
+                         api_key=get_api_key(), base_url=API_BASE_URL)
+    content = response_content(api_response) if api_response.get('choices') else None
+    result, _, incomplete = complete_structured_output(content, schema, repair=repair)
+    if not result:
+        print("Error: Failed to extract JSON from response")
+        return None
+    
+    # Only cache complete results, so a bad answer can be retried
+    if cache and not incomplete:
+        cache.put(cache_key, result)
+    return result
+
+def run_comparison(data, use_cache=True):
+    """
+    Run a comparison on data held in memory and return the result dict, or None if the API call failed.
+    data holds either a 'products' list for an N-way comparison, or 'product_A' and
+    'product_B' with an optional pre-built 'prompt'. No files are read or written,
+    so concurrent comparisons do not interfere.
+    Raises ValueError if the products are missing.
+    """
+    products = data.get('products')
+    if products is not None:
+        if len(products) < 2:
+            raise ValueError("At least two products are needed for a comparison")
+        print(f"Comparing {len(products)} products")
+        return compare_products(products, use_cache=use_cache)
     
+    product_a = data.get('product_A')
+    product_b = data.get('product_B')
+    if not product_a or not product_b:
+        raise ValueError("Missing product data")
+    prompt = data.get('prompt') or generate_comparison_prompt(product_a, product_b)
+    return get_comparison_result(prompt, use_cache=use_cache)
+
+def call_deepseek_api(prompt, timeout=120.0):
+    """Call the DeepSeek API with the given prompt"""
     payload = {
-        "model": "deepseek-chat",
+        "model": DEEPSEEK_MODEL,
         "messages": [
-            {"role": "system", "content": "You are a helpful assistant that analyzes Amazon products and compares them accurately. Always respond with valid JSON as instructed."},
+            {"role": "system", "content": COMPARISON_SYSTEM_PROMPT},
             {"role": "user", "content": prompt}
         ],
-        "temperature": 0.3,  # Lower temperature for more consistent results
+        "temperature": COMPARISON_TEMPERATURE,
         "max_tokens": 3000
     }
     
     try:
-        response = requests.post(API_ENDPOINT, headers=headers, json=payload)
-        response.raise_for_status()
-        return response.json()
+        # Pooled client with a request timeout and Retry-After handling on 429s
+        return chat_completion(payload, api_key=get_api_key(), base_url=API_BASE_URL, timeout=timeout)
     except Exception as e:
         print(f"Error calling DeepSeek API: {e}")
-        if hasattr(e, 'response') and hasattr(e.response, 'text'):
-            print(f"Response: {e.response.text}")
         return None
 
 def extract_json_from_response(response):
-    """Extract JSON from the DeepSeek API response"""
-    if not response or 'choices' not in response:
-        return None
-    
-    try:
-        content = response['choices'][0]['message']['content']
-        
-        # Extract JSON from the response
-        # Try to find JSON between code blocks first
-        import re
-        json_match = re.search(r'```json\s*(.*?)\s*```', content, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
-        else:
-            # If no code blocks, try to parse the whole content
-            json_str = content
-        
-        # Clean up any markdown or text around the JSON
-        json_str = json_str.replace('```json', '').replace('```', '')
-        
-        return json.loads(json_str)
-    except Exception as e:
-        print(f"Error extracting JSON from response: {e}")
-        print(f"Response content: {content}")
+    """Extract JSON from the DeepSeek API response, tolerating code fences, surrounding text and truncation"""
+    if not response or not response.get('choices'):
         return None
+    return recover_json(response_content(response))
 
 def main():
     """Main function to run the comparison analysis"""
+    parser = argparse.ArgumentParser(description="Compare Amazon products with DeepSeek")
+    parser.add_argument("--stdin", action="store_true",
+                        help="Read the comparison data as JSON from stdin and write the result to stdout instead of using files")
+    args = parser.parse_args()
+    
+    if args.stdin:
+        comparison_data = json.load(sys.stdin)
+        out = sys.stdout
+        # Keep stdout for the JSON result; progress messages go to stderr
+        with contextlib.redirect_stdout(sys.stderr):
+            if not get_api_key():
+                print("ERROR: DEEPSEEK_API_KEY is not set. Please ensure it's in your .env file.")
+            try:
+                result = run_comparison(comparison_data)
+                error = None if result is not None else "Failed to get a comparison from DeepSeek API"
+            except ValueError as e:
+                result, error = None, str(e)
+        if error:
+            print(json.dumps({"success": False, "error": error}), file=out)
+            return 1
+        print(json.dumps(result), file=out)
+        return 0
+    
     print("Starting comparison analysis...")
     
     # Check if API key is configured
-    if not API_KEY:
+    api_key = get_api_key()
+    if api_key:
+        print(f"DEBUG (comparison_analyzer.py): Loaded API key ending with: ...{api_key[-4:]}", file=sys.stderr)
+    else:
+        print("DEBUG (comparison_analyzer.py): DEEPSEEK_API_KEY not found in environment variables.", file=sys.stderr)
+    if not api_key:
         print("ERROR: DEEPSEEK_API_KEY is not set. Please ensure it's in your .env file.")
         print("The API call will fail without a valid API key.")
         # Optionally, exit if no API key, or rely on the call_deepseek_api to fail
@@ -226,37 +409,22 @@ def main():
 
     # Read the comparison data
     comparison_data = read_comparison_data()
-    if comparison_data:
-        product_a = comparison_data.get('product_A')
-        product_b = comparison_data.get('product_B')
-        
-        if not product_a or not product_b:
-            print("Error: Missing product data")
-            return 1
-        
-        # Read the comparison prompt if it exists
-        prompt = read_comparison_prompt()
-        if not prompt:
-            # If no prompt found, generate one
-            prompt = generate_comparison_prompt(product_a, product_b)
-    else:
+    if not comparison_data:
         print("Error: No comparison data found")
         return 1
     
-    # Save the prompt for debugging
-    with open(comparison_prompt_path, 'w', encoding='utf-8') as f:
-        f.write(prompt)
+    if not comparison_data.get('products'):
+        # Read the comparison prompt if it exists
+        prompt = read_comparison_prompt()
+        if prompt:
+            comparison_data = {**comparison_data, 'prompt': prompt}
     
-    # Call the DeepSeek API
-    api_response = call_deepseek_api(prompt)
-    if not api_response:
-        print("Error: Failed to get response from DeepSeek API")
+    try:
+        result = run_comparison(comparison_data)
+    except ValueError as e:
+        print(f"Error: {e}")
         return 1
-    
-    # Extract the JSON from the response
-    result = extract_json_from_response(api_response)
-    if not result:
-        print("Error: Failed to extract JSON from response")
+    if result is None:
         return 1
     
     # Save the result
@@ -268,4 +436,4 @@ def main():
     return 0
 
 if __name__ == "__main__":
-    sys.exit(main()) 
\ No newline at end of file
+    sys.exit(main())
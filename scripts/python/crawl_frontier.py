@@ -0,0 +1,200 @@
+"""
+Crawl frontier for discovering a category's competitive set.
+
+Starting from seed ASINs, the frontier expands through the similar products
+listed on each crawled page, up to a chosen depth and a number of neighbours
+per product. Work is ordered by a priority queue: shallower products first,
+then products with stronger rating and review-count signals. Seen ASINs are
+kept in a Bloom filter, so millions of IDs fit in a few megabytes, and a
+product is never queued, or fetched, twice in a run.
+"""
+
+import hashlib
+import heapq
+import itertools
+import math
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    from .insight_store import extract_asin
+except ImportError:
+    # Run directly as a script by server.js
+    from insight_store import extract_asin
+
+DEFAULT_CAPACITY = 1_000_000
+DEFAULT_ERROR_RATE = 0.001
+
+_ASIN_RE = re.compile(r'^[A-Z0-9]{10}$')
+
+
+class BloomFilter:
+    """
+    Fixed-size set membership filter without false negatives.
+
+    An item that was added is always reported as present; an item that was not
+    added is reported as present with probability of about ``error_rate`` once
+    ``capacity`` items are stored.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE):
+        """
+        Size the filter for an expected number of items.
+
+        Args:
+            capacity (int): Expected number of items.
+            error_rate (float): Target false positive rate at capacity.
+        """
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> List[int]:
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def add(self, item: str) -> bool:
+        """
+        Add an item.
+
+        Args:
+            item (str): Item to add.
+
+        Returns:
+            bool: True if the item was new, False if it was (probably) already present.
+        """
+        new = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self._bits[position >> 3] & mask:
+                self._bits[position >> 3] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    @property
+    def memory_bytes(self) -> int:
+        """Size of the bit array in bytes."""
+        return len(self._bits)
+
+
+class FrontierItem:
+    """A product waiting to be crawled."""
+
+    __slots__ = ('asin', 'url', 'depth', 'score')
+
+    def __init__(self, asin: str, url: str, depth: int, score: float):
+        self.asin = asin
+        self.url = url
+        self.depth = depth
+        self.score = score
+
+    def __repr__(self) -> str:
+        return f"FrontierItem({self.asin!r}, depth={self.depth}, score={self.score:.2f})"
+
+
+def product_score(product: Dict[str, Any]) -> float:
+    """Priority signal of a similar product: its rating weighted by the log of its review count."""
+    rating = product.get('rating') or 0.0
+    review_count = product.get('review_count') or 0
+    return rating * math.log1p(review_count)
+
+
+def normalize_asin(seed: str) -> Optional[str]:
+    """Return the ASIN of a seed given as an ASIN or a product URL, or None."""
+    seed = seed.strip()
+    if _ASIN_RE.match(seed):
+        return seed
+    return extract_asin(seed)
+
+
+class CrawlFrontier:
+    """
+    Priority-ordered, de-duplicated queue of products for a bounded-depth crawl.
+    """
+
+    def __init__(self, seeds: Iterable[str] = (), max_depth: int = 1, max_breadth: int = 10,
+                 max_products: Optional[int] = None, capacity: int = DEFAULT_CAPACITY,
+                 error_rate: float = DEFAULT_ERROR_RATE):
+        """
+        Initialize the frontier with seed products at depth 0.
+
+        Args:
+            seeds (Iterable[str]): Seed ASINs or product URLs.
+            max_depth (int): Number of similar-product hops followed from the seeds.
+            max_breadth (int): Maximum number of similar products queued per crawled product.
+            max_products (int, optional): Stop handing out products after this many.
+            capacity (int): Expected number of distinct ASINs, to size the Bloom filter.
+            error_rate (float): Bloom filter false positive rate at capacity.
+        """
+        self.max_depth = max_depth
+        self.max_breadth = max_breadth
+        self.max_products = max_products
+        self.seen = BloomFilter(capacity, error_rate)
+        self.popped = 0
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        for seed in seeds:
+            asin = normalize_asin(seed)
+            if asin:
+                self.push(asin, depth=0)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, asin: str, depth: int, score: float = 0.0) -> bool:
+        """
+        Queue a product unless it was already seen in this run.
+
+        Args:
+            asin (str): Product ASIN.
+            depth (int): Hops from the nearest seed.
+            score (float): Priority among products of the same depth, higher first.
+
+        Returns:
+            bool: True if the product was queued.
+        """
+        if not self.seen.add(asin):
+            return False
+        item = FrontierItem(asin, f"https://www.amazon.com/dp/{asin}", depth, score)
+        # Shallower first, then higher score, then insertion order
+        heapq.heappush(self._heap, (depth, -score, next(self._sequence), item))
+        return True
+
+    def pop(self) -> Optional[FrontierItem]:
+        """Return the next product to crawl, or None when the frontier is exhausted or at max_products."""
+        if not self._heap or (self.max_products is not None and self.popped >= self.max_products):
+            return None
+        self.popped += 1
+        return heapq.heappop(self._heap)[-1]
+
+    def expand(self, item: FrontierItem, similar_products: Iterable[Dict[str, Any]]) -> int:
+        """
+        Queue the similar products of a crawled product, up to max_breadth.
+
+        Args:
+            item (FrontierItem): The crawled product.
+            similar_products (Iterable[Dict[str, Any]]): Its similar products, with ``asin`` keys.
+
+        Returns:
+            int: Number of newly queued products.
+        """
+        if item.depth >= self.max_depth:
+            return 0
+        candidates = [product for product in similar_products if product.get('asin')]
+        candidates.sort(key=product_score, reverse=True)
+        added = 0
+        for product in candidates:
+            if added >= self.max_breadth:
+                break
+            if self.push(product['asin'], item.depth + 1, product_score(product)):
+                added += 1
+        return added
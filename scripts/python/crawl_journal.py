@@ -0,0 +1,192 @@
+"""
+Append-only journal of completed crawl work, for resumable batch crawls.
+
+Each completed stage of a product (product details, reviews, summary, similar
+products, the final result) and each fetched review page is written to its own
+JSON file, then recorded as one line in a JSONL journal. A crawl restarted with
+the same journal replays it in well under a second, skips finished work and
+resumes partially paginated review fetches at the next page. A line torn by a
+crash is cut off on replay, so the next record starts on a line of its own,
+and output files are written atomically, so a record always points at a
+complete file.
+
+Journaling is opt-in (``--journal``). Once a run leaves no product unfinished,
+the journal and its outputs are removed, so a later crawl with the same
+journal starts over instead of returning stale results.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Stage name of the complete result of a product
+PRODUCT_STAGE = 'product'
+
+
+class CrawlJournal:
+    """
+    Records, per ASIN and per stage, what completed and where its output lives.
+    """
+
+    def __init__(self, path: str, output_dir: Optional[str] = None):
+        """
+        Open a journal, replaying the records of earlier runs.
+
+        Args:
+            path (str): Journal file (JSONL). Created if missing.
+            output_dir (str, optional): Directory of the stage outputs. Defaults to
+                ``<journal name>_outputs`` next to the journal.
+        """
+        self.path = Path(path)
+        self.output_dir = Path(output_dir) if output_dir else self.path.with_name(f"{self.path.stem}_outputs")
+        self._stages: Dict[Tuple[str, str], str] = {}
+        self._pages: Dict[str, Dict[int, str]] = {}
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._replay()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _replay(self) -> None:
+        """Load the records of earlier runs, cutting off a torn last line."""
+        if not self.path.exists():
+            return
+        complete = 0
+        with open(self.path, 'rb') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.endswith(b'\n'):
+                    # Torn by a crash mid-write; the next record must not be appended onto it
+                    logger.warning(f"Dropping torn journal line {line_number} in {self.path}")
+                    break
+                complete += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Ignoring unreadable journal line {line_number} in {self.path}")
+                    continue
+                if record.get('type') == 'stage':
+                    self._stages[(record['asin'], record['stage'])] = record['output']
+                elif record.get('type') == 'page':
+                    self._pages.setdefault(record['asin'], {})[record['page']] = record['output']
+        if complete < self.path.stat().st_size:
+            with open(self.path, 'r+b') as f:
+                f.truncate(complete)
+        logger.info(f"Replayed {len(self._stages)} stages and "
+                    f"{sum(len(pages) for pages in self._pages.values())} review pages from {self.path}")
+
+    def _write_output(self, relative: str, output: Any) -> None:
+        """Write an output file atomically, so a crash never leaves a partial file behind."""
+        target = self.output_dir / relative
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp = target.with_name(target.name + '.tmp')
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(output, f, ensure_ascii=False)
+        os.replace(temp, target)
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        """Append one record and force it to disk."""
+        record['time'] = time.time()
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _read_output(self, relative: str) -> Any:
+        with open(self.output_dir / relative, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def is_done(self, asin: str, stage: str) -> bool:
+        """Return whether a stage of a product completed in this or an earlier run."""
+        relative = self._stages.get((asin, stage))
+        return relative is not None and (self.output_dir / relative).exists()
+
+    def load_output(self, asin: str, stage: str) -> Any:
+        """
+        Load the recorded output of a completed stage.
+
+        Args:
+            asin (str): Product ASIN.
+            stage (str): Stage name.
+
+        Returns:
+            Any: The stage output.
+        """
+        return self._read_output(self._stages[(asin, stage)])
+
+    def record_stage(self, asin: str, stage: str, output: Any) -> None:
+        """
+        Store the output of a completed stage and record it.
+
+        Args:
+            asin (str): Product ASIN.
+            stage (str): Stage name.
+            output (Any): JSON-serializable stage output.
+        """
+        relative = f"{asin}/{stage}.json"
+        with self._lock:
+            self._write_output(relative, output)
+            self._append({'type': 'stage', 'asin': asin, 'stage': stage, 'output': relative})
+            self._stages[(asin, stage)] = relative
+
+    def record_page(self, asin: str, page: int, reviews: List[Dict[str, Any]]) -> None:
+        """
+        Store the reviews of a fetched review page and record it.
+
+        Args:
+            asin (str): Product ASIN.
+            page (int): Page number, starting at 1.
+            reviews (List[Dict[str, Any]]): New reviews of the page.
+        """
+        relative = f"{asin}/reviews_page_{page}.json"
+        with self._lock:
+            self._write_output(relative, reviews)
+            self._append({'type': 'page', 'asin': asin, 'page': page, 'output': relative})
+            self._pages.setdefault(asin, {})[page] = relative
+
+    def resume_reviews(self, asin: str) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Return where a partially paginated review fetch should resume.
+
+        Args:
+            asin (str): Product ASIN.
+
+        Returns:
+            Tuple[int, List[Dict[str, Any]]]: The next page to fetch, and the reviews
+            of the consecutive pages already fetched from page 1.
+        """
+        pages = self._pages.get(asin, {})
+        reviews: List[Dict[str, Any]] = []
+        page = 1
+        while page in pages and (self.output_dir / pages[page]).exists():
+            reviews.extend(self._read_output(pages[page]))
+            page += 1
+        return page, reviews
+
+    def unfinished(self) -> Set[str]:
+        """Return the ASINs with recorded stages or review pages but no complete result."""
+        with self._lock:
+            started = {asin for asin, _ in self._stages} | set(self._pages)
+            return {asin for asin in started if not self.is_done(asin, PRODUCT_STAGE)}
+
+    def close(self) -> None:
+        """Close the journal file."""
+        self._file.close()
+
+    def remove(self) -> None:
+        """Close the journal and delete it with every stage output, once the crawl is finished."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+        shutil.rmtree(self.output_dir, ignore_errors=True)
+
+    def __enter__(self) -> "CrawlJournal":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -6,21 +6,101 @@ This script processes review.json and generates an AI analysis using DeepSeek AP
 import os
 import json
 import sys
+import asyncio
+import argparse
+import contextlib
+import functools
 from pathlib import Path
-from openai import OpenAI
-from dotenv import load_dotenv
+
+try:
+    from .llm_cache import get_response_cache, make_cache_key
+    from .llm_client import AsyncLLMClient, response_content
+    from .review_mapreduce import DEFAULT_BATCH_TOKEN_BUDGET, chunk_reviews, format_review_line, map_reduce
+    from .prompt_budget import prepare_reviews, select_reviews
+    from .json_stream import JSONStreamParser, iter_events
+    from .structured_output import ANALYSIS_SCHEMA, chat_repair, complete_structured_output, recover_json
+    from .insight_store import extract_asin, get_insight_store, split_new_reviews
+    from .metrics import timed
+except ImportError:
+    # Run directly as a script by server.js
+    from llm_cache import get_response_cache, make_cache_key
+    from llm_client import AsyncLLMClient, response_content
+    from review_mapreduce import DEFAULT_BATCH_TOKEN_BUDGET, chunk_reviews, format_review_line, map_reduce
+    from prompt_budget import prepare_reviews, select_reviews
+    from json_stream import JSONStreamParser, iter_events
+    from structured_output import ANALYSIS_SCHEMA, chat_repair, complete_structured_output, recover_json
+    from insight_store import extract_asin, get_insight_store, split_new_reviews
+    from metrics import timed
 
 # ============================================================
 # API KEY CONFIGURATION
-# Load environment variables from .env file
-load_dotenv()
-DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
-if DEEPSEEK_API_KEY:
-    print(f"DEBUG: Loaded API key ending with: ...{DEEPSEEK_API_KEY[-4:]}")
-else:
-    print("DEBUG: DEEPSEEK_API_KEY not found in environment variables.")
+# The key is loaded from the .env file on first use, not at import time,
+# so importing this module stays cheap for every spawned process
+@functools.lru_cache(maxsize=None)
+def get_api_key():
+    """Return the DeepSeek API key, loading environment variables from .env on first call"""
+    from dotenv import load_dotenv
+    load_dotenv()
+    return os.getenv("DEEPSEEK_API_KEY")
 # ============================================================
 
+DEEPSEEK_MODEL = "deepseek-chat"
+DEEPSEEK_BASE_URL = "https://api.deepseek.com"
+REQUEST_TIMEOUT = 120.0
+# Estimated tokens of review text in a single-call prompt
+PROMPT_TOKEN_BUDGET = 3000
+
+_client = None
+
+ANALYSIS_SYSTEM_PROMPT = """You are an advanced assistant helping Amazon sellers optimize their product listings using customer reviews. Your job is to extract actionable, seller-focused insights based on review sentiment, trends, and buyer language.
+
+Focus on surfacing what matters for:
+
+    Optimizing bullet points and product descriptions
+
+    Addressing buyer concerns and preemptive objections
+
+    Highlighting competitive advantages based on real feedback
+
+Return a structured JSON with the following schema:
+
+{
+  "top_strengths": [
+    {
+      "feature": "string (the praised feature)",
+      "listing_advice": "string (how to phrase it in bullets or description)",
+      "example_quote": "string (optional review excerpt to back it up)"
+    }
+  ],
+  "buyer_personas": [
+    {
+      "persona": "string (short label, e.g., 'Remote Worker')",
+      "description": "string (what this type of buyer values in the product)"
+    }
+  ],
+  "negative_trends": [
+    {
+      "issue": "string (summarized recurring complaint)",
+      "seller_fix": "string (how to fix it in listing, manual, or packaging)",
+      "severity": "low | medium | high"
+    }
+  ],
+  "undocumented_features": [
+    {
+      "feature": "string (unexpected but appreciated feature)",
+      "quote": "string (short review quote showing this)"
+    }
+  ],
+  "standout_quotes": [
+    "string", "string", "string"
+  ]
+}
+
+Be concise but specific. Use bullet-point logic, not narrative fluff.
+Emphasize seller actionability over general sentiment.
+If reviews contain contradictory opinions, indicate that subtly in your fields.
+Prioritize information not already obvious in the current Amazon listing."""
+
 def load_review_data(filepath):
     """Load review data from JSON file"""
     try:
@@ -50,8 +130,8 @@ def generate_mock_data():
         }
     }
 
-def generate_prompt(data):
-    """Generate a structured prompt from the review data"""
+def _product_header(data):
+    """Format the product lines shared by the map and reduce prompts"""
     product_title = data.get("product_details", {}).get("description", "").split("About this item")[0]
     if not product_title:
         product_title = "Unknown Product"
@@ -62,20 +142,30 @@ def generate_prompt(data):
     avg_rating = data.get("review_data", {}).get("analysis", {}).get("average_rating", "Unknown")
     total_reviews = data.get("review_data", {}).get("analysis", {}).get("total_reviews", "Unknown")
     
-    # Get up to 10 reviews for analysis
-    reviews = data.get("review_data", {}).get("reviews", [])
-    review_texts = []
-    for review in reviews[:10]:
-        review_texts.append(f"Rating: {review.get('rating')} - {review.get('text', '')}")
+    return f"""Product: {product_title}
+Price: {product_price}
+Average Rating: {avg_rating} from {total_reviews} reviews"""
+
+def generate_prompt(data, reviews=None, part=None):
+    """
+    Generate a structured prompt from the review data.
+    reviews defaults to the most informative reviews in data that fit PROMPT_TOKEN_BUDGET;
+    part is an optional (batch number, batch count) pair used by the map step of analyze_all_reviews.
+    """
+    if reviews is None:
+        reviews = select_reviews(data.get("review_data", {}).get("reviews", []), PROMPT_TOKEN_BUDGET,
+                                 formatter=format_review_line)
+    review_texts = [format_review_line(review) for review in reviews]
+    
+    reviews_block = "\n\n".join(review_texts)
+    reviews_heading = f"REVIEWS (batch {part[0]} of {part[1]}):" if part else "REVIEWS:"
     
     # Compile prompt
     prompt = f"""
-Product: {product_title}
-Price: {product_price}
-Average Rating: {avg_rating} from {total_reviews} reviews
+{_product_header(data)}
 
-REVIEWS:
-{"\\n\\n".join(review_texts)}
+{reviews_heading}
+{reviews_block}
 
 Based on the above information, analyze this product:
 1. Identify top strengths that should be highlighted in the listing
@@ -86,80 +176,317 @@ Based on the above information, analyze this product:
 """
     return prompt
 
-def get_deepseek_analysis(prompt):
-    """Query DeepSeek API with the prompt"""
-    client = OpenAI(api_key=DEEPSEEK_API_KEY, base_url="https://api.deepseek.com")
+def generate_reduce_prompt(data, partials):
+    """Generate the prompt that merges partial analyses of review batches into one"""
+    partials_block = "\n\n".join(json.dumps(partial, ensure_ascii=False) for partial in partials)
+    return f"""
+{_product_header(data)}
+
+The reviews of this product were analyzed in {len(partials)} separate batches.
+PARTIAL ANALYSES:
+{partials_block}
+
+Merge the partial analyses into a single analysis with the same JSON schema:
+1. Combine items that describe the same feature, persona or issue
+2. Rank items by how many batches mention them, most frequent first
+3. Raise the severity of negative trends reported across several batches
+4. Keep the most specific listing advice, fixes and quotes
+"""
+
+def analyze_all_reviews(data, batch_token_budget=DEFAULT_BATCH_TOKEN_BUDGET, max_concurrency=8, use_cache=True):
+    """
+    Analyze every review, not just the first few, with a map-reduce pass.
+    Reviews are packed into token-budgeted batches that are analyzed concurrently,
+    then the partial results are merged by one reduce call.
+    Returns the analysis as a JSON string, like get_deepseek_analysis. If some batches
+    failed, the analysis covers the others and counts the reviews left out in
+    'unanalyzed_reviews'.
+    """
+    # De-duplicate and cap long reviews so no single review dominates a batch
+    reviews = prepare_reviews(data.get("review_data", {}).get("reviews", []))
+    batches = chunk_reviews(reviews, batch_token_budget, formatter=format_review_line)
+    if len(batches) <= 1:
+        return get_deepseek_analysis(generate_prompt(data, reviews=reviews), use_cache=use_cache)
     
+    print(f"Analyzing {len(reviews)} reviews in {len(batches)} batches")
+    map_prompts = [generate_prompt(data, reviews=batch, part=(i, len(batches)))
+                   for i, batch in enumerate(batches, 1)]
     try:
-        response = client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
-                {"role": "system", "content": """You are an advanced assistant helping Amazon sellers optimize their product listings using customer reviews. Your job is to extract actionable, seller-focused insights based on review sentiment, trends, and buyer language.
+        result, failed = map_reduce(map_prompts, lambda partials: generate_reduce_prompt(data, partials),
+                                    ANALYSIS_SYSTEM_PROMPT, model=DEEPSEEK_MODEL, api_key=get_api_key(),
+                                    base_url=f"{DEEPSEEK_BASE_URL}/v1", max_concurrency=max_concurrency,
+                                    timeout=REQUEST_TIMEOUT, use_cache=use_cache)
+    except Exception as e:
+        print(f"Error calling DeepSeek API: {e}")
+        return error_analysis(e)
+    if result is None:
+        return error_analysis("Every review batch failed to analyze")
+    # Drop items that do not match the schema and mark sections left empty
+    analysis, _, _ = complete_structured_output(json.dumps(result), ANALYSIS_SCHEMA)
+    if failed:
+        # Mark the analysis as partial: the reviews of the failed batches were never analyzed
+        analysis["unanalyzed_reviews"] = sum(len(batches[i]) for i in failed)
+    return json.dumps(analysis)
 
-Focus on surfacing what matters for:
+def generate_refresh_prompt(data, previous, reviews, covered):
+    """Generate the prompt that updates a stored analysis with reviews it did not cover yet"""
+    reviews_block = "\n\n".join(format_review_line(review) for review in reviews)
+    return f"""
+{_product_header(data)}
 
-    Optimizing bullet points and product descriptions
+PREVIOUS ANALYSIS (covers {covered} earlier reviews):
+{json.dumps(previous, ensure_ascii=False)}
 
-    Addressing buyer concerns and preemptive objections
+NEW REVIEWS ({len(reviews)} not covered by the previous analysis):
+{reviews_block}
 
-    Highlighting competitive advantages based on real feedback
+Update the previous analysis with the new reviews and return the complete analysis with the same JSON schema:
+1. Keep earlier items unless the new reviews contradict them
+2. Add strengths, personas, issues, features and quotes that only the new reviews reveal
+3. Raise or lower the severity of negative trends the new reviews confirm or contradict
+4. Keep every list ordered by importance
+"""
 
-Return a structured JSON with the following schema:
+def _store_analysis(store, asin, response, fingerprints):
+    """
+    Store a complete analysis with the fingerprints it covers; failed or partial ones are not kept.
+    An analysis with unanalyzed_reviews left out some reviews, so storing it would mark those as covered
+    and no later refresh would send them.
+    """
+    analysis = parse_response_json(response)
+    if (analysis and not analysis.get("error") and not analysis.get("incomplete_sections")
+            and not analysis.get("unanalyzed_reviews")):
+        store.put(asin, analysis, fingerprints)
 
-{
-  "top_strengths": [
-    {
-      "feature": "string (the praised feature)",
-      "listing_advice": "string (how to phrase it in bullets or description)",
-      "example_quote": "string (optional review excerpt to back it up)"
-    }
-  ],
-  "buyer_personas": [
-    {
-      "persona": "string (short label, e.g., 'Remote Worker')",
-      "description": "string (what this type of buyer values in the product)"
-    }
-  ],
-  "negative_trends": [
-    {
-      "issue": "string (summarized recurring complaint)",
-      "seller_fix": "string (how to fix it in listing, manual, or packaging)",
-      "severity": "low | medium | high"
-    }
-  ],
-  "undocumented_features": [
-    {
-      "feature": "string (unexpected but appreciated feature)",
-      "quote": "string (short review quote showing this)"
-    }
-  ],
-  "standout_quotes": [
-    "string", "string", "string"
-  ]
-}
+def refresh_analysis(data, full=False, batch_token_budget=DEFAULT_BATCH_TOKEN_BUDGET, use_cache=True):
+    """
+    Analyze a product incrementally from the insights stored for its ASIN.
+    Only reviews whose fingerprints the stored analysis does not cover are sent,
+    together with the previous insights, so the cost follows the number of new
+    reviews. Products seen for the first time, products without an ASIN and
+    full=True runs are analyzed from scratch with analyze_all_reviews.
+    Returns the analysis as a JSON string, like get_deepseek_analysis.
+    """
+    store = get_insight_store()
+    asin = extract_asin(data.get("url"))
+    if store is None or asin is None:
+        return analyze_all_reviews(data, batch_token_budget, use_cache=use_cache)
+    
+    reviews = prepare_reviews(data.get("review_data", {}).get("reviews", []))
+    stored = None if full else store.get(asin)
+    if stored is None:
+        response = analyze_all_reviews(data, batch_token_budget, use_cache=use_cache)
+        _store_analysis(store, asin, response, [review["fingerprint"] for review in reviews])
+        return response
+    
+    new_reviews = split_new_reviews(reviews, stored["fingerprints"])
+    if not new_reviews:
+        print(f"No new reviews for {asin}, using the stored insights")
+        return json.dumps(stored["analysis"])
+    
+    print(f"Refreshing insights for {asin} with {len(new_reviews)} new reviews")
+    analysis, covered = stored["analysis"], set(stored["fingerprints"])
+    # Large updates are applied batch by batch, each on top of the previous result
+    for batch in chunk_reviews(new_reviews, batch_token_budget, formatter=format_review_line):
+        response = get_deepseek_analysis(generate_refresh_prompt(data, analysis, batch, len(covered)),
+                                         use_cache=use_cache)
+        updated = parse_response_json(response)
+        if not updated or updated.get("error") or updated.get("incomplete_sections"):
+            print(f"Error refreshing insights for {asin}, keeping the last complete analysis")
+            break
+        analysis = updated
+        covered.update(review["fingerprint"] for review in batch)
+    
+    if covered != stored["fingerprints"]:
+        store.put(asin, analysis, covered)
+    return json.dumps(analysis)
 
-Be concise but specific. Use bullet-point logic, not narrative fluff.
-Emphasize seller actionability over general sentiment.
-If reviews contain contradictory opinions, indicate that subtly in your fields.
-Prioritize information not already obvious in the current Amazon listing."""},
-                {"role": "user", "content": prompt},
-            ],
-            stream=False
-        )
-        return response.choices[0].message.content
+def get_client():
+    """Return the shared OpenAI client, so its connection pool is reused across calls"""
+    global _client
+    if _client is None:
+        # Imported here because openai is slow to import and only needed for this call
+        from openai import OpenAI
+        _client = OpenAI(api_key=get_api_key(), base_url=DEEPSEEK_BASE_URL, timeout=REQUEST_TIMEOUT)
+    return _client
+
+def error_analysis(error):
+    """Build the structured error response returned when an API call fails"""
+    return json.dumps({
+        "error": str(error),
+        "message": "Failed to call DeepSeek API. Please check your API key and network connection.",
+        "top_strengths": [],
+        "buyer_personas": [],
+        "negative_trends": [],
+        "undocumented_features": [],
+        "standout_quotes": []
+    })
+
+def finalize_analysis(content, prompt):
+    """
+    Recover and validate an analysis answer against ANALYSIS_SCHEMA.
+    Sections that are missing or invalid are requested again with one targeted
+    repair call instead of regenerating the whole analysis.
+    Returns (analysis dict or None, repaired sections, sections still invalid).
+    """
+    repair = chat_repair(ANALYSIS_SYSTEM_PROMPT, prompt, DEEPSEEK_MODEL, api_key=get_api_key(),
+                         base_url=f"{DEEPSEEK_BASE_URL}/v1", timeout=REQUEST_TIMEOUT)
+    return complete_structured_output(content, ANALYSIS_SCHEMA, repair=repair)
+
+def get_deepseek_analysis(prompt, use_cache=True):
+    """Query DeepSeek API with the prompt, reusing a cached result for identical prompts"""
+    cache = get_response_cache() if use_cache else None
+    cache_key = make_cache_key(DEEPSEEK_MODEL, ANALYSIS_SYSTEM_PROMPT, prompt)
+    if cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            print("Using cached DeepSeek analysis")
+            return json.dumps(cached)
+    
+    try:
+        with timed('llm_call'):
+            response = get_client().chat.completions.create(
+                model=DEEPSEEK_MODEL,
+                messages=[
+                    {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt},
+                ],
+                stream=False
+            )
+        content = response.choices[0].message.content
     except Exception as e:
         print(f"Error calling DeepSeek API: {e}")
         # Return a structured error response
-        error_response = {
-            "error": str(e),
-            "message": "Failed to call DeepSeek API. Please check your API key and network connection.",
-            "top_strengths": [],
-            "buyer_personas": [],
-            "negative_trends": [],
-            "undocumented_features": [],
-            "standout_quotes": []
-        }
-        return json.dumps(error_response)
+        return error_analysis(e)
+    
+    analysis, _, incomplete = finalize_analysis(content, prompt)
+    if analysis is None:
+        return content
+    # Only cache complete answers, so a bad answer can be retried
+    if cache and not incomplete:
+        cache.put(cache_key, analysis)
+    return json.dumps(analysis)
+
+def get_deepseek_analyses(prompts, max_concurrency=8, use_cache=True):
+    """
+    Query DeepSeek for many prompts concurrently over one pooled connection.
+    Cached prompts are answered locally; the rest run at most max_concurrency at a time.
+    Returns one response string per prompt, in order.
+    """
+    cache = get_response_cache() if use_cache else None
+    keys = [make_cache_key(DEEPSEEK_MODEL, ANALYSIS_SYSTEM_PROMPT, prompt) for prompt in prompts]
+    results = [None] * len(prompts)
+    
+    pending = []
+    for index, key in enumerate(keys):
+        cached = cache.get(key) if cache else None
+        if cached is not None:
+            results[index] = json.dumps(cached)
+        else:
+            pending.append(index)
+    
+    if pending:
+        payloads = [{
+            "model": DEEPSEEK_MODEL,
+            "messages": [
+                {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": prompts[index]},
+            ]
+        } for index in pending]
+        
+        async def _run():
+            async with AsyncLLMClient(api_key=get_api_key(), base_url=f"{DEEPSEEK_BASE_URL}/v1",
+                                      max_concurrency=max_concurrency, timeout=REQUEST_TIMEOUT) as client:
+                return await client.complete_many(payloads)
+        
+        for index, response in zip(pending, asyncio.run(_run())):
+            if isinstance(response, Exception):
+                print(f"Error calling DeepSeek API: {response}")
+                results[index] = error_analysis(response)
+                continue
+            content = response_content(response)
+            analysis, _, incomplete = finalize_analysis(content, prompts[index])
+            if analysis is None:
+                results[index] = content
+                continue
+            if cache and not incomplete:
+                cache.put(keys[index], analysis)
+            results[index] = json.dumps(analysis)
+    
+    return results
+
+def stream_event(path, index, value):
+    """Build the NDJSON event for one completed insight of a streamed analysis"""
+    return {"type": "insight", "field": path[0], "path": list(path), "index": index, "value": value}
+
+def stream_analysis(data, emit, use_cache=True):
+    """
+    Stream the analysis of the budgeted review prompt.
+    emit is called with an event dict as soon as each insight (an element of
+    top_strengths, negative_trends, ...) is complete, instead of after the whole
+    answer. A cached result is replayed as the same events.
+    Returns the full response text, like get_deepseek_analysis.
+    """
+    prompt = generate_prompt(data)
+    cache = get_response_cache() if use_cache else None
+    cache_key = make_cache_key(DEEPSEEK_MODEL, ANALYSIS_SYSTEM_PROMPT, prompt)
+    cached = cache.get(cache_key) if cache else None
+    if cached is not None:
+        for event in iter_events(cached):
+            emit(stream_event(*event))
+        return json.dumps(cached)
+    
+    payload = {
+        "model": DEEPSEEK_MODEL,
+        "messages": [
+            {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ]
+    }
+    parser = JSONStreamParser()
+    
+    async def _run():
+        async with AsyncLLMClient(api_key=get_api_key(), base_url=f"{DEEPSEEK_BASE_URL}/v1",
+                                  timeout=REQUEST_TIMEOUT) as client:
+            async for delta in client.stream_chat_completion(payload):
+                for event in parser.feed(delta):
+                    emit(stream_event(*event))
+    
+    try:
+        with timed('llm_call'):
+            asyncio.run(_run())
+    except Exception as e:
+        print(f"Error calling DeepSeek API: {e}", file=sys.stderr)
+        return error_analysis(e)
+    
+    analysis, repaired, incomplete = finalize_analysis(parser.text, prompt)
+    if analysis is None:
+        return parser.text
+    # Sections filled in by a repair call were never streamed
+    for section in repaired:
+        for event in iter_events({section: analysis[section]}):
+            emit(stream_event(*event))
+    if cache and not incomplete:
+        cache.put(cache_key, analysis)
+    return json.dumps(analysis)
+
+def print_ndjson(event, out=None):
+    """Write one event as a line of NDJSON to out (stdout by default)"""
+    print(json.dumps(event), file=out or sys.stdout, flush=True)
+
+def run_analysis(data, emit=None, use_cache=True, full=False):
+    """
+    Analyze product data held in memory and return the analysis as a dict.
+    With emit, insights are streamed to it as they complete (see stream_analysis);
+    otherwise every review is covered, incrementally from the stored insights of
+    the product when there are any (see refresh_analysis).
+    No files are read or written, so concurrent analyses do not interfere.
+    """
+    if emit is not None:
+        response = stream_analysis(data, emit, use_cache=use_cache)
+    else:
+        response = refresh_analysis(data, full=full, use_cache=use_cache)
+    return response_to_json(response)
 
 def generate_mock_analysis():
     """Generate a mock analysis when API call fails"""
@@ -197,25 +524,24 @@ def generate_mock_analysis():
     }
     return json.dumps(mock_analysis, indent=2)
 
+def parse_response_json(response):
+    """Parse the API response as JSON, tolerating code fences, surrounding text and truncation. Returns None if invalid."""
+    return recover_json(response)
+
+def response_to_json(response):
+    """Parse the API response, wrapping it in an error structure if it isn't valid JSON"""
+    response_json = parse_response_json(response)
+    if response_json is None:
+        response_json = {
+            "raw_response": response,
+            "error": "Response was not valid JSON"
+        }
+    return response_json
+
 def save_response(response, output_path):
     """Save the API response to a JSON file"""
     try:
-        # Clean up markdown formatting if present
-        cleaned_response = response
-        if response.startswith("```json"):
-            cleaned_response = response.replace("```json", "").replace("```", "").strip()
-        elif response.startswith("```"):
-            cleaned_response = response.replace("```", "").strip()
-            
-        # Attempt to parse the response as JSON
-        try:
-            response_json = json.loads(cleaned_response)
-        except json.JSONDecodeError:
-            # If the response isn't valid JSON, wrap it in a structure
-            response_json = {
-                "raw_response": response,
-                "error": "Response was not valid JSON"
-            }
+        response_json = response_to_json(response)
         
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(response_json, f, indent=2)
@@ -224,29 +550,58 @@ def save_response(response, output_path):
         print(f"Error saving response: {e}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Analyze review.json with DeepSeek and save response.json")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream insights to stdout as NDJSON events while the answer is generated")
+    parser.add_argument("--stdin", action="store_true",
+                        help="Read the product data as JSON from stdin and write the analysis to stdout instead of using files")
+    parser.add_argument("--full", action="store_true",
+                        help="Re-analyze every review instead of updating the stored insights with new reviews only")
+    args = parser.parse_args()
+    
+    # Check if API key is configured
+    api_key = get_api_key()
+    if api_key:
+        print(f"DEBUG: Loaded API key ending with: ...{api_key[-4:]}", file=sys.stderr)
+    else:
+        print("DEBUG: DEEPSEEK_API_KEY not found in environment variables.", file=sys.stderr)
+    if not api_key or api_key == "your_api_key_here":
+        print("WARNING: DEEPSEEK_API_KEY is not set or is still the default placeholder in your .env file.", file=sys.stderr)
+        print("Please create a .env file in the root directory and add your DeepSeek API key as DEEPSEEK_API_KEY=your_key_here.", file=sys.stderr)
+        print("The API call will likely fail without a valid API key.", file=sys.stderr)
+    
+    if args.stdin:
+        review_data = json.load(sys.stdin)
+        out = sys.stdout
+        # Keep stdout for the JSON protocol; progress messages go to stderr
+        with contextlib.redirect_stdout(sys.stderr):
+            emit = (lambda event: print_ndjson(event, out)) if args.stream else None
+            analysis = run_analysis(review_data, emit=emit, full=args.full)
+        print_ndjson({"type": "done", "analysis": analysis} if args.stream else analysis, out)
+        return
+    
     # Define file paths
     script_dir = Path(__file__).parent.absolute()
     root_dir = script_dir.parent.parent
     review_json_path = root_dir / "review.json"
     response_json_path = root_dir / "response.json"
     
-    # Check if API key is configured
-    if not DEEPSEEK_API_KEY or DEEPSEEK_API_KEY == "your_api_key_here":
-        print("WARNING: DEEPSEEK_API_KEY is not set or is still the default placeholder in your .env file.")
-        print("Please create a .env file in the root directory and add your DeepSeek API key as DEEPSEEK_API_KEY=your_key_here.")
-        print("The API call will likely fail without a valid API key.")
-    
     # Load review data
     review_data = load_review_data(review_json_path)
     
-    # Generate prompt
-    prompt = generate_prompt(review_data)
+    if args.stream:
+        # Stream insights as they complete, then report the full analysis
+        analysis = run_analysis(review_data, emit=print_ndjson)
+        with open(response_json_path, 'w', encoding='utf-8') as f:
+            json.dump(analysis, f, indent=2)
+        print_ndjson({"type": "done", "analysis": analysis})
+        return
     
-    # Get analysis from DeepSeek
-    analysis = get_deepseek_analysis(prompt)
+    # Get analysis of all reviews from DeepSeek, sending only reviews the stored insights do not cover
+    analysis = refresh_analysis(review_data, full=args.full)
     
     # Save response
     save_response(analysis, response_json_path)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
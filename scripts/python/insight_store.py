@@ -0,0 +1,151 @@
+"""
+Per-product store of LLM insights and the reviews they cover.
+
+Each ASIN keeps its latest analysis (the ``response.json`` object) together
+with the fingerprints of the reviews it was built from. When the product is
+analyzed again, only reviews with unknown fingerprints have to be sent to the
+LLM, along with the previous insights, so refresh cost follows the number of
+new reviews rather than the size of the whole review set.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    from .review_dedupe import review_fingerprint
+except ImportError:
+    # Run directly as a script by server.js
+    from review_dedupe import review_fingerprint
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+DEFAULT_STORE_PATH = ROOT_DIR / ".cache" / "insights.sqlite3"
+
+_ASIN_PATTERNS = [
+    re.compile(r'/dp/([A-Z0-9]{10})'),
+    re.compile(r'/gp/product/([A-Z0-9]{10})'),
+    re.compile(r'/product-reviews/([A-Z0-9]{10})'),
+    re.compile(r'[?&]asin=([A-Z0-9]{10})'),
+]
+
+
+def extract_asin(url: Optional[str]) -> Optional[str]:
+    """
+    Extract the ASIN (Amazon product ID) from a product or review URL.
+
+    Args:
+        url (Optional[str]): Amazon URL.
+
+    Returns:
+        Optional[str]: The ASIN, or None if the URL has none.
+    """
+    for pattern in _ASIN_PATTERNS:
+        match = pattern.search(url or '')
+        if match:
+            return match.group(1)
+    return None
+
+
+class InsightStore:
+    """
+    SQLite-backed store of the latest analysis of each ASIN and its review fingerprints.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the store, creating the database file if needed.
+
+        Args:
+            path (str, optional): Database path. Defaults to INSIGHT_STORE_PATH or
+                .cache/insights.sqlite3 in the project root.
+        """
+        self.path = Path(path or os.getenv("INSIGHT_STORE_PATH") or DEFAULT_STORE_PATH)
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS insights ("
+                "asin TEXT PRIMARY KEY, analysis TEXT NOT NULL, fingerprints TEXT NOT NULL, "
+                "updated REAL NOT NULL)"
+            )
+
+    def get(self, asin: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the stored insights of a product.
+
+        Args:
+            asin (str): Product ASIN.
+
+        Returns:
+            Optional[Dict[str, Any]]: ``analysis``, ``fingerprints`` (a set) and
+            ``updated`` timestamp, or None if the product was never analyzed.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT analysis, fingerprints, updated FROM insights WHERE asin = ?",
+                                     (asin,)).fetchone()
+        if row is None:
+            return None
+        return {'analysis': json.loads(row[0]), 'fingerprints': set(json.loads(row[1])), 'updated': row[2]}
+
+    def put(self, asin: str, analysis: Dict[str, Any], fingerprints: Iterable[str]) -> None:
+        """
+        Store the latest analysis of a product and the reviews it covers.
+
+        Args:
+            asin (str): Product ASIN.
+            analysis (Dict[str, Any]): Analysis object.
+            fingerprints (Iterable[str]): Fingerprints of every review the analysis covers.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO insights (asin, analysis, fingerprints, updated) VALUES (?, ?, ?, ?)",
+                (asin, json.dumps(analysis, ensure_ascii=False), json.dumps(sorted(set(fingerprints))), time.time())
+            )
+
+    def delete(self, asin: str) -> None:
+        """Forget the stored insights of a product, so the next analysis starts from scratch."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM insights WHERE asin = ?", (asin,))
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+
+_default_store: Optional[InsightStore] = None
+
+
+def get_insight_store() -> Optional[InsightStore]:
+    """
+    Return the process-wide store, or None when disabled with INSIGHT_STORE_DISABLED=1.
+    """
+    global _default_store
+    if os.getenv("INSIGHT_STORE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    if _default_store is None:
+        _default_store = InsightStore()
+    return _default_store
+
+
+def split_new_reviews(reviews: Iterable[Dict[str, Any]], known: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Utility function to keep the reviews an earlier analysis did not cover.
+
+    Args:
+        reviews (Iterable[Dict[str, Any]]): Review dictionaries, optionally with a ``fingerprint``.
+        known (Iterable[str]): Fingerprints of the reviews already covered.
+
+    Returns:
+        List[Dict[str, Any]]: Reviews whose fingerprint is not in known, in order.
+    """
+    known = set(known)
+    return [review for review in reviews
+            if (review.get('fingerprint') or review_fingerprint(review)) not in known]
@@ -0,0 +1,200 @@
+"""
+Incremental parser for JSON objects generated token by token.
+
+LLM analyses are a JSON object whose fields are mostly arrays of insights
+(``top_strengths``, ``negative_trends``, ...). Instead of waiting for the whole
+document, the parser is fed text fragments as they stream in and reports each
+array element, and each scalar field, as soon as it is complete. Text before the
+opening brace, such as a markdown code fence, is skipped.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from .review_mapreduce import parse_json_content
+except ImportError:
+    # Run directly as a script by server.js
+    from review_mapreduce import parse_json_content
+
+_WHITESPACE = ' \t\r\n'
+
+# (path of object keys, array index or None for a scalar field, value)
+StreamEvent = Tuple[Tuple[str, ...], Optional[int], Any]
+
+
+class _Frame:
+    """An open object or array on the parser stack."""
+
+    __slots__ = ('kind', 'path', 'emit', 'state', 'key', 'start', 'index')
+
+    def __init__(self, kind: str, path: Tuple[str, ...], emit: bool):
+        self.kind = kind        # 'object' or 'array'
+        self.path = path        # keys leading to this container
+        self.emit = emit        # whether completed children are reported
+        self.state = 'key'      # objects: key, colon, value, in_value, after
+        self.key = None         # objects: key of the current member
+        self.start = None       # start offset of the current value or element
+        self.index = 0          # arrays: index of the current element
+
+
+class JSONStreamParser:
+    """
+    Reports completed array elements and scalar fields of a streamed JSON object.
+
+    Arrays and scalars are reported when every container above them is an object,
+    so for ``{"a": [1, {"b": 2}], "c": {"d": ["x"]}, "e": "y"}`` the events are
+    ``(("a",), 0, 1)``, ``(("a",), 1, {"b": 2})``, ``(("c", "d"), 0, "x")`` and
+    ``(("e",), None, "y")``.
+    """
+
+    def __init__(self):
+        self._buffer = ''
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._started = False
+        self.done = False
+
+    def feed(self, chunk: str) -> List[StreamEvent]:
+        """
+        Consume a text fragment.
+
+        Args:
+            chunk (str): Next piece of the generated text.
+
+        Returns:
+            List[StreamEvent]: Elements and fields completed by this fragment.
+        """
+        self._buffer += chunk
+        events: List[StreamEvent] = []
+        buffer = self._buffer
+        for i in range(self._pos, len(buffer)):
+            if self.done:
+                break
+            c = buffer[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._string_end(i)
+                continue
+
+            if not self._started:
+                if c == '{':
+                    self._started = True
+                    self._stack.append(_Frame('object', (), True))
+                continue
+
+            frame = self._stack[-1]
+            if c in _WHITESPACE:
+                continue
+            self._value_start(frame, c, i)
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c == '{' or c == '[':
+                path = frame.path + (frame.key,) if frame.kind == 'object' else frame.path
+                emit = frame.emit and frame.kind == 'object'
+                self._stack.append(_Frame('object' if c == '{' else 'array', path, emit))
+            elif c == '}' or c == ']':
+                self._finish_scalar(frame, i, events)
+                self._stack.pop()
+                if not self._stack:
+                    self.done = True
+                else:
+                    self._container_end(self._stack[-1], i + 1, events)
+            elif c == ',':
+                self._finish_scalar(frame, i, events)
+            elif c == ':' and frame.kind == 'object':
+                frame.state = 'value'
+
+        self._pos = len(buffer)
+        return events
+
+    def _value_start(self, frame: _Frame, c: str, i: int) -> None:
+        """Mark the start of a member value or array element."""
+        if frame.kind == 'object':
+            if frame.state == 'value':
+                frame.state = 'in_value'
+                frame.start = i
+        elif frame.start is None and c not in ',]':
+            frame.start = i
+
+    def _string_end(self, i: int) -> None:
+        """Handle a closed string; in key position it names the next member."""
+        frame = self._stack[-1]
+        if frame.kind == 'object' and frame.state == 'key':
+            frame.key = json.loads(self._buffer[self._string_start:i + 1])
+            frame.state = 'colon'
+
+    def _finish_scalar(self, frame: _Frame, end: int, events: List[StreamEvent]) -> None:
+        """Complete a scalar value or element that ends at a comma or closing bracket."""
+        if frame.kind == 'object':
+            if frame.state == 'in_value' and frame.emit:
+                self._emit(events, frame.path + (frame.key,), None, frame.start, end)
+            frame.state = 'key'
+        elif frame.start is not None:
+            if frame.emit:
+                self._emit(events, frame.path, frame.index, frame.start, end)
+            frame.index += 1
+        frame.start = None
+
+    def _container_end(self, parent: _Frame, end: int, events: List[StreamEvent]) -> None:
+        """Complete an object or array nested in parent."""
+        if parent.kind == 'array':
+            if parent.emit:
+                self._emit(events, parent.path, parent.index, parent.start, end)
+            parent.index += 1
+        else:
+            # Members of a nested container were already reported one by one
+            parent.state = 'after'
+        parent.start = None
+
+    def _emit(self, events: List[StreamEvent], path: Tuple[str, ...], index: Optional[int],
+              start: int, end: int) -> None:
+        try:
+            value = json.loads(self._buffer[start:end])
+        except ValueError:
+            return
+        events.append((path, index, value))
+
+    @property
+    def text(self) -> str:
+        """All text received so far."""
+        return self._buffer
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        """Parse the full text received so far as a JSON object, or None if it is invalid."""
+        return parse_json_content(self._buffer)
+
+
+def iter_events(value: Dict[str, Any], path: Tuple[str, ...] = ()) -> List[StreamEvent]:
+    """
+    Utility function to produce the events JSONStreamParser reports for a complete object.
+
+    Used to replay a cached result in the same shape as a live stream.
+
+    Args:
+        value (Dict[str, Any]): Parsed JSON object.
+        path (Tuple[str, ...]): Keys leading to value.
+
+    Returns:
+        List[StreamEvent]: Events in document order.
+    """
+    events: List[StreamEvent] = []
+    for key, member in value.items():
+        if isinstance(member, dict):
+            events.extend(iter_events(member, path + (key,)))
+        elif isinstance(member, list):
+            events.extend((path + (key,), index, element) for index, element in enumerate(member))
+        else:
+            events.append((path + (key,), None, member))
+    return events
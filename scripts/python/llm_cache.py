@@ -0,0 +1,163 @@
+"""
+Content-addressed response cache for DeepSeek calls.
+
+Shared by deepseek_api.py and comparison_analyzer.py. Entries are keyed by a
+hash of the model, system prompt, user prompt and temperature, and hold the
+parsed JSON result, so re-running an identical analysis costs nothing.
+Entries expire after a TTL and the least recently used ones are evicted once
+the cache grows past its size limit.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+try:
+    from .metrics import count
+except ImportError:
+    # Run directly as a script by server.js
+    from metrics import count
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+DEFAULT_CACHE_PATH = ROOT_DIR / ".cache" / "llm_responses.sqlite3"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def make_cache_key(model: str, system_prompt: str, user_prompt: str,
+                   temperature: Optional[float] = None) -> str:
+    """
+    Build the cache key for an LLM request.
+
+    Args:
+        model (str): Model name.
+        system_prompt (str): System message content.
+        user_prompt (str): User message content.
+        temperature (float, optional): Sampling temperature, None for the API default.
+
+    Returns:
+        str: SHA-256 hex digest identifying the request.
+    """
+    payload = json.dumps([model, system_prompt, user_prompt, temperature], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache of parsed LLM responses with TTL and size-based eviction.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: Optional[float] = None,
+                 max_bytes: Optional[int] = None):
+        """
+        Initialize the cache, creating the database file if needed.
+
+        Args:
+            path (str, optional): Database path. Defaults to LLM_CACHE_PATH or
+                .cache/llm_responses.sqlite3 in the project root.
+            ttl_seconds (float, optional): Entry lifetime. Defaults to LLM_CACHE_TTL or 7 days.
+            max_bytes (int, optional): Total size of stored results before the least
+                recently used entries are evicted. Defaults to LLM_CACHE_MAX_BYTES or 64 MB.
+        """
+        self.path = Path(path or os.getenv("LLM_CACHE_PATH") or DEFAULT_CACHE_PATH)
+        self.ttl_seconds = float(ttl_seconds if ttl_seconds is not None
+                                 else os.getenv("LLM_CACHE_TTL", DEFAULT_TTL_SECONDS))
+        self.max_bytes = int(max_bytes if max_bytes is not None
+                             else os.getenv("LLM_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed)")
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a cached result.
+
+        Args:
+            key (str): Cache key from make_cache_key.
+
+        Returns:
+            Optional[Any]: The parsed JSON result, or None on a miss or expired entry.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                count('cache_misses', cache='llm')
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        count('cache_hits', cache='llm')
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Store a parsed result and evict old entries if the cache is over its limit.
+
+        Args:
+            key (str): Cache key from make_cache_key.
+            value (Any): JSON-serializable result.
+        """
+        serialized = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, serialized, len(serialized), now, now)
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        """Return entry count, stored bytes, and hit/miss counters for this process."""
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {'entries': entries, 'bytes': size, 'hits': self.hits, 'misses': self.misses}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+
+_default_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Return the process-wide cache, or None when disabled with LLM_CACHE_DISABLED=1.
+    """
+    global _default_cache
+    if os.getenv("LLM_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    if _default_cache is None:
+        _default_cache = ResponseCache()
+    return _default_cache
@@ -0,0 +1,282 @@
+"""
+Concurrent async client for OpenAI-compatible chat-completions APIs.
+
+Batch analyses share one pooled keep-alive HTTP connection pool, run under a
+configurable concurrency cap with per-request timeouts, and back off on 429
+responses using the Retry-After header. Works against DeepSeek or any local
+stub server that speaks the chat-completions API.
+"""
+
+import asyncio
+import email.utils
+import json
+import os
+import random
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Sequence, Union
+
+try:
+    from .metrics import count, timed
+except ImportError:
+    # Run directly as a script by server.js
+    from metrics import count, timed
+
+if TYPE_CHECKING:
+    import httpx
+
+DEEPSEEK_BASE_URL = "https://api.deepseek.com/v1"
+DEFAULT_MODEL = "deepseek-chat"
+
+# Status codes worth retrying besides 429
+RETRYABLE_STATUS_CODES = {500, 502, 503, 504}
+
+
+class LLMClientError(Exception):
+    """Raised when a chat-completions request fails after all retries."""
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given either in seconds or as an HTTP date.
+
+    Args:
+        value (str, optional): Header value.
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class AsyncLLMClient:
+    """
+    Pooled, concurrency-limited chat-completions client.
+
+    Use as an async context manager so the connection pool is closed:
+
+        async with AsyncLLMClient(api_key) as client:
+            results = await client.complete_many(payloads)
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 max_concurrency: int = 8, timeout: float = 120.0, max_retries: int = 4,
+                 backoff_base: float = 1.0):
+        """
+        Initialize the client.
+
+        Args:
+            api_key (str, optional): Bearer token. Defaults to DEEPSEEK_API_KEY.
+            base_url (str, optional): API root. Defaults to LLM_BASE_URL or DeepSeek.
+            max_concurrency (int): Maximum number of requests in flight.
+            timeout (float): Per-request timeout in seconds.
+            max_retries (int): Retries for 429, 5xx and transport errors.
+            backoff_base (float): First exponential backoff delay in seconds, used
+                when the server sends no Retry-After header.
+        """
+        self.api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
+        self.base_url = (base_url or os.getenv("LLM_BASE_URL") or DEEPSEEK_BASE_URL).rstrip('/')
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.retries = 0
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "AsyncLLMClient":
+        # httpx is imported on first use so importing this module stays cheap
+        import httpx
+        headers = {'Content-Type': 'application/json'}
+        if self.api_key:
+            headers['Authorization'] = f'Bearer {self.api_key}'
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=httpx.Timeout(self.timeout),
+            limits=httpx.Limits(max_connections=self.max_concurrency,
+                                max_keepalive_connections=self.max_concurrency)
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _backoff(self, attempt: int) -> float:
+        return self.backoff_base * (2 ** attempt) * random.uniform(0.5, 1.0)
+
+    async def chat_completion(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send one chat-completions request, retrying on rate limits and server errors.
+
+        Args:
+            payload (Dict[str, Any]): Request body (model, messages, temperature, ...).
+                ``model`` defaults to deepseek-chat.
+
+        Returns:
+            Dict[str, Any]: Parsed response JSON.
+
+        Raises:
+            LLMClientError: If the request still fails after ``max_retries`` retries.
+        """
+        if self._client is None:
+            raise RuntimeError("AsyncLLMClient must be used as an async context manager")
+        import httpx
+        payload = {'model': DEFAULT_MODEL, **payload}
+
+        last_error = "no attempt made"
+        for attempt in range(self.max_retries + 1):
+            delay = None
+            async with self._semaphore:
+                try:
+                    with timed('llm_call'):
+                        response = await self._client.post("/chat/completions", json=payload)
+                except (httpx.TimeoutException, httpx.TransportError) as e:
+                    last_error = f"{type(e).__name__}: {e}"
+                else:
+                    if response.status_code == 429 or response.status_code in RETRYABLE_STATUS_CODES:
+                        last_error = f"HTTP {response.status_code}: {response.text[:200]}"
+                        delay = parse_retry_after(response.headers.get('Retry-After'))
+                    elif response.is_error:
+                        raise LLMClientError(f"HTTP {response.status_code}: {response.text[:500]}")
+                    else:
+                        return response.json()
+
+            if attempt == self.max_retries:
+                break
+            # Sleep outside the semaphore so other requests can use the slot
+            self.retries += 1
+            count('retries', source='llm')
+            await asyncio.sleep(delay if delay is not None else self._backoff(attempt))
+
+        raise LLMClientError(f"Request failed after {self.max_retries + 1} attempts: {last_error}")
+
+    async def stream_chat_completion(self, payload: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Stream one chat-completions request, yielding content deltas as they arrive.
+
+        Rate limits and server errors are retried like chat_completion as long as
+        nothing has been yielded yet; a failure mid-stream is raised.
+
+        Args:
+            payload (Dict[str, Any]): Request body. ``stream`` is forced on.
+
+        Yields:
+            str: Content fragments of the assistant message.
+
+        Raises:
+            LLMClientError: If the request fails after all retries.
+        """
+        if self._client is None:
+            raise RuntimeError("AsyncLLMClient must be used as an async context manager")
+        import httpx
+        payload = {'model': DEFAULT_MODEL, **payload, 'stream': True}
+
+        last_error = "no attempt made"
+        streamed = False
+        for attempt in range(self.max_retries + 1):
+            delay = None
+            async with self._semaphore:
+                try:
+                    async with self._client.stream("POST", "/chat/completions", json=payload) as response:
+                        if response.status_code == 429 or response.status_code in RETRYABLE_STATUS_CODES:
+                            body = await response.aread()
+                            last_error = f"HTTP {response.status_code}: {body[:200].decode('utf-8', 'replace')}"
+                            delay = parse_retry_after(response.headers.get('Retry-After'))
+                        elif response.is_error:
+                            body = await response.aread()
+                            raise LLMClientError(f"HTTP {response.status_code}: {body[:500].decode('utf-8', 'replace')}")
+                        else:
+                            # Server-sent events: one "data: {json}" line per chunk
+                            async for line in response.aiter_lines():
+                                if not line.startswith('data:'):
+                                    continue
+                                data = line[5:].strip()
+                                if data == '[DONE]':
+                                    break
+                                delta = json.loads(data)['choices'][0].get('delta', {}).get('content')
+                                if delta:
+                                    streamed = True
+                                    yield delta
+                            return
+                except (httpx.TimeoutException, httpx.TransportError) as e:
+                    if streamed:
+                        # Retrying would repeat content the caller already consumed
+                        raise LLMClientError(f"Stream interrupted: {type(e).__name__}: {e}") from e
+                    last_error = f"{type(e).__name__}: {e}"
+
+            if attempt == self.max_retries:
+                break
+            self.retries += 1
+            count('retries', source='llm')
+            await asyncio.sleep(delay if delay is not None else self._backoff(attempt))
+
+        raise LLMClientError(f"Request failed after {self.max_retries + 1} attempts: {last_error}")
+
+    async def complete_many(self, payloads: Sequence[Dict[str, Any]]) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Send many requests concurrently, at most ``max_concurrency`` at a time.
+
+        Args:
+            payloads (Sequence[Dict[str, Any]]): Request bodies.
+
+        Returns:
+            List[Union[Dict[str, Any], Exception]]: Response JSON or the exception
+            raised, in the same order as ``payloads``.
+        """
+        return await asyncio.gather(*(self.chat_completion(payload) for payload in payloads),
+                                    return_exceptions=True)
+
+
+def response_content(response: Dict[str, Any]) -> str:
+    """Return the assistant message text of a chat-completions response."""
+    return response['choices'][0]['message']['content']
+
+
+def run_chat_completions(payloads: Sequence[Dict[str, Any]], **client_kwargs) -> List[Union[Dict[str, Any], Exception]]:
+    """
+    Utility function to run a batch of chat-completions requests from synchronous code.
+
+    Args:
+        payloads (Sequence[Dict[str, Any]]): Request bodies.
+        **client_kwargs: Options forwarded to AsyncLLMClient.
+
+    Returns:
+        List[Union[Dict[str, Any], Exception]]: Response JSON or exception per request.
+    """
+    async def _run():
+        async with AsyncLLMClient(**client_kwargs) as client:
+            return await client.complete_many(payloads)
+    return asyncio.run(_run())
+
+
+def chat_completion(payload: Dict[str, Any], **client_kwargs) -> Dict[str, Any]:
+    """
+    Utility function to send a single chat-completions request synchronously.
+
+    Args:
+        payload (Dict[str, Any]): Request body.
+        **client_kwargs: Options forwarded to AsyncLLMClient.
+
+    Returns:
+        Dict[str, Any]: Parsed response JSON.
+
+    Raises:
+        LLMClientError: If the request fails after all retries.
+    """
+    result = run_chat_completions([payload], **client_kwargs)[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
@@ -0,0 +1,255 @@
+"""
+Lightweight stage timings and counters, exported in the Prometheus text format.
+
+Stages (fetch, parse, each extractor, analysis, LLM calls, output writing) are
+timed with ``timed``, which works as a context manager or a function wrapper,
+and events (retries, CAPTCHAs, cache hits and misses, selector misses) are
+counted with ``count``. Process-wide totals go to ``METRICS``, which renders
+the Prometheus text format; while ``collect_timings`` is active, the same
+stage times are also summed per product for the ``timings`` block of a
+result. Recording costs a perf_counter call, a lock and a dictionary update,
+a few microseconds against stages that take milliseconds to seconds, so the
+instrumentation stays on.
+"""
+
+import contextvars
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+METRIC_PREFIX = 'amazon_analyzer'
+
+# Help lines of the exported metrics; other names are exported without one
+METRIC_HELP = {
+    'stage_seconds': 'Time spent per pipeline stage',
+    'retries': 'Retried requests',
+    'captchas': 'CAPTCHA pages received',
+    'cache_hits': 'Cache lookups answered from the cache',
+    'cache_misses': 'Cache lookups that missed',
+    'selector_misses': 'Fields no selector could extract',
+    'products': 'Products processed',
+    'review_pages': 'Review pages fetched',
+}
+
+LabelKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict[str, Any]) -> LabelKey:
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{label}="{value}"' for (label, _), value in zip(labels, escaped)) + '}'
+
+
+class Metrics:
+    """
+    Thread-safe registry of counters and stage timers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[LabelKey, float] = {}
+        # Timers hold [count, total seconds]
+        self._timers: Dict[LabelKey, list] = {}
+        self.export_path: Optional[Path] = None
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        """Add to a counter, e.g. ``inc('cache_hits', cache='llm')``."""
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        """Record one timed event."""
+        key = _key(name, labels)
+        with self._lock:
+            timer = self._timers.get(key)
+            if timer is None:
+                self._timers[key] = [1, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+
+    def counter(self, name: str, **labels) -> float:
+        """Return the current value of a counter."""
+        with self._lock:
+            return self._counters.get(_key(name, labels), 0)
+
+    def timer(self, name: str, **labels) -> Tuple[int, float]:
+        """Return the count and total seconds of a timer."""
+        with self._lock:
+            count, total = self._timers.get(_key(name, labels), (0, 0.0))
+        return count, total
+
+    def reset(self) -> None:
+        """Drop all recorded values."""
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+
+    def render_prometheus(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Counters become ``<prefix>_<name>_total``; timers become summaries with
+        ``_count`` and ``_sum`` samples.
+
+        Returns:
+            str: The exposition text.
+        """
+        with self._lock:
+            counters = sorted(self._counters.items())
+            timers = sorted((key, tuple(value)) for key, value in self._timers.items())
+
+        lines = []
+        declared = set()
+        for (name, labels), value in counters:
+            metric = f'{METRIC_PREFIX}_{name}_total'
+            if metric not in declared:
+                declared.add(metric)
+                if name in METRIC_HELP:
+                    lines.append(f'# HELP {metric} {METRIC_HELP[name]}')
+                lines.append(f'# TYPE {metric} counter')
+            lines.append(f'{metric}{_format_labels(labels)} {value:g}')
+        for (name, labels), (count, total) in timers:
+            metric = f'{METRIC_PREFIX}_{name}'
+            if metric not in declared:
+                declared.add(metric)
+                if name in METRIC_HELP:
+                    lines.append(f'# HELP {metric} {METRIC_HELP[name]}')
+                lines.append(f'# TYPE {metric} summary')
+            lines.append(f'{metric}_count{_format_labels(labels)} {count}')
+            lines.append(f'{metric}_sum{_format_labels(labels)} {total:.6f}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: Optional[str] = None) -> None:
+        """
+        Write the exposition text atomically, e.g. for the node_exporter textfile collector.
+
+        Args:
+            path (str, optional): Output file. Defaults to ``export_path``; nothing is
+                written if neither is set.
+        """
+        target = Path(path) if path else self.export_path
+        if target is None:
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temp = target.with_name(target.name + '.tmp')
+        temp.write_text(self.render_prometheus(), encoding='utf-8')
+        os.replace(temp, target)
+
+
+METRICS = Metrics()
+
+# Per-product stage totals, shared by the threads and tasks a product's stages run in
+_timings: contextvars.ContextVar[Optional['StageTimings']] = contextvars.ContextVar('stage_timings', default=None)
+
+
+class StageTimings:
+    """Seconds spent per stage while one product is processed."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.seconds: Dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    def as_dict(self) -> Dict[str, float]:
+        """
+        Return the stage totals in milliseconds, plus the wall-clock ``total``.
+
+        Stages that run concurrently overlap, so their sum can exceed the total.
+        """
+        with self._lock:
+            timings = {stage: round(seconds * 1000, 1) for stage, seconds in self.seconds.items()}
+        timings['total'] = round((time.perf_counter() - self.started) * 1000, 1)
+        return timings
+
+
+class timed:
+    """
+    Time a stage into ``stage_seconds{stage=...}`` and the current product's timings.
+
+    Use as ``with timed('parse_reviews'):`` or wrap a function with
+    ``timed('product_details')(func)``.
+    """
+
+    __slots__ = ('stage', '_start')
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._start = 0.0
+
+    def __enter__(self) -> 'timed':
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        record_time(self.stage, time.perf_counter() - self._start)
+
+    def __call__(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        stage = self.stage
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # A fresh timer per call, so concurrent calls do not share a start time
+            with timed(stage):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def record_time(stage: str, seconds: float) -> None:
+    """Record a stage duration measured elsewhere, e.g. a response's time to first byte."""
+    METRICS.observe('stage_seconds', seconds, stage=stage)
+    timings = _timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+def count(name: str, amount: float = 1, **labels) -> None:
+    """Add to a process-wide counter, e.g. ``count('retries', source='fetch')``."""
+    METRICS.inc(name, amount, **labels)
+
+
+@contextmanager
+def collect_timings() -> Iterator[StageTimings]:
+    """
+    Collect the stage times of one product.
+
+    Threads started for the product's stages must run in a copy of this context
+    (``contextvars.copy_context().run``) for their stages to be included.
+
+    Yields:
+        StageTimings: The product's stage totals.
+    """
+    timings = StageTimings()
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+def in_current_context(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Utility function to bind a function to a copy of the current context, for thread pools.
+
+    Args:
+        func (Callable[..., Any]): Function that will run on another thread.
+
+    Returns:
+        Callable[..., Any]: The function, run in a copy of the caller's context.
+    """
+    context = contextvars.copy_context()
+    return functools.partial(context.run, func)
@@ -0,0 +1,280 @@
+"""
+Near-duplicate and templated review detection.
+
+Exact fingerprints (see review_dedupe.py) do not catch copy-pasted or
+incentivized reviews that differ by a few words. Each review text gets a
+MinHash signature over word shingles, and an LSH banding index groups
+candidate pairs so clustering runs in roughly linear time instead of comparing
+every pair of reviews.
+"""
+
+import re
+import zlib
+from array import array
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+# Signatures use one-permutation hashing: each shingle is hashed once and
+# dropped into one of ``num_perm`` bins, keeping the minimum per bin. Empty
+# bins are filled from their right-hand neighbour plus this offset.
+_DENSIFY_OFFSET = 1 << 32
+_EMPTY = -1
+
+# Reviews indexed by NearDuplicateIndex, at about 2 KB each
+DEFAULT_INDEX_ENTRIES = 10_000
+
+
+class _UnionFind:
+    """Minimal disjoint-set structure used to merge LSH candidates."""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a: int, b: int) -> None:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            if root_a < root_b:
+                self.parent[root_b] = root_a
+            else:
+                self.parent[root_a] = root_b
+
+
+class MinHashLSH:
+    """
+    Clusters near-duplicate texts with MinHash signatures and LSH banding.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.6,
+                 shingle_size: int = 3, min_tokens: int = 6):
+        """
+        Initialize the near-duplicate detector.
+
+        Args:
+            num_perm (int): Signature length. Must be divisible by ``bands``.
+            bands (int): Number of LSH bands; more bands means higher recall.
+            threshold (float): Minimum estimated Jaccard similarity for two texts
+                to be placed in the same cluster.
+            shingle_size (int): Number of words per shingle.
+            min_tokens (int): Texts with fewer words are ignored, since short
+                reviews such as "Great product!" are legitimately identical.
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.min_tokens = min_tokens
+
+    def signature(self, text: str) -> Optional[List[int]]:
+        """
+        Compute the MinHash signature of a text.
+
+        Args:
+            text (str): Review text.
+
+        Returns:
+            Optional[List[int]]: Signature of ``num_perm`` integers, or None if the
+            text is too short to compare.
+        """
+        tokens = _TOKEN_RE.findall(text.lower()) if text else []
+        if len(tokens) < self.min_tokens:
+            return None
+
+        size = self.shingle_size
+        num_perm = self.num_perm
+        signature = [_EMPTY] * num_perm
+        crc32 = zlib.crc32
+        for i in range(len(tokens) - size + 1):
+            hashed = crc32(' '.join(tokens[i:i + size]).encode('utf-8'))
+            bin_index = hashed % num_perm
+            value = hashed // num_perm
+            current = signature[bin_index]
+            if current == _EMPTY or value < current:
+                signature[bin_index] = value
+
+        # Densify empty bins so short texts still produce comparable bands
+        if _EMPTY in signature:
+            for i in range(num_perm):
+                if signature[i] != _EMPTY:
+                    continue
+                for distance in range(1, num_perm):
+                    neighbour = signature[(i + distance) % num_perm]
+                    if neighbour != _EMPTY and neighbour < _DENSIFY_OFFSET:
+                        signature[i] = neighbour + distance * _DENSIFY_OFFSET
+                        break
+        return signature
+
+    def similarity(self, sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+        """Estimate the Jaccard similarity of two signatures."""
+        matches = sum(1 for a, b in zip(sig_a, sig_b) if a == b)
+        return matches / self.num_perm
+
+    def cluster(self, texts: Sequence[str]) -> List[List[int]]:
+        """
+        Group near-duplicate texts.
+
+        Args:
+            texts (Sequence[str]): Texts to cluster.
+
+        Returns:
+            List[List[int]]: Clusters of two or more text indices, largest first.
+        """
+        signatures = [self.signature(text) for text in texts]
+        union_find = _UnionFind(len(texts))
+
+        rows = self.rows
+        for band in range(self.bands):
+            start = band * rows
+            buckets: Dict[tuple, int] = {}
+            for index, signature in enumerate(signatures):
+                if signature is None:
+                    continue
+                key = tuple(signature[start:start + rows])
+                head = buckets.get(key)
+                if head is None:
+                    buckets[key] = index
+                elif union_find.find(head) != union_find.find(index) and \
+                        self.similarity(signatures[head], signature) >= self.threshold:
+                    # Comparing against the bucket head keeps this linear even
+                    # when thousands of templated reviews share a bucket
+                    union_find.union(head, index)
+
+        groups: Dict[int, List[int]] = defaultdict(list)
+        for index, signature in enumerate(signatures):
+            if signature is not None:
+                groups[union_find.find(index)].append(index)
+
+        clusters = [members for members in groups.values() if len(members) > 1]
+        clusters.sort(key=lambda members: (-len(members), members[0]))
+        return clusters
+
+
+class NearDuplicateIndex:
+    """
+    Incremental MinHashLSH clustering for reviews that arrive one at a time.
+
+    Up to ``max_entries`` reviews, produces the same clusters as
+    ``MinHashLSH.cluster`` over the same texts in the same order, without keeping
+    the texts: each review leaves its signature
+    (as a compact array), its bucket keys and a short sample, about 2 KB. Once
+    ``max_entries`` reviews are indexed, later reviews are still matched against
+    the indexed ones but no longer indexed themselves; they only cost their
+    cluster parent and rating, 17 bytes. Two of these later reviews that only
+    resemble each other are not clustered, unlike in ``MinHashLSH.cluster``.
+    """
+
+    def __init__(self, lsh: Optional[MinHashLSH] = None, max_entries: int = DEFAULT_INDEX_ENTRIES):
+        """
+        Args:
+            lsh (MinHashLSH, optional): Signature and banding settings.
+            max_entries (int): Maximum number of reviews whose signatures are kept.
+        """
+        self.lsh = lsh or MinHashLSH()
+        self.max_entries = max_entries
+        self.count = 0
+        self._parent = array('q')
+        self._ratings = array('d')
+        self._signed = bytearray()
+        self._buckets: List[Dict[int, int]] = [{} for _ in range(self.lsh.bands)]
+        self._signatures: Dict[int, array] = {}
+        self._samples: Dict[int, Tuple[str, str]] = {}
+        # Earlier cluster roots that the last added review merged into an older cluster
+        self.merged_roots: List[int] = []
+
+    def _find(self, item: int) -> int:
+        parent = self._parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def add(self, review: Dict[str, Any]) -> bool:
+        """
+        Add the next review.
+
+        Args:
+            review (Dict[str, Any]): Review dictionary.
+
+        Returns:
+            bool: True if the review joined a cluster of earlier reviews.
+        """
+        index = self.count
+        self.count += 1
+        self.merged_roots = []
+        self._parent.append(index)
+        self._ratings.append(review.get('rating', 0) or 0)
+        signature = self.lsh.signature(f"{review.get('title', '')} {review.get('text', '')}")
+        self._signed.append(signature is not None)
+        if signature is None:
+            return False
+
+        indexed = len(self._signatures) < self.max_entries
+        joined = False
+        rows = self.lsh.rows
+        for band, buckets in enumerate(self._buckets):
+            key = hash(tuple(signature[band * rows:(band + 1) * rows]))
+            head = buckets.get(key)
+            if head is None:
+                if indexed:
+                    buckets[key] = index
+                continue
+            root_head, root_index = self._find(head), self._find(index)
+            if root_head != root_index and self.lsh.similarity(self._signatures[head], signature) >= self.lsh.threshold:
+                # Earlier indices are roots, as in MinHashLSH.cluster
+                merged = max(root_head, root_index)
+                self._parent[merged] = min(root_head, root_index)
+                if merged != index:
+                    self.merged_roots.append(merged)
+                joined = True
+        if indexed:
+            self._signatures[index] = array('q', signature)
+            self._samples[index] = (review.get('title', ''), review.get('text', '')[:150])
+        return joined
+
+    def clusters(self) -> List[List[int]]:
+        """Return the clusters of two or more review indices, largest first."""
+        groups: Dict[int, List[int]] = defaultdict(list)
+        for index in range(self.count):
+            if self._signed[index]:
+                groups[self._find(index)].append(index)
+        clusters = [members for members in groups.values() if len(members) > 1]
+        clusters.sort(key=lambda members: (-len(members), members[0]))
+        return clusters
+
+    def indexed(self, index: int) -> bool:
+        """Return whether a review is indexed, so a later review can still link its cluster to another."""
+        return index in self._signatures
+
+    def rating(self, index: int) -> float:
+        """Return the rating of an added review."""
+        return self._ratings[index]
+
+    def sample(self, index: int) -> Tuple[str, str]:
+        """Return the title and the first 150 characters of an indexed review."""
+        return self._samples.get(index, ('', ''))
+
+
+def find_near_duplicate_clusters(reviews: Sequence[Dict[str, Any]], **kwargs) -> List[List[int]]:
+    """
+    Utility function to cluster near-duplicate reviews.
+
+    Args:
+        reviews (Sequence[Dict[str, Any]]): Review dictionaries.
+        **kwargs: Options forwarded to MinHashLSH.
+
+    Returns:
+        List[List[int]]: Clusters of review indices, largest first.
+    """
+    texts = [f"{review.get('title', '')} {review.get('text', '')}" for review in reviews]
+    return MinHashLSH(**kwargs).cluster(texts)
@@ -0,0 +1,171 @@
+"""
+Compact per-product digests for N-way comparisons.
+
+Sending raw reviews for every pair of competitors makes comparison cost grow
+with N². Instead each product is condensed once into a digest of its price,
+key specifications, rating statistics and review themes. The themes come from
+the local pros/cons, term and sentiment engines, so no LLM call is needed.
+Digests are stored in the LLM response cache, keyed by the product data they
+were built from, so a product digested for one comparison is reused by the next.
+"""
+
+import json
+from typing import Any, Dict, List, Sequence
+
+try:
+    from .llm_cache import get_response_cache, make_cache_key
+    from .pros_cons import ProsConsExtractor
+    from .sentiment_lexicon import analyze_text_sentiment
+    from .term_frequency import top_terms
+except ImportError:
+    # Run directly as a script by server.js
+    from llm_cache import get_response_cache, make_cache_key
+    from pros_cons import ProsConsExtractor
+    from sentiment_lexicon import analyze_text_sentiment
+    from term_frequency import top_terms
+
+# Bump when the digest layout changes so stale cached digests are not reused
+DIGEST_VERSION = 1
+MAX_SPECIFICATIONS = 12
+MAX_TITLE_LENGTH = 200
+
+
+def digest_cache_key(product: Dict[str, Any]) -> str:
+    """
+    Build the cache key of a product's digest from the data it summarizes.
+
+    Args:
+        product (Dict[str, Any]): Product result as produced by main.py.
+
+    Returns:
+        str: Cache key that changes whenever the product details or reviews change.
+    """
+    content = json.dumps({
+        'url': product.get('url'),
+        'product_details': product.get('product_details', {}),
+        'review_data': product.get('review_data', {})
+    }, sort_keys=True, ensure_ascii=False, default=str)
+    return make_cache_key(f"product-digest-v{DIGEST_VERSION}", "", content)
+
+
+def _product_title(details: Dict[str, Any]) -> str:
+    title = (details.get('description') or '').split('About this item')[0].strip()
+    return title[:MAX_TITLE_LENGTH] or 'Unknown Product'
+
+
+def build_product_digest(product: Dict[str, Any], theme_limit: int = 5) -> Dict[str, Any]:
+    """
+    Condense a product into a digest for comparison prompts.
+
+    Args:
+        product (Dict[str, Any]): Product result as produced by main.py.
+        theme_limit (int): Maximum number of items per review theme list.
+
+    Returns:
+        Dict[str, Any]: Title, URL, price, key specifications, rating statistics,
+        strengths, complaints, key points and frequent phrases.
+    """
+    details = product.get('product_details', {})
+    review_data = product.get('review_data', {})
+    reviews = review_data.get('reviews', [])
+    analysis = review_data.get('analysis', {})
+
+    extractor = ProsConsExtractor().fit(reviews)
+    sentiment = analyze_text_sentiment(reviews)
+    specifications = details.get('specifications') or {}
+
+    return {
+        'title': _product_title(details),
+        'url': product.get('url', ''),
+        'price': details.get('price', 'Unknown'),
+        'specifications': dict(list(specifications.items())[:MAX_SPECIFICATIONS]),
+        'rating_stats': {
+            'average_rating': analysis.get('average_rating', 0),
+            'total_reviews': analysis.get('total_reviews', len(reviews)),
+            'rating_counts': analysis.get('rating_counts', {}),
+            'verified_percentage': analysis.get('verified_percentage'),
+            'text_sentiment': sentiment['mean_score'],
+            'reviews_digested': len(reviews)
+        },
+        'strengths': extractor.pros(theme_limit),
+        'complaints': extractor.cons(theme_limit),
+        'key_points': extractor.key_points(theme_limit),
+        'frequent_phrases': top_terms((review.get('text', '') for review in reviews),
+                                      limit=theme_limit, n=2, min_count=2)
+    }
+
+
+def get_product_digest(product: Dict[str, Any], use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Return the digest of a product, building and caching it on first use.
+
+    Args:
+        product (Dict[str, Any]): Product result as produced by main.py.
+        use_cache (bool): Reuse and store digests in the response cache.
+
+    Returns:
+        Dict[str, Any]: The product digest (see build_product_digest).
+    """
+    cache = get_response_cache() if use_cache else None
+    key = digest_cache_key(product)
+    digest = cache.get(key) if cache else None
+    if digest is None:
+        digest = build_product_digest(product)
+        if cache:
+            cache.put(key, digest)
+    return digest
+
+
+def product_label(index: int) -> str:
+    """Label products A, B, C, ... Z, then AA, AB, ..."""
+    label = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        label = chr(ord('A') + remainder) + label
+    return label
+
+
+def format_digest(label: str, digest: Dict[str, Any]) -> str:
+    """
+    Format a digest as a product section of a comparison prompt.
+
+    Args:
+        label (str): Product label used in the prompt.
+        digest (Dict[str, Any]): Product digest.
+
+    Returns:
+        str: Prompt text for the product.
+    """
+    stats = digest['rating_stats']
+    lines = [
+        f"Product {label}: {digest['title']}",
+        f"Price: {digest['price']}",
+        f"Rating: {stats['average_rating']}/5 ({stats['total_reviews']} reviews), "
+        f"review text sentiment {stats['text_sentiment']:+.2f} on a -1 to 1 scale",
+    ]
+    if stats.get('rating_counts'):
+        lines.append("Rating counts: " + ", ".join(f"{star}: {count}" for star, count in stats['rating_counts'].items()))
+    if digest['specifications']:
+        lines.append("Specifications: " + "; ".join(f"{name}: {value}" for name, value in digest['specifications'].items()))
+    for heading, field in (("Praised", 'strengths'), ("Complaints", 'complaints'), ("Themes", 'key_points')):
+        if digest[field]:
+            lines.append(f"{heading}:")
+            lines.extend(f"- {item}" for item in digest[field])
+    if digest['frequent_phrases']:
+        lines.append("Frequent phrases: " + ", ".join(digest['frequent_phrases']))
+    return "\n".join(lines)
+
+
+def get_product_digests(products: Sequence[Dict[str, Any]], use_cache: bool = True) -> List[Dict[str, Any]]:
+    """
+    Utility function to digest several products, reusing cached digests.
+
+    Args:
+        products (Sequence[Dict[str, Any]]): Product results.
+        use_cache (bool): Reuse and store digests in the response cache.
+
+    Returns:
+        List[Dict[str, Any]]: One digest per product, in order.
+    """
+    return [get_product_digest(product, use_cache) for product in products]
@@ -0,0 +1,537 @@
+"""
+SQLite store of crawled products, their price history, specifications, reviews and analyses.
+
+Results used to live only in whole JSON files (``review.json``,
+``review_N.json``) that every consumer re-read and re-parsed in full. With
+``--db``, process_product also writes each result here, one transaction per
+product with the reviews upserted in a single batch, and analytics and the UI
+query it through indexed lookups instead:
+
+- ``products``: latest details per ASIN, with the crawl times
+- ``price_snapshots``: one row per observed price change
+- ``specs``: one row per specification, rewritten only when the details change
+- ``reviews``: every review ever seen, keyed by ASIN and review fingerprint
+- ``analyses``: review analysis and AI summary, one row per distinct content
+
+Reviews, details and analyses are deduplicated by content hash, so re-crawling
+an unchanged product only updates its crawl time. Run the module directly to
+query the store from the command line or from server.js.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    from .insight_store import extract_asin
+    from .review_dedupe import review_fingerprint
+    from .review_stream import ReviewAccumulator
+except ImportError:
+    # Run directly as a script by server.js
+    from insight_store import extract_asin
+    from review_dedupe import review_fingerprint
+    from review_stream import ReviewAccumulator
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+DEFAULT_DB_PATH = ROOT_DIR / ".cache" / "products.sqlite3"
+DEFAULT_REVIEW_LIMIT = 100
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS products ("
+    "asin TEXT PRIMARY KEY, url TEXT NOT NULL, description TEXT, image_url TEXT, price TEXT, "
+    "rating REAL, review_count INTEGER, similar_products TEXT, details_hash TEXT, "
+    "first_crawled REAL NOT NULL, last_crawled REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_products_last_crawled ON products (last_crawled)",
+    "CREATE TABLE IF NOT EXISTS price_snapshots ("
+    "asin TEXT NOT NULL, crawled REAL NOT NULL, price TEXT, amount REAL, "
+    "PRIMARY KEY (asin, crawled)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS specs ("
+    "asin TEXT NOT NULL, name TEXT NOT NULL, value TEXT, PRIMARY KEY (asin, name)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS reviews ("
+    "asin TEXT NOT NULL, fingerprint TEXT NOT NULL, rating REAL, review_date TEXT, date TEXT, "
+    "reviewer_name TEXT, title TEXT, text TEXT, verified_purchase INTEGER, helpful_votes INTEGER, "
+    "first_seen REAL NOT NULL, UNIQUE (asin, fingerprint))",
+    "CREATE INDEX IF NOT EXISTS idx_reviews_asin_rating ON reviews (asin, rating)",
+    "CREATE INDEX IF NOT EXISTS idx_reviews_asin_date ON reviews (asin, review_date)",
+    "CREATE TABLE IF NOT EXISTS analyses ("
+    "asin TEXT NOT NULL, content_hash TEXT NOT NULL, crawled REAL NOT NULL, "
+    "review_analysis TEXT, ai_summary TEXT, PRIMARY KEY (asin, content_hash))",
+    "CREATE INDEX IF NOT EXISTS idx_analyses_asin_crawled ON analyses (asin, crawled)",
+)
+
+_REVIEW_DATE = re.compile(r'([A-Z][a-z]+ \d{1,2}, \d{4})')
+_PRICE_AMOUNT = re.compile(r'\d[\d,]*(?:\.\d+)?')
+
+
+def parse_review_date(date: Optional[str]) -> Optional[str]:
+    """
+    Convert an Amazon review date ("Reviewed in the United States on May 1, 2025") to ISO format.
+
+    Args:
+        date (Optional[str]): Date line of a review.
+
+    Returns:
+        Optional[str]: ``YYYY-MM-DD``, or None if the line has no recognizable date.
+    """
+    match = _REVIEW_DATE.search(date or '')
+    if not match:
+        return None
+    try:
+        return datetime.strptime(match.group(1), '%B %d, %Y').date().isoformat()
+    except ValueError:
+        return None
+
+
+def parse_price(price: Optional[str]) -> Optional[float]:
+    """Return the amount of a price string such as "$1,158.17", or None."""
+    match = _PRICE_AMOUNT.search(price or '')
+    return float(match.group(0).replace(',', '')) if match else None
+
+
+def parse_crawl_time(value: str) -> float:
+    """Return a crawl time given as Unix time or as an ISO date such as "2025-05-01", in Unix time."""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.combine(date.fromisoformat(value), datetime.min.time()).timestamp()
+
+
+def _iso_date(value: str) -> str:
+    return date.fromisoformat(value).isoformat()
+
+
+def _content_hash(value: Any) -> str:
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class ProductStore:
+    """
+    SQLite-backed store of products, price snapshots, specifications, reviews and analyses.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Open the store, creating the database file if needed.
+
+        Args:
+            path (str, optional): Database path. Defaults to PRODUCT_DB_PATH or
+                .cache/products.sqlite3 in the project root.
+        """
+        self.path = Path(path or os.getenv("PRODUCT_DB_PATH") or DEFAULT_DB_PATH)
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # WAL keeps the database consistent on a crash with NORMAL; only the last commits can be lost
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in SCHEMA:
+                self._conn.execute(statement)
+
+    def save_result(self, result: Dict[str, Any], crawled: Optional[float] = None) -> Optional[str]:
+        """
+        Store a process_product result.
+
+        Args:
+            result (Dict[str, Any]): Product result as produced by main.py.
+            crawled (float, optional): Crawl time. Defaults to now.
+
+        Returns:
+            Optional[str]: The product's ASIN, or None if its URL has none and nothing was stored.
+        """
+        return self.save_results([result], crawled)[0]
+
+    def save_results(self, results: Iterable[Dict[str, Any]],
+                     crawled: Optional[float] = None) -> List[Optional[str]]:
+        """
+        Store several results in one transaction, e.g. when importing JSON files.
+
+        Args:
+            results (Iterable[Dict[str, Any]]): Product results.
+            crawled (float, optional): Crawl time. Defaults to now.
+
+        Returns:
+            List[Optional[str]]: ASIN of each result, None for results without one.
+        """
+        crawled = time.time() if crawled is None else crawled
+        asins = []
+        with self._lock, self._conn:
+            for result in results:
+                asin = extract_asin(result.get('url'))
+                if asin is not None:
+                    self._save(self._conn, asin, result, crawled)
+                asins.append(asin)
+        return asins
+
+    def _save(self, conn: sqlite3.Connection, asin: str, result: Dict[str, Any], crawled: float) -> None:
+        details = result.get('product_details') or {}
+        review_data = result.get('review_data') or {}
+        analysis = review_data.get('analysis') or {}
+        # An incremental result only holds the reviews that are new since the last crawl
+        incremental = 'incremental' in review_data
+        details_hash = _content_hash(details)
+
+        previous = conn.execute("SELECT details_hash FROM products WHERE asin = ?", (asin,)).fetchone()
+        conn.execute(
+            "INSERT INTO products (asin, url, description, image_url, price, rating, review_count, "
+            "similar_products, details_hash, first_crawled, last_crawled) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (asin) DO UPDATE SET url = excluded.url, description = excluded.description, "
+            "image_url = excluded.image_url, price = excluded.price, rating = excluded.rating, "
+            "review_count = excluded.review_count, similar_products = excluded.similar_products, "
+            "details_hash = excluded.details_hash, last_crawled = excluded.last_crawled",
+            (asin, result.get('url'), details.get('description'), details.get('image_url'), details.get('price'),
+             analysis.get('average_rating'), analysis.get('total_reviews'),
+             json.dumps(result.get('similar_products') or [], ensure_ascii=False), details_hash,
+             crawled, crawled)
+        )
+
+        if previous is None or previous['details_hash'] != details_hash:
+            conn.execute("DELETE FROM specs WHERE asin = ?", (asin,))
+            conn.executemany("INSERT INTO specs (asin, name, value) VALUES (?, ?, ?)",
+                             [(asin, name, str(value)) for name, value in (details.get('specifications') or {}).items()])
+
+        price = details.get('price')
+        if price:
+            latest = conn.execute("SELECT price FROM price_snapshots WHERE asin = ? ORDER BY crawled DESC LIMIT 1",
+                                  (asin,)).fetchone()
+            if latest is None or latest['price'] != price:
+                conn.execute("INSERT OR REPLACE INTO price_snapshots (asin, crawled, price, amount) VALUES (?, ?, ?, ?)",
+                             (asin, crawled, price, parse_price(price)))
+
+        conn.executemany(
+            "INSERT INTO reviews (asin, fingerprint, rating, review_date, date, reviewer_name, title, text, "
+            "verified_purchase, helpful_votes, first_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (asin, fingerprint) DO UPDATE SET helpful_votes = excluded.helpful_votes",
+            [(asin, review.get('fingerprint') or review_fingerprint(review), review.get('rating'),
+              parse_review_date(review.get('date')), review.get('date'), review.get('reviewer_name'),
+              review.get('title'), review.get('text'), int(bool(review.get('verified_purchase'))),
+              review.get('helpful_votes', 0), crawled)
+             for review in review_data.get('reviews') or []]
+        )
+        ai_summary = result.get('ai_summary') or {}
+        if incremental:
+            conn.execute("UPDATE products SET rating = (SELECT ROUND(AVG(rating), 2) FROM reviews WHERE asin = ?1), "
+                         "review_count = (SELECT COUNT(*) FROM reviews WHERE asin = ?1) WHERE asin = ?1", (asin,))
+            if not review_data.get('reviews'):
+                # Nothing new: the last analysis still covers every review
+                return
+            # The result's analysis and summary only cover the new reviews, so the
+            # analysis is rebuilt over every stored review and the summary of the
+            # last full set of reviews is kept
+            analysis = ReviewAccumulator(keep=0).extend(self._stored_reviews(conn, asin)).analysis()
+            previous_summary = conn.execute("SELECT ai_summary FROM analyses WHERE asin = ? "
+                                            "ORDER BY crawled DESC LIMIT 1", (asin,)).fetchone()
+            if previous_summary is not None:
+                ai_summary = json.loads(previous_summary['ai_summary'] or '{}')
+
+        if analysis or ai_summary:
+            content = {'review_analysis': analysis, 'ai_summary': ai_summary}
+            conn.execute(
+                "INSERT INTO analyses (asin, content_hash, crawled, review_analysis, ai_summary) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (asin, content_hash) DO UPDATE SET crawled = excluded.crawled",
+                (asin, _content_hash(content), crawled, json.dumps(analysis, ensure_ascii=False),
+                 json.dumps(content['ai_summary'], ensure_ascii=False))
+            )
+
+    @staticmethod
+    def _stored_reviews(conn: sqlite3.Connection, asin: str) -> Iterable[Dict[str, Any]]:
+        """Yield every stored review of a product in the order it was first seen."""
+        rows = conn.execute("SELECT reviewer_name, title, rating, date, text, verified_purchase, helpful_votes "
+                            "FROM reviews WHERE asin = ? ORDER BY rowid", (asin,))
+        for row in rows:
+            yield dict(row, rating=row['rating'] or 0.0, verified_purchase=bool(row['verified_purchase']))
+
+    def _query(self, sql: str, params: Iterable[Any] = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    def products(self, crawled_since: Optional[float] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        List stored products, most recently crawled first.
+
+        Args:
+            crawled_since (float, optional): Only products crawled at or after this time.
+            limit (int): Maximum number of products.
+
+        Returns:
+            List[Dict[str, Any]]: ASIN, URL, price, rating, review count and crawl times per product.
+        """
+        rows = self._query(
+            "SELECT asin, url, price, rating, review_count, first_crawled, last_crawled FROM products "
+            "WHERE last_crawled >= ? ORDER BY last_crawled DESC LIMIT ?",
+            (crawled_since if crawled_since is not None else 0.0, limit)
+        )
+        return [dict(row) for row in rows]
+
+    def product(self, asin: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the latest details of a product.
+
+        Args:
+            asin (str): Product ASIN.
+
+        Returns:
+            Optional[Dict[str, Any]]: Product row with its ``specifications``, or None if never stored.
+        """
+        rows = self._query("SELECT * FROM products WHERE asin = ?", (asin,))
+        if not rows:
+            return None
+        product = dict(rows[0])
+        product['similar_products'] = json.loads(product['similar_products'] or '[]')
+        product['specifications'] = {row['name']: row['value'] for row in
+                                     self._query("SELECT name, value FROM specs WHERE asin = ?", (asin,))}
+        return product
+
+    def known_fingerprints(self, asin: str) -> Set[str]:
+        """Return the fingerprints of every stored review of a product, for incremental crawls."""
+        return {row['fingerprint'] for row in self._query("SELECT fingerprint FROM reviews WHERE asin = ?", (asin,))}
+
+    def price_history(self, asin: str) -> List[Dict[str, Any]]:
+        """Return a product's price changes, oldest first, with the time each price was first seen."""
+        rows = self._query("SELECT crawled, price, amount FROM price_snapshots WHERE asin = ? ORDER BY crawled",
+                           (asin,))
+        return [dict(row) for row in rows]
+
+    def reviews(self, asin: str, min_rating: Optional[float] = None, max_rating: Optional[float] = None,
+                since: Optional[str] = None, until: Optional[str] = None,
+                limit: int = DEFAULT_REVIEW_LIMIT, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        Query a product's reviews, newest first.
+
+        Args:
+            asin (str): Product ASIN.
+            min_rating (float, optional): Lowest star rating included.
+            max_rating (float, optional): Highest star rating included.
+            since (str, optional): Earliest review date included, ``YYYY-MM-DD``.
+            until (str, optional): Latest review date included, ``YYYY-MM-DD``.
+            limit (int): Maximum number of reviews.
+            offset (int): Reviews skipped, for paging.
+
+        Returns:
+            List[Dict[str, Any]]: Review dictionaries as produced by the review analyzer,
+            plus their ISO ``review_date``.
+        """
+        conditions, params = ["asin = ?"], [asin]
+        for condition, value in (("rating >= ?", min_rating), ("rating <= ?", max_rating),
+                                 ("review_date >= ?", since), ("review_date <= ?", until)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        rows = self._query(
+            "SELECT fingerprint, reviewer_name, title, rating, date, review_date, text, verified_purchase, "
+            f"helpful_votes FROM reviews WHERE {' AND '.join(conditions)} "
+            "ORDER BY review_date DESC, rowid LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        )
+        return [dict(row, verified_purchase=bool(row['verified_purchase'])) for row in rows]
+
+    def rating_counts(self, asin: str) -> Dict[str, int]:
+        """Return the number of stored reviews per star rating, over every review ever seen."""
+        rows = self._query("SELECT CAST(rating AS INTEGER) AS stars, COUNT(*) AS reviews FROM reviews "
+                           "WHERE asin = ? GROUP BY stars", (asin,))
+        return {f"{row['stars']}_star": row['reviews'] for row in rows if row['stars'] is not None}
+
+    def latest_analysis(self, asin: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the most recent review analysis and AI summary of a product.
+
+        Returns:
+            Optional[Dict[str, Any]]: ``review_analysis``, ``ai_summary`` and ``crawled``, or None.
+        """
+        rows = self._query("SELECT crawled, review_analysis, ai_summary FROM analyses WHERE asin = ? "
+                           "ORDER BY crawled DESC LIMIT 1", (asin,))
+        if not rows:
+            return None
+        return {'crawled': rows[0]['crawled'], 'review_analysis': json.loads(rows[0]['review_analysis'] or '{}'),
+                'ai_summary': json.loads(rows[0]['ai_summary'] or '{}')}
+
+    def load_result(self, asin: str, review_limit: int = DEFAULT_REVIEW_LIMIT) -> Optional[Dict[str, Any]]:
+        """
+        Rebuild a result in the ``review.json`` layout from the store.
+
+        Args:
+            asin (str): Product ASIN.
+            review_limit (int): Newest reviews included.
+
+        Returns:
+            Optional[Dict[str, Any]]: The result, or None if the product was never stored.
+        """
+        product = self.product(asin)
+        if product is None:
+            return None
+        analysis = self.latest_analysis(asin) or {}
+        reviews = self.reviews(asin, limit=review_limit)
+        for review in reviews:
+            del review['review_date']
+        return {
+            'url': product['url'],
+            'product_details': {
+                'description': product['description'],
+                'specifications': product['specifications'],
+                'image_url': product['image_url'],
+                'price': product['price']
+            },
+            'review_data': {'reviews': reviews, 'analysis': analysis.get('review_analysis', {})},
+            'ai_summary': analysis.get('ai_summary', {}),
+            'similar_products': product['similar_products']
+        }
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+
+def import_json_files(paths: Iterable[str], store: ProductStore) -> int:
+    """
+    Utility function to load existing result files (``review.json``, ``--output`` lists) into the store.
+
+    Args:
+        paths (Iterable[str]): JSON files holding one result or a list of results.
+        store (ProductStore): Destination store.
+
+    Returns:
+        int: Number of results stored.
+    """
+    results = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        results.extend(data if isinstance(data, list) else [data])
+    return sum(1 for asin in store.save_results(results) if asin is not None)
+
+
+# Query parameters accepted by each /api/products route, with their parsers
+API_PARAMETERS: Dict[str, Dict[str, Callable[[str], Any]]] = {
+    'products': {'since': parse_crawl_time, 'limit': int},
+    'product': {'limit': int},
+    'reviews': {'min_rating': float, 'max_rating': float, 'since': _iso_date, 'until': _iso_date,
+                'limit': int, 'offset': int},
+    'prices': {},
+}
+_ASIN = re.compile(r'^[A-Z0-9]{10}$')
+
+
+def api_query(store: ProductStore, path: str, query: Dict[str, Any]) -> Tuple[int, Any]:
+    """
+    Utility function to answer a server.js /api/products request.
+
+    Routes are ``/api/products`` (``since``, ``limit``), ``/api/products/<ASIN>``
+    (``limit``), ``/api/products/<ASIN>/reviews`` (``min_rating``, ``max_rating``,
+    ``since``, ``until``, ``limit``, ``offset``) and ``/api/products/<ASIN>/prices``.
+
+    Args:
+        store (ProductStore): Store to query.
+        path (str): Request path.
+        query (Dict[str, Any]): Query parameters; a repeated parameter keeps its last value.
+
+    Returns:
+        Tuple[int, Any]: HTTP status and JSON body. Parameters a route does not take
+        and unparsable values are answered with 400.
+    """
+    parts = [part for part in path.split('/') if part][2:]
+    if not parts:
+        route, asin = 'products', None
+    elif _ASIN.match(parts[0]) and len(parts) == 1:
+        route, asin = 'product', parts[0]
+    elif _ASIN.match(parts[0]) and len(parts) == 2 and parts[1] in ('reviews', 'prices'):
+        route, asin = parts[1], parts[0]
+    else:
+        return 404, {'error': 'Unknown product store query'}
+
+    allowed = API_PARAMETERS[route]
+    unknown = sorted(set(query) - set(allowed))
+    if unknown:
+        return 400, {'error': f"Unsupported parameters for {route}: {', '.join(unknown)}"}
+    params = {}
+    for name, value in query.items():
+        value = value[-1] if isinstance(value, list) else value
+        try:
+            params[name] = allowed[name](str(value))
+        except ValueError:
+            return 400, {'error': f"Invalid value for {name}: {value}"}
+
+    if route == 'products':
+        return 200, store.products(crawled_since=params.get('since'), limit=params.get('limit', 100))
+    if route == 'product':
+        result = store.load_result(asin, review_limit=params.get('limit', DEFAULT_REVIEW_LIMIT))
+        return (200, result) if result is not None else (404, {'error': f"Product {asin} not found"})
+    if route == 'reviews':
+        return 200, store.reviews(asin, **params)
+    return 200, store.price_history(asin)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Query the store from the command line, printing one JSON document per call."""
+    parser = argparse.ArgumentParser(description="Query the product and review store")
+    parser.add_argument("--db", help="Database path (PRODUCT_DB_PATH or .cache/products.sqlite3 unless set)",
+                        default=None)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    products = commands.add_parser("products", help="List products, most recently crawled first")
+    products.add_argument("--since", type=parse_crawl_time, default=None,
+                          help="Only products crawled since this Unix time or ISO date")
+    products.add_argument("--limit", type=int, default=100)
+
+    product = commands.add_parser("product", help="Print a product as a review.json-style result")
+    product.add_argument("asin")
+    product.add_argument("--limit", type=int, default=DEFAULT_REVIEW_LIMIT, help="Newest reviews included")
+
+    reviews = commands.add_parser("reviews", help="Query a product's reviews, newest first")
+    reviews.add_argument("asin")
+    reviews.add_argument("--min-rating", type=float, default=None)
+    reviews.add_argument("--max-rating", type=float, default=None)
+    reviews.add_argument("--since", default=None, help="Earliest review date, YYYY-MM-DD")
+    reviews.add_argument("--until", default=None, help="Latest review date, YYYY-MM-DD")
+    reviews.add_argument("--limit", type=int, default=DEFAULT_REVIEW_LIMIT)
+    reviews.add_argument("--offset", type=int, default=0)
+
+    prices = commands.add_parser("prices", help="Print a product's price history")
+    prices.add_argument("asin")
+
+    importer = commands.add_parser("import", help="Load result JSON files into the store")
+    importer.add_argument("files", nargs="+")
+
+    commands.add_parser("api", help="Answer a {path, query} request read from stdin as {status, body}, "
+                                    "for server.js")
+
+    args = parser.parse_args(argv)
+    store = ProductStore(args.db)
+    try:
+        if args.command == "products":
+            output = store.products(crawled_since=args.since, limit=args.limit)
+        elif args.command == "product":
+            output = store.load_result(args.asin, review_limit=args.limit)
+            if output is None:
+                print(json.dumps({"error": f"Product {args.asin} not found"}))
+                return 1
+        elif args.command == "reviews":
+            output = store.reviews(args.asin, min_rating=args.min_rating, max_rating=args.max_rating,
+                                   since=args.since, until=args.until, limit=args.limit, offset=args.offset)
+        elif args.command == "prices":
+            output = store.price_history(args.asin)
+        elif args.command == "api":
+            request = json.loads(sys.stdin.read() or '{}')
+            status, body = api_query(store, request.get("path", ""), request.get("query") or {})
+            output = {"status": status, "body": body}
+        else:
+            output = {"imported": import_json_files(args.files, store)}
+    finally:
+        store.close()
+    print(json.dumps(output, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
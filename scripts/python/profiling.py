@@ -0,0 +1,183 @@
+"""
+Per-stage profiling of process_product for diagnosing slow pages.
+
+With ``--profile``, every stage of a sampled product runs under cProfile,
+tracemalloc and a stack-sampling thread, and leaves four files in
+``<profile dir>/<product>/``:
+
+- ``<stage>.pstats``: raw cProfile dump, for ``pstats``, snakeviz or gprof2dot
+- ``<stage>.txt``: the same profile sorted by cumulative time
+- ``<stage>.alloc.txt``: peak traced memory and the top allocation sites
+- ``<stage>.collapsed``: sampled stacks in the collapsed format read by
+  flamegraph.pl and speedscope
+
+tracemalloc traces every thread and only one profiler can be active per
+thread in recent Pythons, so profiled stages run one at a time; unprofiled
+products keep running their stages concurrently. In batch runs only every
+Nth product is profiled.
+"""
+
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_DIR = 'profiles'
+SAMPLE_INTERVAL = 0.002      # seconds between stack samples
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+TRACEMALLOC_FRAMES = 10
+
+
+class StackSampler:
+    """
+    Samples one thread's Python stack at a fixed interval into collapsed-stack counts.
+    """
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if frames:
+                # Root first, separated by semicolons, which must not appear in a frame
+                self.stacks[';'.join(name.replace(';', ':') for name in reversed(frames))] += 1
+
+    def __enter__(self) -> 'StackSampler':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        """Return the samples as ``frame;frame;frame count`` lines."""
+        return ''.join(f"{stack} {samples}\n" for stack, samples in self.stacks.most_common())
+
+
+class StageProfiler:
+    """
+    Profiles the stages of every Nth product and writes one report set per stage.
+    """
+
+    def __init__(self, output_dir: str = DEFAULT_PROFILE_DIR, every: int = 1):
+        """
+        Args:
+            output_dir (str): Directory of the reports, one subdirectory per profiled product.
+            every (int): Profile the 1st, (N+1)th, (2N+1)th, ... product.
+        """
+        self.output_dir = Path(output_dir)
+        self.every = max(1, every)
+        self.products = 0
+        self._lock = threading.Lock()
+        self._stage_lock = threading.Lock()
+
+    def sample(self, url: str) -> Optional[str]:
+        """
+        Count a product and decide whether to profile it.
+
+        Args:
+            url (str): Product URL.
+
+        Returns:
+            Optional[str]: Report directory name of the product, or None if it is not profiled.
+        """
+        with self._lock:
+            index = self.products
+            self.products += 1
+        if index % self.every:
+            return None
+        match = re.search(r'/(?:dp|gp/product)/([A-Z0-9]{10})', url)
+        return f"{index + 1:04d}_{match.group(1) if match else 'product'}"
+
+    def wrap(self, label: Optional[str], stage: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        """
+        Wrap a stage so it is profiled when its product was sampled.
+
+        Args:
+            label (str, optional): Report directory name from sample, or None to leave func unchanged.
+            stage (str): Stage name, used for the report file names.
+            func (Callable[..., Any]): The stage.
+
+        Returns:
+            Callable[..., Any]: The profiled stage.
+        """
+        if label is None:
+            return func
+
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            with self._stage_lock:
+                return self._profile(label, stage, func, *args, **kwargs)
+        return run
+
+    def _profile(self, label: str, stage: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        tracemalloc.reset_peak()
+        profiler = cProfile.Profile()
+        sampler = StackSampler(threading.get_ident())
+        start = time.perf_counter()
+        try:
+            with sampler:
+                profiler.enable()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    profiler.disable()
+        finally:
+            elapsed = time.perf_counter() - start
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+            self._write_reports(label, stage, elapsed, profiler, snapshot, peak, sampler)
+
+    def _write_reports(self, label: str, stage: str, elapsed: float, profiler: cProfile.Profile,
+                       snapshot: tracemalloc.Snapshot, peak: int, sampler: StackSampler) -> None:
+        directory = self.output_dir / label
+        directory.mkdir(parents=True, exist_ok=True)
+
+        profiler.dump_stats(str(directory / f"{stage}.pstats"))
+        report = io.StringIO()
+        report.write(f"{stage} of {label}: {elapsed:.3f}s\n\n")
+        pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+        (directory / f"{stage}.txt").write_text(report.getvalue(), encoding='utf-8')
+
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        lines = [f"{stage} of {label}: peak traced memory {peak / 1024:.1f} KiB", ""]
+        for statistic in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+            frame = statistic.traceback[0]
+            lines.append(f"{statistic.size / 1024:10.1f} KiB {statistic.count:8d} blocks  "
+                         f"{frame.filename}:{frame.lineno}")
+        (directory / f"{stage}.alloc.txt").write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+        (directory / f"{stage}.collapsed").write_text(sampler.collapsed(), encoding='utf-8')
+        logger.info(f"Profiled {stage} of {label} in {elapsed:.3f}s, reports in {directory}")
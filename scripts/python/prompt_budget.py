@@ -0,0 +1,165 @@
+"""
+Token budgeting for LLM prompts built from reviews.
+
+A fixed review count says nothing about prompt size: one 5,000-word review can
+cost more than a hundred short ones. Reviews are instead measured with a fast
+local token estimate, truncated to a per-review cap, de-duplicated, and picked
+to fill a token budget. Picks are stratified by star rating so minority
+opinions are represented, and ranked within each rating by helpful votes.
+"""
+
+import math
+import re
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .review_dedupe import ReviewDeduplicator
+except ImportError:
+    # Run directly as a script by server.js
+    from review_dedupe import ReviewDeduplicator
+
+DEFAULT_REVIEW_MAX_TOKENS = 300
+
+_SENTENCE_END_RE = re.compile(r'[.!?](?=\s)')
+
+# Share of each rating's quota taken from the actual rating distribution; the
+# rest is spread evenly so 1-3 star opinions are not crowded out by 5 stars
+DISTRIBUTION_WEIGHT = 0.5
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a text without a tokenizer.
+
+    Uses the usual rules of thumb for BPE tokenizers on English text, about
+    four characters or three quarters of a word per token, and takes the larger
+    of the two. Both counts run in C, so measuring is far cheaper than the
+    regex tokenization done elsewhere.
+
+    Args:
+        text (str): Text to measure.
+
+    Returns:
+        int: Estimated token count.
+    """
+    if not text:
+        return 0
+    return max(len(text) // 4, len(text.split()) * 4 // 3) + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Truncate a text to about max_tokens, preferring to cut at a sentence end.
+
+    Args:
+        text (str): Text to truncate.
+        max_tokens (int): Token allowance.
+
+    Returns:
+        str: The text unchanged if it fits, otherwise a shortened text ending in "...".
+    """
+    total = estimate_tokens(text)
+    if total <= max_tokens:
+        return text
+
+    # Scale the cut by the text's own characters-per-token ratio, then back off
+    cut = len(text) * max_tokens // total
+    while cut > 0 and estimate_tokens(text[:cut]) > max_tokens:
+        cut = cut * 9 // 10
+    head = text[:cut]
+    if cut < len(text) and not text[cut].isspace():
+        head = head.rsplit(None, 1)[0] if ' ' in head else head
+
+    # Cut at the last sentence end if that keeps at least half of the text
+    sentence_ends = [m.end() for m in _SENTENCE_END_RE.finditer(head + ' ')]
+    if sentence_ends and sentence_ends[-1] >= len(head) // 2:
+        return head[:sentence_ends[-1]] + ' ...'
+    return head.rstrip() + '...'
+
+
+def prepare_reviews(reviews: Sequence[Dict[str, Any]],
+                    max_tokens_per_review: int = DEFAULT_REVIEW_MAX_TOKENS) -> List[Dict[str, Any]]:
+    """
+    De-duplicate reviews and truncate overly long review texts.
+
+    Args:
+        reviews (Sequence[Dict[str, Any]]): Review dictionaries.
+        max_tokens_per_review (int): Token cap for each review text.
+
+    Returns:
+        List[Dict[str, Any]]: Unique reviews in their original order. Truncated
+            reviews are copies with ``truncated`` set; the input is not modified.
+    """
+    prepared = []
+    for review in ReviewDeduplicator().iter_unique(dict(review) for review in reviews):
+        text = review.get('text', '')
+        shortened = truncate_to_tokens(text, max_tokens_per_review)
+        if shortened != text:
+            review['text'] = shortened
+            review['truncated'] = True
+        prepared.append(review)
+    return prepared
+
+
+def _informativeness(review: Dict[str, Any], tokens: int) -> float:
+    """Ranking score within a star rating: helpful votes first, then text length."""
+    votes = review.get('helpful_votes') or 0
+    return math.log1p(votes) + 0.5 * min(tokens, 150) / 150
+
+
+def select_reviews(reviews: Sequence[Dict[str, Any]], token_budget: int,
+                   max_tokens_per_review: int = DEFAULT_REVIEW_MAX_TOKENS,
+                   formatter: Optional[Callable[[Dict[str, Any]], str]] = None) -> List[Dict[str, Any]]:
+    """
+    Pick the most informative reviews that fit a token budget.
+
+    Args:
+        reviews (Sequence[Dict[str, Any]]): Review dictionaries.
+        token_budget (int): Total estimated tokens allowed for the selected reviews.
+        max_tokens_per_review (int): Token cap for each review text.
+        formatter (Callable, optional): Formats a review as it appears in the
+            prompt, so the budget accounts for labels. Defaults to the review text.
+            Its token cost also stands in for text length when ranking.
+
+    Returns:
+        List[Dict[str, Any]]: Selected (possibly truncated) reviews, in pick order.
+    """
+    formatter = formatter or (lambda review: review.get('text', ''))
+    prepared = prepare_reviews(reviews, max_tokens_per_review)
+    if not prepared:
+        return []
+
+    # (ranking score, token cost, review) per star rating, best first
+    strata: Dict[int, List[Tuple[float, int, Dict[str, Any]]]] = defaultdict(list)
+    for review in prepared:
+        cost = estimate_tokens(formatter(review))
+        strata[int(round(review.get('rating') or 0))].append((_informativeness(review, cost), cost, review))
+    for members in strata.values():
+        members.sort(key=lambda member: member[0], reverse=True)
+
+    total = len(prepared)
+    target_share = {
+        rating: DISTRIBUTION_WEIGHT * len(members) / total + (1 - DISTRIBUTION_WEIGHT) / len(strata)
+        for rating, members in strata.items()
+    }
+    picked_count = {rating: 0 for rating in strata}
+    positions = {rating: 0 for rating in strata}
+
+    selected = []
+    used = 0
+    while True:
+        open_strata = [rating for rating in strata if positions[rating] < len(strata[rating])]
+        if not open_strata:
+            break
+        # Take from the rating furthest below its target share
+        picked_total = len(selected) + 1
+        rating = min(open_strata, key=lambda r: (picked_count[r] / picked_total - target_share[r], -r))
+        _, cost, review = strata[rating][positions[rating]]
+        positions[rating] += 1
+        if used + cost > token_budget:
+            continue
+        selected.append(review)
+        picked_count[rating] += 1
+        used += cost
+    return selected
@@ -0,0 +1,260 @@
+"""
+Local extractive pros/cons engine.
+
+Scores candidate phrases with sparse TF-IDF vectors that contrast positive
+(4-5 star) against negative (1-2 star) reviews, then picks a representative
+review sentence for each of the strongest phrases. Everything runs locally and
+deterministically, so summaries need no API call.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    from .term_frequency import STOP_WORDS, iter_ngrams, tokenize
+except ImportError:
+    # Run directly as a script by server.js
+    from term_frequency import STOP_WORDS, iter_ngrams, tokenize
+
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])(?:\s+|(?=[A-Z]))|\n+')
+_READ_MORE_RE = re.compile(r'\s*Read more$')
+
+# Sentences outside this range rarely make readable pros/cons
+MIN_SENTENCE_LENGTH = 20
+MAX_SENTENCE_LENGTH = 220
+
+SparseVector = Dict[str, float]
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split review text into trimmed sentences."""
+    if not text:
+        return []
+    text = _READ_MORE_RE.sub('', text)
+    return [sentence.strip() for sentence in _SENTENCE_SPLIT_RE.split(text) if sentence.strip()]
+
+
+def _phrases(tokens: List[str], max_n: int) -> List[str]:
+    """Candidate phrases of a token list: n-grams without stop words."""
+    phrases = []
+    for n in range(1, max_n + 1):
+        for gram in iter_ngrams(tokens, n):
+            if not any(word in STOP_WORDS for word in gram):
+                phrases.append(' '.join(gram))
+    return phrases
+
+
+class ProsConsExtractor:
+    """
+    Extracts grounded pros, cons and key points from a product's reviews.
+    """
+
+    def __init__(self, max_n: int = 2, positive_min: float = 4.0, negative_max: float = 2.0):
+        """
+        Initialize the extractor.
+
+        Args:
+            max_n (int): Largest phrase size considered.
+            positive_min (float): Lowest rating counted as a positive review.
+            negative_max (float): Highest rating counted as a negative review.
+        """
+        self.max_n = max_n
+        self.positive_min = positive_min
+        self.negative_max = negative_max
+        self.reviews: List[Dict[str, Any]] = []
+        self.document_frequency: Counter = Counter()
+        self.class_document_frequency: Dict[str, Counter] = {'positive': Counter(), 'negative': Counter()}
+        self.class_sizes: Counter = Counter()
+        self.contrast: SparseVector = {}
+        self._sentences: Optional[List[Tuple[Optional[str], float, str, int, Set[str]]]] = None
+
+    def _review_class(self, review: Dict[str, Any]) -> Optional[str]:
+        rating = review.get('rating', 0) or 0
+        if rating >= self.positive_min:
+            return 'positive'
+        if 0 < rating <= self.negative_max:
+            return 'negative'
+        return None
+
+    def fit(self, reviews: Iterable[Dict[str, Any]]) -> "ProsConsExtractor":
+        """
+        Build the TF-IDF contrast between positive and negative reviews.
+
+        Each review is a sparse row of phrase term frequencies. Rows are
+        weighted by inverse document frequency, L2-normalized and averaged per
+        class; the contrast vector is the positive centroid minus the negative
+        centroid.
+
+        Args:
+            reviews (Iterable[Dict[str, Any]]): Review dictionaries.
+
+        Returns:
+            ProsConsExtractor: The fitted extractor.
+        """
+        self.reviews = [review for review in reviews if review.get('text') or review.get('title')]
+        self._sentences = None
+        # Refitting starts over rather than adding to the previous counts
+        self.document_frequency = Counter()
+        self.class_document_frequency = {'positive': Counter(), 'negative': Counter()}
+
+        rows: List[Tuple[Optional[str], Counter]] = []
+        for review in self.reviews:
+            tokens = tokenize(review.get('text') or review.get('title', ''))
+            term_counts = Counter(_phrases(tokens, self.max_n))
+            review_class = self._review_class(review)
+            rows.append((review_class, term_counts))
+            self.document_frequency.update(term_counts.keys())
+            if review_class:
+                self.class_document_frequency[review_class].update(term_counts.keys())
+
+        total = len(rows)
+        idf = {term: math.log((1 + total) / (1 + df)) + 1.0 for term, df in self.document_frequency.items()}
+
+        centroids: Dict[str, SparseVector] = {'positive': defaultdict(float), 'negative': defaultdict(float)}
+        class_sizes = self.class_sizes = Counter(review_class for review_class, _ in rows if review_class)
+        for review_class, term_counts in rows:
+            if not review_class or not term_counts:
+                continue
+            weights = {term: count * idf[term] for term, count in term_counts.items()}
+            norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+            centroid = centroids[review_class]
+            for term, weight in weights.items():
+                centroid[term] += weight / norm / class_sizes[review_class]
+
+        positive, negative = centroids['positive'], centroids['negative']
+        self.contrast = {term: positive.get(term, 0.0) - negative.get(term, 0.0)
+                         for term in set(positive) | set(negative)}
+        return self
+
+    def _min_df(self, review_class: str) -> int:
+        """Require repeated mentions once a class has enough reviews."""
+        return 2 if self.class_sizes[review_class] >= 5 else 1
+
+    def _top_phrases(self, review_class: str, limit: int) -> List[str]:
+        sign = 1.0 if review_class == 'positive' else -1.0
+        class_df = self.class_document_frequency[review_class]
+        min_df = self._min_df(review_class)
+
+        candidates = sorted(
+            ((sign * score, term) for term, score in self.contrast.items()
+             if sign * score > 0 and class_df[term] >= min_df),
+            key=lambda item: (-item[0] * (1.25 if ' ' in item[1] else 1.0), item[1])
+        )
+
+        chosen: List[str] = []
+        for _, term in candidates:
+            words = set(term.split())
+            # Skip phrases that overlap one already chosen
+            if any(words & set(existing.split()) for existing in chosen):
+                continue
+            chosen.append(term)
+            if len(chosen) == limit:
+                break
+        return chosen
+
+    def _candidate_sentences(self) -> List[Tuple[Optional[str], float, str, int, Set[str]]]:
+        """Tokenize every usable review sentence once, on first use."""
+        if self._sentences is None:
+            self._sentences = []
+            for review in self.reviews:
+                review_class = self._review_class(review)
+                helpful_bonus = 0.1 * math.log1p(review.get('helpful_votes', 0) or 0)
+                for sentence in split_sentences(review.get('text', '')):
+                    if not MIN_SENTENCE_LENGTH <= len(sentence) <= MAX_SENTENCE_LENGTH:
+                        continue
+                    tokens = tokenize(sentence)
+                    if tokens:
+                        self._sentences.append((review_class, helpful_bonus, sentence,
+                                                len(tokens), set(_phrases(tokens, self.max_n))))
+        return self._sentences
+
+    def _representative_sentence(self, phrase: str, review_class: str, used: Set[str]) -> Optional[str]:
+        """Pick the best supporting sentence for a phrase from the given class."""
+        best: Optional[Tuple[float, str]] = None
+        sign = -1.0 if review_class == 'negative' else 1.0
+        for sentence_class, helpful_bonus, sentence, token_count, terms in self._candidate_sentences():
+            if sentence_class != review_class or phrase not in terms or sentence in used:
+                continue
+            weight = sum(max(sign * self.contrast.get(term, 0.0), 0.0) for term in terms)
+            score = weight / math.sqrt(token_count) + helpful_bonus
+            if best is None or score > best[0]:
+                best = (score, sentence)
+        return best[1] if best else None
+
+    def _sentences_for(self, review_class: str, limit: int) -> List[str]:
+        used: Set[str] = set()
+        results = []
+        for phrase in self._top_phrases(review_class, limit * 2):
+            sentence = self._representative_sentence(phrase, review_class, used)
+            if sentence:
+                used.add(sentence)
+                results.append(sentence)
+            if len(results) == limit:
+                break
+        return results
+
+    def pros(self, limit: int = 5) -> List[str]:
+        """Representative sentences for the phrases most typical of positive reviews."""
+        return self._sentences_for('positive', limit)
+
+    def cons(self, limit: int = 5) -> List[str]:
+        """Representative sentences for the phrases most typical of negative reviews."""
+        return self._sentences_for('negative', limit)
+
+    def key_points(self, limit: int = 5) -> List[str]:
+        """
+        Describe the most discussed phrases and how reviewers feel about them.
+
+        Args:
+            limit (int): Maximum number of key points.
+
+        Returns:
+            List[str]: Key point sentences.
+        """
+        if not self.reviews:
+            return []
+        min_df = 2 if len(self.reviews) >= 5 else 1
+        total = len(self.reviews)
+        ranked = sorted(
+            (term for term, df in self.document_frequency.items() if df >= min_df),
+            key=lambda term: (-self.document_frequency[term] * (1.5 if ' ' in term else 1.0), term)
+        )
+
+        points: List[str] = []
+        chosen: List[str] = []
+        for term in ranked:
+            words = set(term.split())
+            if any(words & set(existing.split()) for existing in chosen):
+                continue
+            chosen.append(term)
+            mentions = self.document_frequency[term]
+            positive = self.class_document_frequency['positive'][term]
+            negative = self.class_document_frequency['negative'][term]
+            if positive and positive >= 2 * negative:
+                tone = "mostly in positive reviews"
+            elif negative and negative >= 2 * positive:
+                tone = "mostly in negative reviews"
+            else:
+                tone = "with mixed opinions"
+            share = mentions / total * 100
+            points.append(f"\"{term.capitalize()}\" comes up in {mentions} of {total} reviews ({share:.0f}%), {tone}.")
+            if len(points) == limit:
+                break
+        return points
+
+
+def extract_pros_cons(reviews: Iterable[Dict[str, Any]], limit: int = 5) -> Tuple[List[str], List[str]]:
+    """
+    Utility function to extract pros and cons from reviews.
+
+    Args:
+        reviews (Iterable[Dict[str, Any]]): Review dictionaries.
+        limit (int): Maximum number of pros and of cons.
+
+    Returns:
+        Tuple[List[str], List[str]]: Pros and cons as representative review sentences.
+    """
+    extractor = ProsConsExtractor().fit(reviews)
+    return extractor.pros(limit), extractor.cons(limit)
@@ -0,0 +1,283 @@
+"""
+Change-rate-aware refresh scheduling for watched products.
+
+Refreshing every watched product on a fixed cron spends most requests on
+products that have not changed. The scheduler keeps, per ASIN, a history of
+checks and whether the price, rating, review count or specifications changed.
+It estimates each product's change rate from that history (treating changes
+as a Poisson process), and schedules the next check for when a change has
+become likely. Due products are taken from a min-heap of next-check times,
+capped by a global request budget, so the same budget catches far more real
+changes than a fixed interval.
+"""
+
+import hashlib
+import heapq
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from .insight_store import extract_asin
+except ImportError:
+    # Run directly as a script by server.js
+    from insight_store import extract_asin
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+DEFAULT_WATCHLIST_PATH = ROOT_DIR / ".cache" / "watchlist.sqlite3"
+
+DEFAULT_MIN_INTERVAL = 3600.0             # never check a product more than hourly
+DEFAULT_MAX_INTERVAL = 7 * 24 * 3600.0    # and at least weekly
+DEFAULT_CHANGE_PROBABILITY = 0.5          # check once a change is this likely
+# Recent checks used to estimate the change rate, so the estimate follows changes in behaviour
+HISTORY_WINDOW = 20
+
+SNAPSHOT_FIELDS = ('price', 'rating', 'review_count', 'spec_hash')
+
+
+def product_snapshot(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract the fields whose changes are tracked from a process_product result.
+
+    Args:
+        result (Dict[str, Any]): Product result as produced by main.py.
+
+    Returns:
+        Dict[str, Any]: Price, rating, review count and a hash of the specifications.
+    """
+    details = result.get('product_details') or {}
+    review_data = result.get('review_data') or {}
+    analysis = review_data.get('analysis') or {}
+    specifications = json.dumps(details.get('specifications') or {}, sort_keys=True, ensure_ascii=False)
+    snapshot = {
+        'price': details.get('price'),
+        'rating': analysis.get('average_rating'),
+        'review_count': analysis.get('total_reviews'),
+        'spec_hash': hashlib.sha1(specifications.encode('utf-8')).hexdigest()
+    }
+    incremental = review_data.get('incremental')
+    if incremental is not None:
+        # Only the new reviews were fetched: their rating says nothing about the product's
+        snapshot.pop('rating')
+        snapshot['review_count'] = incremental['known_reviews'] + incremental['new_reviews']
+    return snapshot
+
+
+def changed_fields(previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> List[str]:
+    """Return the snapshot fields that differ between two snapshots, among the fields both hold."""
+    if previous is None:
+        return []
+    return [field for field in SNAPSHOT_FIELDS
+            if field in previous and field in current and previous[field] != current[field]]
+
+
+def estimate_change_rate(checks: List[Dict[str, Any]]) -> Optional[float]:
+    """
+    Estimate a product's change rate from its check history.
+
+    Uses the bias-reduced estimator for a Poisson process observed at intervals,
+    where only whether at least one change happened between checks is known:
+    ``rate = -ln((n - X + 0.5) / (n + 0.5)) / mean_interval`` for n intervals with
+    X changes.
+
+    Args:
+        checks (List[Dict[str, Any]]): Checks in time order, with ``time`` and ``changed``.
+
+    Returns:
+        Optional[float]: Changes per second, or None with fewer than two checks.
+    """
+    if len(checks) < 2:
+        return None
+    intervals = len(checks) - 1
+    changes = sum(1 for check in checks[1:] if check['changed'])
+    elapsed = checks[-1]['time'] - checks[0]['time']
+    if elapsed <= 0:
+        return None
+    return -math.log((intervals - changes + 0.5) / (intervals + 0.5)) / (elapsed / intervals)
+
+
+class RefreshScheduler:
+    """
+    SQLite-backed watchlist with per-ASIN change history and predicted refresh times.
+    """
+
+    def __init__(self, path: Optional[str] = None, min_interval: float = DEFAULT_MIN_INTERVAL,
+                 max_interval: float = DEFAULT_MAX_INTERVAL,
+                 change_probability: float = DEFAULT_CHANGE_PROBABILITY):
+        """
+        Open the watchlist, creating the database file if needed.
+
+        Args:
+            path (str, optional): Database path. Defaults to WATCHLIST_PATH or
+                .cache/watchlist.sqlite3 in the project root.
+            min_interval (float): Shortest time between two checks of a product, in seconds.
+            max_interval (float): Longest time between two checks of a product, in seconds.
+            change_probability (float): Check a product once a change since its last
+                check has at least this probability.
+        """
+        self.path = Path(path or os.getenv("WATCHLIST_PATH") or DEFAULT_WATCHLIST_PATH)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.change_probability = change_probability
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS watched ("
+                "asin TEXT PRIMARY KEY, url TEXT NOT NULL, next_due REAL NOT NULL, snapshot TEXT)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS checks ("
+                "asin TEXT NOT NULL, time REAL NOT NULL, changed INTEGER NOT NULL, fields TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_checks_asin_time ON checks (asin, time)")
+
+    def watch(self, url: str, now: Optional[float] = None) -> Optional[str]:
+        """
+        Add a product to the watchlist, due immediately. Already watched products are left as they are.
+
+        Args:
+            url (str): Product URL.
+            now (float, optional): Current time, for tests.
+
+        Returns:
+            Optional[str]: The product's ASIN, or None if the URL has none.
+        """
+        asin = extract_asin(url)
+        if asin is None:
+            self.logger.warning(f"No ASIN in {url}, not watching it")
+            return None
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO watched (asin, url, next_due) VALUES (?, ?, ?)",
+                               (asin, f"https://www.amazon.com/dp/{asin}", time.time() if now is None else now))
+        return asin
+
+    def unwatch(self, asin: str) -> None:
+        """Remove a product and its history from the watchlist."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM watched WHERE asin = ?", (asin,))
+            self._conn.execute("DELETE FROM checks WHERE asin = ?", (asin,))
+
+    def due(self, budget: int, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Return the products to refresh now, most overdue first, at most budget of them.
+
+        Args:
+            budget (int): Global request budget, in product refreshes.
+            now (float, optional): Current time, for tests.
+
+        Returns:
+            List[Dict[str, Any]]: ``asin``, ``url`` and ``next_due`` of each due product.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._conn.execute("SELECT next_due, asin, url FROM watched").fetchall()
+        heapq.heapify(rows)
+        due = []
+        while rows and len(due) < budget and rows[0][0] <= now:
+            next_due, asin, url = heapq.heappop(rows)
+            due.append({'asin': asin, 'url': url, 'next_due': next_due})
+        return due
+
+    def history(self, asin: str) -> List[Dict[str, Any]]:
+        """Return the most recent checks of a product, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT time, changed, fields FROM checks WHERE asin = ? ORDER BY time DESC LIMIT ?",
+                (asin, HISTORY_WINDOW)
+            ).fetchall()
+        return [{'time': row[0], 'changed': bool(row[1]), 'fields': json.loads(row[2])} for row in reversed(rows)]
+
+    def next_interval(self, asin: str) -> float:
+        """
+        Predict how long to wait before the next useful check of a product.
+
+        The wait is the time after which a change has ``change_probability``
+        under the estimated change rate, clamped to the scheduler's bounds.
+        """
+        rate = estimate_change_rate(self.history(asin))
+        if rate is None:
+            return self.min_interval
+        if rate <= 0:
+            return self.max_interval
+        interval = -math.log(1 - self.change_probability) / rate
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def record(self, asin: str, result: Optional[Dict[str, Any]], now: Optional[float] = None) -> List[str]:
+        """
+        Record a refresh of a product and schedule its next one.
+
+        Args:
+            asin (str): Product ASIN.
+            result (Dict[str, Any], optional): process_product result, or None if the refresh failed.
+            now (float, optional): Current time, for tests.
+
+        Returns:
+            List[str]: Snapshot fields that changed since the previous check.
+        """
+        now = time.time() if now is None else now
+        details = (result or {}).get('product_details') or {}
+        if not details.get('price') and not details.get('description'):
+            # A failed fetch says nothing about change; retry after the shortest interval
+            with self._lock, self._conn:
+                self._conn.execute("UPDATE watched SET next_due = ? WHERE asin = ?", (now + self.min_interval, asin))
+            return []
+
+        with self._lock:
+            row = self._conn.execute("SELECT snapshot FROM watched WHERE asin = ?", (asin,)).fetchone()
+        previous = json.loads(row[0]) if row and row[0] else None
+        snapshot = product_snapshot(result)
+        fields = changed_fields(previous, snapshot)
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO checks (asin, time, changed, fields) VALUES (?, ?, ?, ?)",
+                               (asin, now, int(bool(fields)), json.dumps(fields)))
+            self._conn.execute("UPDATE watched SET snapshot = ? WHERE asin = ?", (json.dumps(snapshot), asin))
+        interval = self.next_interval(asin)
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE watched SET next_due = ? WHERE asin = ?", (now + interval, asin))
+        self.logger.info(f"{asin}: {'changed ' + ', '.join(fields) if fields else 'unchanged'}, "
+                         f"next check in {interval / 3600:.1f} h")
+        return fields
+
+    def run(self, process: Callable[[str], Dict[str, Any]], budget: int,
+            now: Optional[float] = None, keep_results: bool = True) -> List[Dict[str, Any]]:
+        """
+        Refresh the due products within the budget.
+
+        Args:
+            process (Callable[[str], Dict[str, Any]]): Refreshes a product URL, e.g. process_product.
+            budget (int): Global request budget, in product refreshes.
+            now (float, optional): Current time, for tests.
+            keep_results (bool): Collect the results; off when process already streams them out.
+
+        Returns:
+            List[Dict[str, Any]]: Results of the refreshed products, or an empty list without keep_results.
+        """
+        results = []
+        due = self.due(budget, now)
+        changed = 0
+        for entry in due:
+            try:
+                result = process(entry['url'])
+            except Exception as e:
+                self.logger.error(f"Error refreshing {entry['asin']}: {str(e)}")
+                result = None
+            changed += bool(self.record(entry['asin'], result, now))
+            if result is not None and keep_results:
+                results.append(result)
+        self.logger.info(f"Refreshed {len(due)} due products, {changed} changed")
+        return results
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
@@ -0,0 +1,154 @@
+"""
+Streaming JSONL output for product results.
+
+``save_results_to_json`` writes one indented document once every product is
+done, so a batch keeps all results, reviews included, in memory until the end.
+The result writer appends one compact JSON line per product as soon as it
+finishes and, optionally, one line per review as each page is parsed. Lines
+are flushed as they are written, so consumers can tail the file live. Files
+can be gzip-compressed and rotated by size; a rotated segment is closed before
+it is renamed, so every segment except the current one is complete.
+"""
+
+import gzip
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_RECORD = 'product'
+REVIEW_RECORD = 'review'
+
+
+def _is_gzip(path: Path) -> bool:
+    return path.suffix == '.gz'
+
+
+def _open_text(path: Path, mode: str):
+    if _is_gzip(path):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class ResultWriter:
+    """
+    Appends product and review records to a JSONL file, one compact line each.
+    """
+
+    def __init__(self, path: str, reviews: bool = False, max_bytes: Optional[int] = None):
+        """
+        Open the output file for appending.
+
+        Args:
+            path (str): Output file. A ``.gz`` suffix (e.g. ``results.jsonl.gz``) compresses it.
+            reviews (bool): Also write one line per review as review pages are parsed.
+            max_bytes (int, optional): Rotate once the current file holds this many bytes
+                (compressed size for gzip). Rotated segments are named ``results.1.jsonl``,
+                ``results.2.jsonl``, ... in the order they were written.
+        """
+        self.path = Path(path)
+        self.reviews = reviews
+        self.max_bytes = max_bytes
+        self.products = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._segments = len(rotated_segments(self.path))
+        self._file = _open_text(self.path, 'a')
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        """Write one line in a single call and flush it, rotating afterwards if the file is full."""
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._file.write(line)
+            # For gzip this is a sync flush: everything written so far can be decompressed
+            self._file.flush()
+            if self.max_bytes and os.path.getsize(self.path) >= self.max_bytes:
+                self._rotate()
+
+    def _rotate(self) -> None:
+        """Close the current file and move it aside as the next numbered segment."""
+        self._file.close()
+        self._segments += 1
+        target = segment_path(self.path, self._segments)
+        os.replace(self.path, target)
+        logger.info(f"Rotated {self.path} to {target}")
+        self._file = _open_text(self.path, 'a')
+
+    def write_product(self, result: Dict[str, Any]) -> None:
+        """Write the complete result of a product."""
+        self._write({'type': PRODUCT_RECORD, **result})
+        self.products += 1
+
+    def write_reviews(self, url: str, page: int, reviews: List[Dict[str, Any]]) -> None:
+        """
+        Write the reviews of one parsed page, if review lines are enabled.
+
+        Args:
+            url (str): Product URL the reviews belong to.
+            page (int): Review page number.
+            reviews (List[Dict[str, Any]]): Reviews parsed from the page.
+        """
+        if not self.reviews:
+            return
+        for review in reviews:
+            self._write({'type': REVIEW_RECORD, 'url': url, 'page': page, **review})
+
+    def close(self) -> None:
+        """Flush and close the output file."""
+        with self._lock:
+            self._file.close()
+        logger.info(f"Streamed {self.products} products to {self.path}")
+
+    def __enter__(self) -> 'ResultWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def segment_path(path: Path, number: int) -> Path:
+    """Return the path of a rotated segment: ``results.jsonl.gz`` -> ``results.<number>.jsonl.gz``."""
+    name = path.name
+    stem, dot, suffixes = name.partition('.')
+    return path.with_name(f"{stem}.{number}{dot}{suffixes}")
+
+
+def rotated_segments(path: Path) -> List[Path]:
+    """Return the rotated segments of an output file, oldest first."""
+    segments = []
+    number = 1
+    while segment_path(path, number).exists():
+        segments.append(segment_path(path, number))
+        number += 1
+    return segments
+
+
+def read_results(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Utility function to read the records of a JSONL output, rotated segments first.
+
+    A line torn by a crash, or still being written, is skipped.
+
+    Args:
+        path (str): Output file given to the ResultWriter.
+
+    Yields:
+        Dict[str, Any]: Product and review records in the order they were written.
+    """
+    path = Path(path)
+    for segment in rotated_segments(path) + ([path] if path.exists() else []):
+        with _open_text(segment, 'r') as f:
+            try:
+                for line_number, line in enumerate(f, 1):
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        logger.warning(f"Skipping unreadable line {line_number} in {segment}")
+            except EOFError:
+                # A gzip file that was not closed ends mid-stream after its last sync flush
+                logger.warning(f"{segment} is still being written or was not closed")
@@ -1,11 +1,15 @@
 import requests
+import itertools
 import re
 import random
 import time
 import logging
-from typing import List, Dict, Optional, Any, Tuple
+from typing import Callable, Container, List, Dict, Iterable, Iterator, Optional, Any, Tuple
 from bs4 import BeautifulSoup
 from .scraper import AmazonScraper
+from .review_dedupe import ReviewDeduplicator
+from .review_stream import ReviewAccumulator
+from .metrics import count, record_time, timed
 
 class ReviewAnalyzer:
     """
@@ -23,22 +27,53 @@ class ReviewAnalyzer:
         self.scraper = AmazonScraper(user_agent)
         self.logger = logging.getLogger(__name__)
     
-    def extract_reviews(self, product_url: str, max_pages: int = 3) -> List[Dict[str, Any]]:
+    def extract_reviews(self, product_url: str, max_pages: int = 3, start_page: int = 1,
+                        on_page: Optional[Callable[[int, List[Dict[str, Any]]], None]] = None) -> List[Dict[str, Any]]:
         """
         Extract reviews from Amazon product page through direct web scraping.
         
         Args:
             product_url (str): The URL of the Amazon product page.
             max_pages (int): Maximum number of review pages to scrape.
+            start_page (int): First review page to fetch, to resume an interrupted fetch.
+            on_page (Callable[[int, List[Dict[str, Any]]], None], optional): Called with the
+                page number and its new reviews after each review page, e.g. to checkpoint it.
             
         Returns:
-            List[Dict[str, Any]]: List of review data dictionaries.
+            List[Dict[str, Any]]: List of review data dictionaries from start_page on.
+        """
+        return list(self.iter_reviews(product_url, max_pages, start_page=start_page, on_page=on_page))
+    
+    def iter_reviews(self, product_url: str, max_pages: int = 3, start_page: int = 1,
+                     on_page: Optional[Callable[[int, List[Dict[str, Any]]], None]] = None,
+                     known_fingerprints: Optional[Container[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield a product's reviews as each review page is parsed, without duplicates.
+        
+        The next page is only fetched once the caller has consumed the reviews of
+        the current one, and closing the generator (or breaking out of a loop over
+        it) stops the fetch, so a consumer that has enough reviews pays for no
+        further pages.
+        
+        Args:
+            product_url (str): The URL of the Amazon product page.
+            max_pages (int): Maximum number of review pages to scrape.
+            start_page (int): First review page to fetch, to resume an interrupted fetch.
+            on_page (Callable[[int, List[Dict[str, Any]]], None], optional): Called with the
+                page number and its new reviews after each review page is parsed, before
+                they are yielded.
+            known_fingerprints (Container[str], optional): Fingerprints of reviews fetched
+                by earlier crawls. Only unknown reviews are yielded, and as pages are sorted
+                by most recent, the fetch stops at the first page without unknown reviews.
+            
+        Yields:
+            Dict[str, Any]: Review data dictionaries from start_page on.
         """
         # First extract the ASIN from the product URL
         asin = self._extract_asin(product_url)
         if not asin:
             self.logger.error(f"Failed to extract ASIN from URL: {product_url}")
-            return []
+            return
             
         # Review URL formats to try
         review_urls = [
@@ -47,13 +82,20 @@ class ReviewAnalyzer:
             f"https://www.amazon.com/dp/{asin}/reviews"
         ]
         
-        all_reviews = []
+        found = 0
+        caught_up = False
+        # The same review can show up on several pages and URL formats
+        deduplicator = ReviewDeduplicator()
+        
+        # Only the paginated URL format can resume past the first page
+        if start_page > 1:
+            review_urls = [review_url for review_url in review_urls if "pageNumber=1" in review_url]
         
         # Try each review URL format
         for review_url in review_urls:
             self.logger.info(f"Scraping reviews from: {review_url}")
             
-            current_page = 1
+            current_page = start_page
             while current_page <= max_pages:
                 # Replace page number in URL if needed
                 page_url = review_url
@@ -61,24 +103,41 @@ class ReviewAnalyzer:
                     page_url = review_url.replace(f"pageNumber=1", f"pageNumber={current_page}")
                 
                 self.logger.info(f"Fetching review page {current_page}: {page_url}")
+                count('review_pages')
                 html_content = self.scraper.fetch_page(page_url)
                 if not html_content:
                     self.logger.error(f"Failed to fetch review page {current_page}")
                     break
                 
                 # Parse the current page reviews
-                page_reviews = self._parse_review_page(html_content)
+                with timed('parse_reviews'):
+                    page_reviews = self._parse_review_page(html_content)
                 
                 if not page_reviews:
                     self.logger.info(f"No reviews found on page {current_page}")
+                    if current_page == start_page:
+                        count('selector_misses', field='reviews')
                     break
                     
-                all_reviews.extend(page_reviews)
-                self.logger.info(f"Extracted {len(page_reviews)} reviews from page {current_page}")
+                new_reviews = deduplicator.filter(page_reviews)
+                self.logger.info(f"Extracted {len(page_reviews)} reviews from page {current_page} ({len(page_reviews) - len(new_reviews)} duplicates dropped)")
+                if known_fingerprints is not None:
+                    new_reviews = [review for review in new_reviews if review['fingerprint'] not in known_fingerprints]
+                    caught_up = not new_reviews
+                found += len(new_reviews)
+                if on_page:
+                    on_page(current_page, new_reviews)
                 
                 # Check if there's a next page link
                 soup = BeautifulSoup(html_content, 'html.parser')
                 next_page_link = soup.select_one("li.a-last a") or soup.select_one("a.a-last")
+                # Drop the page before handing control to the consumer, so a
+                # suspended generator only holds the current page's reviews
+                del soup, html_content, page_reviews
+                yield from new_reviews
+                if caught_up:
+                    self.logger.info(f"Page {current_page} holds no unknown reviews, ending incremental review extraction")
+                    break
                 if not next_page_link:
                     self.logger.info("No next page link found, ending review extraction")
                     break
@@ -88,24 +147,24 @@ class ReviewAnalyzer:
                 time.sleep(random.uniform(2.0, 5.0))
             
             # If we found reviews using this URL format, no need to try the other
-            if all_reviews:
+            if found or caught_up:
                 break
                 
         # If still no reviews, try scraping from the main product page as a last resort
-        if not all_reviews:
+        if not found and not caught_up and start_page == 1:
             self.logger.info(f"Trying to extract reviews from main product page: https://www.amazon.com/dp/{asin}")
             html_content = self.scraper.fetch_page(f"https://www.amazon.com/dp/{asin}")
             if html_content:
                 soup = BeautifulSoup(html_content, 'html.parser')
                 
                 # Try to extract reviews from the product page
-                reviews = self._extract_review_snippets(soup)
+                reviews = deduplicator.filter(self._extract_review_snippets(soup))
                 if reviews:
-                    all_reviews.extend(reviews)
+                    found += len(reviews)
                     self.logger.info(f"Extracted {len(reviews)} review snippets from product page")
+                    yield from reviews
         
-        self.logger.info(f"Extracted a total of {len(all_reviews)} reviews")
-        return all_reviews
+        self.logger.info(f"Extracted a total of {found} reviews ({deduplicator.duplicates_dropped} duplicates dropped)")
     
     def _extract_overall_rating(self, soup) -> float:
         """Extract the overall rating from the product page."""
@@ -374,65 +433,17 @@ class ReviewAnalyzer:
                 pass
         return 0.0
     
-    def analyze_sentiment(self, reviews: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def analyze_sentiment(self, reviews: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Perform basic statistical analysis on reviews and extract top positive and negative reviews.
         
         Args:
-            reviews (List[Dict[str, Any]]): List of review dictionaries.
+            reviews (Iterable[Dict[str, Any]]): Review dictionaries; an iterator is consumed lazily.
             
         Returns:
             Dict[str, Any]: Analysis results including top reviews.
         """
-        if not reviews:
-            return {
-                'average_rating': 0.0,
-                'total_reviews': 0,
-                'rating_counts': {},
-                'verified_count': 0,
-                'verified_percentage': 0.0,
-                'top_positive_reviews': [],
-                'top_negative_reviews': []
-            }
-        
-        # Calculate average rating
-        total_rating = sum(review['rating'] for review in reviews)
-        average_rating = total_rating / len(reviews)
-        
-        # Count ratings by star level
-        rating_counts = {}
-        for i in range(1, 6):
-            count = sum(1 for review in reviews if int(review['rating']) == i)
-            rating_counts[f"{i}_star"] = count
-            
-        # Count verified purchases
-        verified_count = sum(1 for review in reviews if review['verified_purchase'])
-        verified_percentage = (verified_count / len(reviews)) * 100
-        
-        # Extract top positive reviews (4-5 stars)
-        positive_reviews = [r for r in reviews if r['rating'] >= 4.0]
-        # Sort by helpfulness (if available) or most recent
-        positive_reviews.sort(key=lambda x: (x.get('helpful_votes', 0), x.get('date', '')), reverse=True)
-        top_positive = positive_reviews[:5]  # Get top 5
-        
-        # Extract top negative reviews (1-2 stars)
-        negative_reviews = [r for r in reviews if r['rating'] <= 2.0]
-        # Sort by helpfulness (if available) or most recent
-        negative_reviews.sort(key=lambda x: (x.get('helpful_votes', 0), x.get('date', '')), reverse=True)
-        top_negative = negative_reviews[:5]  # Get top 5
-        
-        self.logger.info(f"Found {len(positive_reviews)} positive reviews and {len(negative_reviews)} negative reviews")
-        self.logger.info(f"Selected top {len(top_positive)} positive and top {len(top_negative)} negative reviews")
-        
-        return {
-            'average_rating': round(average_rating, 2),
-            'total_reviews': len(reviews),
-            'rating_counts': rating_counts,
-            'verified_count': verified_count,
-            'verified_percentage': round(verified_percentage, 2),
-            'top_positive_reviews': top_positive,
-            'top_negative_reviews': top_negative
-        }
+        return ReviewAccumulator(keep=0).extend(reviews).analysis()
     
     def find_similar_products(self, product_url: str) -> List[Dict[str, Any]]:
         """
@@ -451,6 +462,16 @@ class ReviewAnalyzer:
             self.logger.error("Failed to fetch product page for similar products")
             return []
         
+        with timed('parse_similar_products'):
+            similar_products = self._parse_similar_products(html_content)
+        if not similar_products:
+            count('selector_misses', field='similar_products')
+        
+        self.logger.info(f"Found {len(similar_products)} similar products")
+        return similar_products
+    
+    def _parse_similar_products(self, html_content: str) -> List[Dict[str, Any]]:
+        """Parse the similar and sponsored products of a product page."""
         soup = BeautifulSoup(html_content, 'html.parser')
         similar_products = []
         
@@ -519,8 +540,7 @@ class ReviewAnalyzer:
                             similar_products.append(product)
                     except Exception as e:
                         self.logger.warning(f"Error extracting sponsored product: {str(e)}")
-    
-        self.logger.info(f"Found {len(similar_products)} similar products")
+        
         return similar_products
         
     def _extract_similar_product_info(self, element) -> Dict[str, Any]:
@@ -705,22 +725,59 @@ class ReviewAnalyzer:
         return reviews
 
 
-def analyze_product_reviews(url: str, max_review_pages: int = 3) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+def analyze_product_reviews(url: str, max_review_pages: int = 3, start_page: int = 1,
+                            on_page: Optional[Callable[[int, List[Dict[str, Any]]], None]] = None,
+                            previous_reviews: Optional[List[Dict[str, Any]]] = None,
+                            keep_reviews: Optional[int] = None,
+                            max_reviews: Optional[int] = None,
+                            known_fingerprints: Optional[Container[str]] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     """
     Utility function to analyze reviews for a product.
     
+    Reviews are analyzed as they are streamed from the review pages, so only
+    the reviews returned are held in memory.
+    
     Args:
         url (str): The URL of the Amazon product page.
         max_review_pages (int): Maximum number of review pages to scrape.
+        start_page (int): First review page to fetch, to resume an interrupted fetch.
+        on_page (Callable, optional): Called with each page number and its new reviews.
+        previous_reviews (List[Dict[str, Any]], optional): Reviews of the pages before
+            start_page, fetched by an earlier run.
+        keep_reviews (int, optional): Return a uniform sample of at most this many
+            reviews instead of all of them. The analysis still covers every review.
+        max_reviews (int, optional): Stop fetching pages once this many reviews were found.
+        known_fingerprints (Container[str], optional): Fingerprints of reviews fetched by
+            earlier crawls; only newer reviews are fetched, returned and analyzed.
         
     Returns:
         Tuple[List[Dict[str, Any]], Dict[str, Any]]: Tuple containing the list of reviews 
-        and the sentiment analysis results.
+        (or their sample) and the sentiment analysis results.
     """
     analyzer = ReviewAnalyzer()
-    reviews = analyzer.extract_reviews(url, max_review_pages)
-    analysis = analyzer.analyze_sentiment(reviews)
-    return reviews, analysis
+    stream = analyzer.iter_reviews(url, max_review_pages, start_page=start_page, on_page=on_page,
+                                   known_fingerprints=known_fingerprints)
+    reviews = stream
+    if previous_reviews:
+        reviews = ReviewDeduplicator().iter_unique(itertools.chain(previous_reviews, stream))
+    if max_reviews is not None:
+        reviews = itertools.islice(reviews, max_reviews)
+    
+    accumulator = ReviewAccumulator(keep=keep_reviews)
+    elapsed = 0.0
+    try:
+        for review in reviews:
+            started = time.perf_counter()
+            accumulator.add(review)
+            elapsed += time.perf_counter() - started
+    finally:
+        # Stops the page fetch when max_reviews cut the stream short
+        stream.close()
+    started = time.perf_counter()
+    analysis = accumulator.analysis()
+    # Analysis is interleaved with the page fetches, so only its own time is recorded
+    record_time('analysis', elapsed + time.perf_counter() - started)
+    return accumulator.reviews, analysis
 
 
 # Example usage
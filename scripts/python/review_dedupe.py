@@ -0,0 +1,131 @@
+"""
+Review fingerprinting and duplicate filtering.
+
+Amazon repeats reviews across pages (and across the different review URL
+formats) when new reviews land while a crawl is in progress. Every review gets
+a stable content fingerprint so duplicates can be dropped as pages stream in.
+"""
+
+import hashlib
+import re
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Set
+
+# Number of leading characters of the review body that go into the fingerprint.
+# Snippets on the product page are truncated versions of the full review, so
+# only a prefix is hashed.
+TEXT_PREFIX_LENGTH = 100
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _normalize(value: Any) -> str:
+    """Lowercase a field and collapse its whitespace."""
+    if value is None:
+        return ""
+    return _WHITESPACE_RE.sub(' ', str(value)).strip().lower()
+
+
+def review_fingerprint(review: Dict[str, Any]) -> str:
+    """
+    Compute a stable fingerprint for a review.
+
+    The fingerprint is built from the reviewer name, date, title and a prefix of
+    the review text, so the same review scraped from different pages or URL
+    formats maps to the same value.
+
+    Args:
+        review (Dict[str, Any]): Review dictionary.
+
+    Returns:
+        str: 16-character hex digest identifying the review.
+    """
+    parts = (
+        _normalize(review.get('reviewer_name')),
+        _normalize(review.get('date')),
+        _normalize(review.get('title')),
+        _normalize(review.get('text'))[:TEXT_PREFIX_LENGTH],
+    )
+    return hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=8).hexdigest()
+
+
+class ReviewDeduplicator:
+    """
+    Drops reviews whose fingerprint has already been seen.
+
+    Lookups are O(1). Memory is bounded by ``max_entries``: once the limit is
+    reached the oldest fingerprints are forgotten first, which is safe because
+    Amazon only repeats reviews across nearby pages.
+    """
+
+    def __init__(self, max_entries: int = 1_000_000):
+        """
+        Initialize the deduplicator.
+
+        Args:
+            max_entries (int): Maximum number of fingerprints kept in memory.
+        """
+        self.max_entries = max_entries
+        self.duplicates_dropped = 0
+        self._seen: Set[str] = set()
+        self._order: Deque[str] = deque()
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def __contains__(self, fingerprint: str) -> bool:
+        return fingerprint in self._seen
+
+    def add(self, review: Dict[str, Any]) -> bool:
+        """
+        Register a review and stamp its fingerprint on it.
+
+        Args:
+            review (Dict[str, Any]): Review dictionary. A ``fingerprint`` key is added.
+
+        Returns:
+            bool: True if the review is new, False if it is a duplicate.
+        """
+        fingerprint = review.get('fingerprint') or review_fingerprint(review)
+        review['fingerprint'] = fingerprint
+
+        if fingerprint in self._seen:
+            self.duplicates_dropped += 1
+            return False
+
+        self._seen.add(fingerprint)
+        self._order.append(fingerprint)
+        if len(self._order) > self.max_entries:
+            self._seen.discard(self._order.popleft())
+        return True
+
+    def filter(self, reviews: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Return only the reviews that have not been seen before.
+
+        Args:
+            reviews (Iterable[Dict[str, Any]]): Reviews to check, e.g. one parsed page.
+
+        Returns:
+            List[Dict[str, Any]]: New reviews, in their original order.
+        """
+        return [review for review in reviews if self.add(review)]
+
+    def iter_unique(self, reviews: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Lazily yield only the reviews that have not been seen before."""
+        for review in reviews:
+            if self.add(review):
+                yield review
+
+
+def dedupe_reviews(reviews: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Utility function to remove duplicate reviews from a list.
+
+    Args:
+        reviews (Iterable[Dict[str, Any]]): Reviews, possibly containing duplicates.
+
+    Returns:
+        List[Dict[str, Any]]: Reviews with duplicates removed, first occurrence kept.
+    """
+    return ReviewDeduplicator().filter(reviews)
@@ -0,0 +1,183 @@
+"""
+Map-reduce LLM summarization over every review of a product.
+
+Reviews are packed into token-budgeted batches. Each batch is analyzed by a
+concurrent "map" call that returns a partial JSON object; the partial results
+are then merged by a single "reduce" call (or locally, if that call fails).
+All map calls share one pooled client, so latency stays close to two round
+trips regardless of how many reviews a product has.
+"""
+
+import asyncio
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from .llm_cache import get_response_cache, make_cache_key
+    from .llm_client import DEFAULT_MODEL, AsyncLLMClient, response_content
+    from .prompt_budget import estimate_tokens
+    from .structured_output import recover_json
+except ImportError:
+    # Run directly as a script by server.js
+    from llm_cache import get_response_cache, make_cache_key
+    from llm_client import DEFAULT_MODEL, AsyncLLMClient, response_content
+    from prompt_budget import estimate_tokens
+    from structured_output import recover_json
+
+DEFAULT_BATCH_TOKEN_BUDGET = 6000
+
+
+def format_review_line(review: Dict[str, Any]) -> str:
+    """Format one review the way the analysis prompts list them."""
+    return f"Rating: {review.get('rating')} - {review.get('text', '')}"
+
+
+def chunk_reviews(reviews: Sequence[Dict[str, Any]], token_budget: int = DEFAULT_BATCH_TOKEN_BUDGET,
+                  formatter: Callable[[Dict[str, Any]], str] = format_review_line) -> List[List[Dict[str, Any]]]:
+    """
+    Pack reviews into batches whose formatted text fits a token budget.
+
+    Args:
+        reviews (Sequence[Dict[str, Any]]): Review dictionaries.
+        token_budget (int): Maximum estimated tokens of review text per batch.
+        formatter (Callable): Formats a review as it will appear in the prompt.
+
+    Returns:
+        List[List[Dict[str, Any]]]: Batches of reviews, in their original order.
+            A single review larger than the budget gets a batch of its own, so
+            long texts should be capped first with prompt_budget.prepare_reviews.
+    """
+    batches: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    used = 0
+    for review in reviews:
+        cost = estimate_tokens(formatter(review))
+        if current and used + cost > token_budget:
+            batches.append(current)
+            current, used = [], 0
+        current.append(review)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def parse_json_content(content: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Parse a JSON object from an LLM answer, tolerating code fences, surrounding text and truncation."""
+    return recover_json(content)
+
+
+def _item_key(item: Any) -> str:
+    """Identity of a list item for local merging: its first string field, lowercased."""
+    if isinstance(item, dict):
+        for value in item.values():
+            if isinstance(value, str):
+                return value.strip().lower()
+        return json.dumps(item, sort_keys=True)
+    return str(item).strip().lower()
+
+
+def merge_partial_analyses(partials: Sequence[Dict[str, Any]], list_limit: int = 8) -> Dict[str, Any]:
+    """
+    Merge partial JSON results locally, without an LLM call.
+
+    List fields are concatenated, de-duplicated by their first string field and
+    ordered by how many partials mentioned each item. Scalar fields keep the
+    first value seen.
+
+    Args:
+        partials (Sequence[Dict[str, Any]]): Partial results from the map step.
+        list_limit (int): Maximum items kept per list field.
+
+    Returns:
+        Dict[str, Any]: Merged result with the same schema.
+    """
+    merged: Dict[str, Any] = {}
+    mentions: Dict[str, Dict[str, List[Any]]] = {}
+    for partial in partials:
+        for field, value in partial.items():
+            if isinstance(value, list):
+                items = mentions.setdefault(field, {})
+                for item in value:
+                    items.setdefault(_item_key(item), []).append(item)
+            elif isinstance(value, dict) and all(isinstance(v, list) for v in value.values()):
+                merged[field] = merge_partial_analyses(
+                    [p.get(field, {}) for p in partials if isinstance(p.get(field), dict)], list_limit)
+            else:
+                merged.setdefault(field, value)
+
+    for field, items in mentions.items():
+        ranked = sorted(items.values(), key=len, reverse=True)
+        merged[field] = [group[0] for group in ranked[:list_limit]]
+    return merged
+
+
+def map_reduce(map_prompts: Sequence[str], reduce_prompt: Callable[[List[Dict[str, Any]]], str],
+               system_prompt: str, model: str = DEFAULT_MODEL, temperature: Optional[float] = None,
+               api_key: Optional[str] = None, base_url: Optional[str] = None,
+               max_concurrency: int = 8, timeout: float = 120.0,
+               use_cache: bool = True) -> Tuple[Optional[Dict[str, Any]], List[int]]:
+    """
+    Run map prompts concurrently and merge their JSON results with a reduce prompt.
+
+    Args:
+        map_prompts (Sequence[str]): One user prompt per review batch.
+        reduce_prompt (Callable): Builds the reduce user prompt from the parsed partials.
+        system_prompt (str): System message shared by map and reduce calls.
+        model (str): Model name.
+        temperature (float, optional): Sampling temperature.
+        api_key (str, optional): API key for the LLM service.
+        base_url (str, optional): API root, see AsyncLLMClient.
+        max_concurrency (int): Maximum concurrent map calls.
+        timeout (float): Per-request timeout in seconds.
+        use_cache (bool): Reuse cached results for identical prompts.
+
+    Returns:
+        Tuple[Optional[Dict[str, Any]], List[int]]: Merged result, or None if every map
+            call failed, and the indices of the map prompts whose call failed. The result
+            only covers the other batches.
+    """
+    cache = get_response_cache() if use_cache else None
+
+    def payload(prompt: str) -> Dict[str, Any]:
+        body = {'model': model, 'messages': [{'role': 'system', 'content': system_prompt},
+                                            {'role': 'user', 'content': prompt}]}
+        if temperature is not None:
+            body['temperature'] = temperature
+        return body
+
+    async def complete(client: AsyncLLMClient, prompts: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+        keys = [make_cache_key(model, system_prompt, prompt, temperature) for prompt in prompts]
+        results: List[Optional[Dict[str, Any]]] = [cache.get(key) if cache else None for key in keys]
+        pending = [i for i, result in enumerate(results) if result is None]
+        responses = await client.complete_many([payload(prompts[i]) for i in pending])
+        for i, response in zip(pending, responses):
+            if isinstance(response, Exception):
+                print(f"Error calling LLM API: {response}")
+                continue
+            parsed = parse_json_content(response_content(response))
+            if parsed is not None:
+                results[i] = parsed
+                if cache:
+                    cache.put(keys[i], parsed)
+        return results
+
+    async def run() -> Tuple[Optional[Dict[str, Any]], List[int]]:
+        async with AsyncLLMClient(api_key=api_key, base_url=base_url, max_concurrency=max_concurrency,
+                                  timeout=timeout) as client:
+            results = await complete(client, map_prompts)
+            failed = [i for i, partial in enumerate(results) if partial is None]
+            if failed:
+                print(f"{len(failed)} of {len(map_prompts)} map calls failed, their batches are not covered")
+            partials = [partial for partial in results if partial is not None]
+            if not partials:
+                return None, failed
+            if len(partials) == 1:
+                return partials[0], failed
+            reduced = (await complete(client, [reduce_prompt(partials)]))[0]
+            if reduced is None:
+                print("Reduce call failed, merging partial results locally")
+                return merge_partial_analyses(partials), failed
+            return reduced, failed
+
+    return asyncio.run(run())
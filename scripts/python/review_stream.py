@@ -0,0 +1,218 @@
+"""
+Streaming aggregation of reviews into the review analysis.
+
+Reviews are added one at a time as pages are parsed. Averages and counts are
+running totals, near-duplicate clusters come from an incremental LSH index and
+text sentiment from a streaming score summary. Optionally a uniform sample of
+the reviews (reservoir sampling) is kept for the result and the summary, so a
+product with hundreds of review pages no longer holds every review in memory.
+
+Only the first review of a near-duplicate cluster is eligible for the top
+positive and negative reviews, and an indexed review can lose that place when
+a later review links its cluster to an earlier one. The top lists therefore
+keep every eligible indexed review that still ranks above the fifth best
+review that can no longer join a cluster; at most ``index_entries`` reviews,
+like the index itself. The result is the same as for a list of the reviews,
+except that past ``index_entries`` reviews clusters can differ (see
+NearDuplicateIndex).
+"""
+
+import heapq
+import logging
+import random
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .near_duplicates import DEFAULT_INDEX_ENTRIES, NearDuplicateIndex
+    from .sentiment_lexicon import ScoreSummary, SentimentScorer
+except ImportError:
+    # Run directly as a script by server.js
+    from near_duplicates import DEFAULT_INDEX_ENTRIES, NearDuplicateIndex
+    from sentiment_lexicon import ScoreSummary, SentimentScorer
+
+TOP_REVIEWS = 5
+
+
+class ReviewAccumulator:
+    """
+    Builds the review analysis from a stream of reviews.
+    """
+
+    def __init__(self, keep: Optional[int] = None, seed: Optional[int] = None,
+                 index_entries: int = DEFAULT_INDEX_ENTRIES):
+        """
+        Args:
+            keep (int, optional): Reviews kept in ``reviews``: all of them if None, otherwise
+                a uniform random sample of at most this many.
+            seed (int, optional): Seed of the sample, for reproducible runs.
+            index_entries (int): Reviews indexed for near-duplicate detection; later
+                reviews are only matched against these.
+        """
+        self.keep = keep
+        self.reviews: List[Dict[str, Any]] = []
+        self.logger = logging.getLogger(__name__)
+        self._random = random.Random(seed)
+        self._count = 0
+        self._rating_total = 0.0
+        self._rating_counts = {f"{i}_star": 0 for i in range(1, 6)}
+        self._verified = 0
+        self._positive = 0
+        self._negative = 0
+        # Best reviews that can no longer join an earlier cluster, as min-heaps
+        self._top: Dict[str, List[Tuple[Any, ...]]] = {'positive': [], 'negative': []}
+        # Indexed reviews that still might, as min-heaps; entries whose index left
+        # ``_at_risk_live`` joined a cluster and are skipped
+        self._at_risk: Dict[str, List[Tuple[Any, ...]]] = {'positive': [], 'negative': []}
+        self._at_risk_live: Dict[str, set] = {'positive': set(), 'negative': set()}
+        self._near_duplicates = NearDuplicateIndex(max_entries=index_entries)
+        self._scorer = SentimentScorer()
+        self._scores = ScoreSummary()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, review: Dict[str, Any]) -> None:
+        """Add the next review."""
+        index = self._count
+        self._count += 1
+        rating = review['rating']
+        self._rating_total += rating
+        if 1 <= int(rating) <= 5:
+            self._rating_counts[f"{int(rating)}_star"] += 1
+        if review.get('verified_purchase'):
+            self._verified += 1
+
+        # Only the first review of a near-duplicate cluster is eligible for the top lists
+        repeated = self._near_duplicates.add(review)
+        for merged in self._near_duplicates.merged_roots:
+            for live in self._at_risk_live.values():
+                live.discard(merged)
+        if rating >= 4.0:
+            self._positive += 1
+            if not repeated:
+                self._offer('positive', index, review)
+        elif rating <= 2.0:
+            self._negative += 1
+            if not repeated:
+                self._offer('negative', index, review)
+
+        self._scores.add(review, self._scorer.score_review(review))
+
+        if self.keep is None or len(self.reviews) < self.keep:
+            self.reviews.append(review)
+        else:
+            # Reservoir sampling: every review seen so far is kept with equal probability
+            slot = self._random.randrange(self._count)
+            if slot < self.keep:
+                self.reviews[slot] = review
+
+    def _offer(self, kind: str, index: int, review: Dict[str, Any]) -> None:
+        # Most helpful, then most recent, then earliest first, as a stable sort would
+        key = (review.get('helpful_votes', 0), review.get('date', ''), -index)
+        top = self._top[kind]
+        if len(top) == TOP_REVIEWS and key < top[0][0]:
+            # Five reviews that stay eligible rank higher
+            return
+        entry = (key, index, review)
+        if self._near_duplicates.indexed(index):
+            heapq.heappush(self._at_risk[kind], entry)
+            self._at_risk_live[kind].add(index)
+            return
+        if len(top) < TOP_REVIEWS:
+            heapq.heappush(top, entry)
+        else:
+            heapq.heapreplace(top, entry)
+        if len(top) == TOP_REVIEWS:
+            # Reviews at risk below the fifth best safe one can never make the list
+            at_risk, live = self._at_risk[kind], self._at_risk_live[kind]
+            while at_risk and (at_risk[0][0] < top[0][0] or at_risk[0][1] not in live):
+                live.discard(heapq.heappop(at_risk)[1])
+
+    def extend(self, reviews: Iterable[Dict[str, Any]]) -> 'ReviewAccumulator':
+        """Add every review of an iterable, consuming it lazily."""
+        for review in reviews:
+            self.add(review)
+        return self
+
+    def analysis(self) -> Dict[str, Any]:
+        """
+        Return the statistical analysis of every review added.
+
+        Returns:
+            Dict[str, Any]: Average rating, rating counts, verified purchases, top
+            reviews, near-duplicate clusters and text sentiment.
+        """
+        clusters = self._near_duplicates.clusters()
+        repeated = {i for members in clusters for i in members[1:]}
+        near_duplicates = self._summarize_near_duplicates(clusters, repeated)
+        if not self._count:
+            return {
+                'average_rating': 0.0,
+                'total_reviews': 0,
+                'rating_counts': {},
+                'verified_count': 0,
+                'verified_percentage': 0.0,
+                'top_positive_reviews': [],
+                'top_negative_reviews': [],
+                'near_duplicates': near_duplicates,
+                'text_sentiment': self._scores.result()
+            }
+
+        rating = self._near_duplicates.rating
+        positive = self._positive - sum(1 for i in repeated if rating(i) >= 4.0)
+        negative = self._negative - sum(1 for i in repeated if rating(i) <= 2.0)
+        top_positive = self._top_reviews('positive')
+        top_negative = self._top_reviews('negative')
+        self.logger.info(f"Found {positive} positive reviews and {negative} negative reviews")
+        self.logger.info(f"Selected top {len(top_positive)} positive and top {len(top_negative)} negative reviews")
+
+        return {
+            'average_rating': round(self._rating_total / self._count, 2),
+            'total_reviews': self._count,
+            'rating_counts': dict(self._rating_counts),
+            'verified_count': self._verified,
+            'verified_percentage': round(self._verified / self._count * 100, 2),
+            'top_positive_reviews': top_positive,
+            'top_negative_reviews': top_negative,
+            'near_duplicates': near_duplicates,
+            # Sentiment of the review text itself, which can contradict the stars
+            'text_sentiment': self._scores.result()
+        }
+
+    def _top_reviews(self, kind: str) -> List[Dict[str, Any]]:
+        live = self._at_risk_live[kind]
+        candidates = self._top[kind] + [entry for entry in self._at_risk[kind] if entry[1] in live]
+        return [review for _, _, review in sorted(candidates, reverse=True)[:TOP_REVIEWS]]
+
+    def _summarize_near_duplicates(self, clusters: List[List[int]], repeated: set) -> Dict[str, Any]:
+        """
+        Describe near-duplicate review clusters for the analysis output.
+
+        Returns:
+            Dict[str, Any]: Cluster details and the average rating with each
+            cluster counted once.
+        """
+        index = self._near_duplicates
+        cluster_details = []
+        for members in clusters:
+            title, text = index.sample(members[0])
+            cluster_details.append({
+                'size': len(members),
+                'review_indices': members,
+                'average_rating': round(sum(index.rating(i) for i in members) / len(members), 2),
+                'sample_title': title,
+                'sample_text': text
+            })
+
+        kept = self._count - len(repeated)
+        kept_total = self._rating_total - sum(index.rating(i) for i in repeated)
+        duplicate_count = len(repeated)
+        if clusters:
+            self.logger.info(f"Found {len(clusters)} near-duplicate clusters covering {duplicate_count} repeated reviews")
+
+        return {
+            'cluster_count': len(clusters),
+            'duplicate_review_count': duplicate_count,
+            'adjusted_average_rating': round(kept_total / kept, 2) if kept else 0.0,
+            'clusters': cluster_details
+        }
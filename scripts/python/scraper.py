@@ -6,6 +6,12 @@ import logging
 import random
 import time
 
+try:
+    from .metrics import count, record_time, timed
+except ImportError:
+    # Run directly as a script by server.js
+    from metrics import count, record_time, timed
+
 class AmazonScraper:
     """
     A class to scrape product information from Amazon product pages.
@@ -63,14 +69,23 @@ class AmazonScraper:
         
         for attempt in range(max_retries):
             try:
-                # Add a small delay between retries to avoid rate limiting
-                if attempt > 0:
-                    time.sleep(2 * attempt)
-                
-                # Add a random delay to appear more human-like
-                time.sleep(random.uniform(0.5, 2.0))
+                with timed('fetch_delay'):
+                    # Add a small delay between retries to avoid rate limiting
+                    if attempt > 0:
+                        count('retries', source='fetch')
+                        time.sleep(2 * attempt)
+                    
+                    # Add a random delay to appear more human-like
+                    time.sleep(random.uniform(0.5, 2.0))
                 
+                started = time.perf_counter()
                 response = self.session.get(cleaned_url, timeout=30)
+                # requests reports the time until the headers were parsed; DNS and
+                # connect are part of it on a new connection, and the rest is the body
+                elapsed = time.perf_counter() - started
+                ttfb = min(response.elapsed.total_seconds(), elapsed)
+                record_time('fetch_ttfb', ttfb)
+                record_time('fetch_body', elapsed - ttfb)
                 response.raise_for_status()
                 
                 # Debug info about the response
@@ -79,6 +94,7 @@ class AmazonScraper:
                 # Check if we got a CAPTCHA page
                 if "captcha" in response.text.lower() or "robot check" in response.text.lower():
                     self.logger.warning("Amazon CAPTCHA detected. Request was blocked.")
+                    count('captchas')
                     continue
                 
                 return response.text
@@ -538,25 +554,34 @@ class AmazonScraper:
             return None, {}, None, None
             
         # Extract the product description
-        description = self.extract_product_description(html_content)
+        with timed('extract_description'):
+            description = self.extract_product_description(html_content)
         if description:
             self.logger.info("Successfully extracted product description")
             
         # Extract the product technical specifications
-        specs = self.extract_tech_specs(html_content)
+        with timed('extract_specs'):
+            specs = self.extract_tech_specs(html_content)
         if specs:
             self.logger.info(f"Successfully extracted {len(specs)} technical specifications")
             
         # Extract the product image URL
-        image_url = self.extract_product_image(html_content)
+        with timed('extract_image'):
+            image_url = self.extract_product_image(html_content)
         if image_url:
             self.logger.info(f"Successfully extracted product image URL: {image_url}")
         
         # Extract the product price
-        price = self.extract_product_price(html_content)
+        with timed('extract_price'):
+            price = self.extract_product_price(html_content)
         if price:
             self.logger.info(f"Successfully extracted product price: {price}")
         
+        for field, value in (('description', description), ('specifications', specs),
+                             ('image', image_url), ('price', price)):
+            if not value:
+                count('selector_misses', field=field)
+        
         return description, specs, image_url, price
 
 def scrape_amazon_product(url: str) -> Tuple[Optional[str], Dict[str, Any], Optional[str], Optional[str]]:
@@ -0,0 +1,279 @@
+"""
+Lexicon-based sentiment scoring for review text.
+
+Star ratings alone miss 5-star reviews that are really complaints (and the
+reverse). Every review is tokenized once and each sentence is scored against a
+weighted lexicon with negation and intensifier handling; a negation reaches at
+most NEGATION_SCOPE words and never past the end of its clause. Token weights
+are looked up with a single map() over the sentence; the positional negation
+pass only runs for sentences that actually contain a negator.
+"""
+
+import math
+import re
+import statistics
+from array import array
+from typing import Any, Dict, Iterable, List, Sequence
+
+# Clause punctuation is kept as tokens so it can end a negation scope
+_TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?|[,;:]")
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])(?:\s+|(?=[A-Z]))|\n+')
+
+# Weights range from -3 (strongly negative) to +3 (strongly positive)
+LEXICON: Dict[str, float] = {
+    # Positive
+    "good": 1.5, "great": 2.5, "excellent": 3.0, "amazing": 3.0, "awesome": 2.8,
+    "fantastic": 3.0, "perfect": 2.8, "love": 2.5, "loved": 2.5, "loves": 2.5,
+    "like": 1.0, "liked": 1.2, "nice": 1.5, "best": 2.5, "better": 1.2,
+    "happy": 2.0, "pleased": 2.0, "satisfied": 1.8, "recommend": 2.0,
+    "recommended": 2.0, "worth": 1.5, "sturdy": 1.5, "durable": 1.8,
+    "reliable": 1.8, "easy": 1.5, "comfortable": 1.8, "fast": 1.2, "quick": 1.0,
+    "quiet": 1.0, "solid": 1.5, "smooth": 1.3, "impressed": 2.2,
+    "impressive": 2.2, "beautiful": 2.2, "works": 1.0, "worked": 0.8,
+    "exceeded": 2.0, "value": 1.2, "bargain": 1.8, "well": 0.8, "fine": 0.6,
+    "helpful": 1.2, "wonderful": 2.8, "superb": 2.8, "flawless": 2.8,
+    "gorgeous": 2.4, "cool": 1.3, "favorite": 2.0, "stable": 1.2,
+    "affordable": 1.3, "cheap": -0.5, "useful": 1.4, "convenient": 1.5,
+    # Negative
+    "bad": -2.0, "terrible": -3.0, "awful": -3.0, "horrible": -3.0,
+    "worst": -3.0, "poor": -2.0, "poorly": -2.0, "broke": -2.3, "broken": -2.3,
+    "breaks": -2.0, "defective": -2.8, "disappointed": -2.3,
+    "disappointing": -2.3, "disappointment": -2.5, "waste": -2.5,
+    "useless": -2.8, "junk": -2.8, "garbage": -3.0, "return": -1.0,
+    "returned": -1.5, "returning": -1.5, "refund": -1.5, "cheaply": -1.8,
+    "flimsy": -2.0, "fail": -2.0, "failed": -2.2, "fails": -2.0,
+    "stopped": -1.5, "problem": -1.5, "problems": -1.5, "issue": -1.2,
+    "issues": -1.2, "hate": -2.5, "annoying": -1.8, "slow": -1.3, "loud": -1.0,
+    "noisy": -1.3, "hard": -0.8, "difficult": -1.3, "unreliable": -2.2,
+    "overpriced": -2.0, "faulty": -2.5, "leaks": -1.8, "leaking": -1.8,
+    "cracked": -2.0, "damaged": -2.2, "scam": -3.0, "fake": -2.5,
+    "misleading": -2.0, "unusable": -2.8, "regret": -2.2, "avoid": -2.3,
+    "worse": -1.8, "mediocre": -1.2, "meh": -0.8, "complaint": -1.2,
+    "overheats": -2.0, "overheating": -2.0, "rattles": -1.2, "wrong": -1.5,
+}
+
+NEGATIONS = frozenset({
+    "not", "no", "never", "none", "nothing", "hardly", "without", "cannot",
+    "don't", "doesn't", "didn't", "isn't", "wasn't", "aren't", "weren't",
+    "won't", "wouldn't", "can't", "couldn't", "shouldn't", "dont", "didnt",
+    "doesnt", "isnt", "wasnt", "wont", "cant"
+})
+
+INTENSIFIERS: Dict[str, float] = {
+    "very": 1.3, "really": 1.3, "extremely": 1.5, "super": 1.3, "so": 1.2,
+    "incredibly": 1.5, "absolutely": 1.4, "totally": 1.3, "highly": 1.3,
+    "slightly": 0.6, "somewhat": 0.7, "barely": 0.5, "pretty": 1.1,
+}
+
+# Words after a negator whose polarity is flipped
+NEGATION_SCOPE = 3
+# Tokens that end a negation scope early: "no problems, great battery"
+CLAUSE_BREAKS = frozenset({",", ";", ":", "but", "although", "though", "however"})
+NEGATION_FACTOR = -0.75
+# Normalization constant mapping raw sums into [-1, 1], as in VADER
+NORMALIZATION_ALPHA = 15.0
+
+# Compound scores beyond these thresholds count as positive / negative
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+
+def _normalize(raw: float) -> float:
+    return raw / math.sqrt(raw * raw + NORMALIZATION_ALPHA)
+
+
+class SentimentScorer:
+    """
+    Scores review sentences against a weighted sentiment lexicon.
+    """
+
+    def __init__(self, lexicon: Dict[str, float] = None):
+        """
+        Initialize the scorer.
+
+        Args:
+            lexicon (Dict[str, float], optional): Word weights. Defaults to LEXICON.
+        """
+        self.lexicon = lexicon or LEXICON
+        self._lookup = self.lexicon.get
+
+    def score_tokens(self, tokens: Sequence[str]) -> float:
+        """
+        Score one tokenized sentence.
+
+        Args:
+            tokens (Sequence[str]): Lowercased sentence tokens.
+
+        Returns:
+            float: Compound score between -1 and 1.
+        """
+        weights = list(map(self._lookup, tokens))
+        if not any(weights):
+            return 0.0
+
+        if NEGATIONS.isdisjoint(tokens) and INTENSIFIERS.keys().isdisjoint(tokens):
+            return _normalize(sum(weight for weight in weights if weight))
+
+        # Slow path: apply negation scope and intensifiers positionally
+        raw = 0.0
+        negated_until = -1
+        for i, token in enumerate(tokens):
+            if token in NEGATIONS:
+                negated_until = i + NEGATION_SCOPE
+                continue
+            if token in CLAUSE_BREAKS:
+                negated_until = -1
+                continue
+            weight = weights[i]
+            if not weight:
+                continue
+            if i > 0 and tokens[i - 1] in INTENSIFIERS:
+                weight *= INTENSIFIERS[tokens[i - 1]]
+            if i <= negated_until:
+                weight *= NEGATION_FACTOR
+            raw += weight
+        return _normalize(raw)
+
+    def score_sentences(self, text: str) -> List[float]:
+        """Score each sentence of a text."""
+        if not text:
+            return []
+        scores = []
+        for sentence in _SENTENCE_SPLIT_RE.split(text):
+            tokens = _TOKEN_RE.findall(sentence.lower())
+            if tokens:
+                scores.append(self.score_tokens(tokens))
+        return scores
+
+    def score_review(self, review: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Score a review from its title and text.
+
+        Args:
+            review (Dict[str, Any]): Review dictionary.
+
+        Returns:
+            Dict[str, Any]: Review-level score (mean of sentence scores), the most
+            negative and most positive sentence scores, and the sentence count.
+        """
+        sentence_scores = self.score_sentences(review.get('title', '')) + self.score_sentences(review.get('text', ''))
+        if not sentence_scores:
+            return {'score': 0.0, 'min_sentence': 0.0, 'max_sentence': 0.0, 'sentences': 0}
+        return {
+            'score': sum(sentence_scores) / len(sentence_scores),
+            'min_sentence': min(sentence_scores),
+            'max_sentence': max(sentence_scores),
+            'sentences': len(sentence_scores)
+        }
+
+    def score_reviews(self, reviews: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Score a batch of reviews."""
+        return [self.score_review(review) for review in reviews]
+
+
+class ScoreSummary:
+    """
+    Streaming summary of review sentiment scores.
+
+    Reviews are added one at a time; only the scores (8 bytes each, for the
+    median), the counters and the mismatching reviews' titles are kept.
+    """
+
+    def __init__(self, mismatch_threshold: float = 0.3):
+        """
+        Args:
+            mismatch_threshold (float): Absolute score at which text sentiment is
+                considered to contradict the star rating.
+        """
+        self.mismatch_threshold = mismatch_threshold
+        self.values = array('d')
+        self.histogram = [0] * 10
+        self.label_counts = {'positive': 0, 'neutral': 0, 'negative': 0}
+        self.mismatches: List[Dict[str, Any]] = []
+
+    def add(self, review: Dict[str, Any], score: Dict[str, Any]) -> None:
+        """
+        Add the next review and its SentimentScorer.score_review result.
+
+        Args:
+            review (Dict[str, Any]): Review dictionary.
+            score (Dict[str, Any]): Its score.
+        """
+        index = len(self.values)
+        value = score['score']
+        self.values.append(value)
+        self.histogram[min(int((value + 1.0) * 5), 9)] += 1
+        if value > POSITIVE_THRESHOLD:
+            self.label_counts['positive'] += 1
+        elif value < NEGATIVE_THRESHOLD:
+            self.label_counts['negative'] += 1
+        else:
+            self.label_counts['neutral'] += 1
+
+        rating = review.get('rating', 0) or 0
+        threshold = self.mismatch_threshold
+        if (rating >= 4.0 and value <= -threshold) or (0 < rating <= 2.0 and value >= threshold):
+            self.mismatches.append({
+                'review_index': index,
+                'rating': rating,
+                'text_score': round(value, 3),
+                'title': review.get('title', '')
+            })
+
+    def result(self) -> Dict[str, Any]:
+        """
+        Return the summary for the analysis output.
+
+        Returns:
+            Dict[str, Any]: Mean/median score, label counts, a 10-bin histogram over
+            [-1, 1] and reviews whose text contradicts their rating.
+        """
+        if not self.values:
+            return {
+                'mean_score': 0.0,
+                'median_score': 0.0,
+                'label_counts': {'positive': 0, 'neutral': 0, 'negative': 0},
+                'histogram': [0] * 10,
+                'rating_mismatches': []
+            }
+        return {
+            'mean_score': round(statistics.fmean(self.values), 3),
+            'median_score': round(statistics.median(self.values), 3),
+            'label_counts': dict(self.label_counts),
+            'histogram': list(self.histogram),
+            'rating_mismatches': list(self.mismatches)
+        }
+
+
+def summarize_scores(reviews: Sequence[Dict[str, Any]], scores: Sequence[Dict[str, Any]],
+                     mismatch_threshold: float = 0.3) -> Dict[str, Any]:
+    """
+    Summarize review sentiment scores for the analysis output.
+
+    Args:
+        reviews (Sequence[Dict[str, Any]]): Review dictionaries.
+        scores (Sequence[Dict[str, Any]]): Matching results of SentimentScorer.score_review.
+        mismatch_threshold (float): Absolute score at which text sentiment is
+            considered to contradict the star rating.
+
+    Returns:
+        Dict[str, Any]: Mean/median score, label counts, a 10-bin histogram over
+        [-1, 1] and reviews whose text contradicts their rating.
+    """
+    summary = ScoreSummary(mismatch_threshold)
+    for review, score in zip(reviews, scores):
+        summary.add(review, score)
+    return summary.result()
+
+
+def analyze_text_sentiment(reviews: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Utility function to score and summarize the text sentiment of reviews.
+
+    Args:
+        reviews (Sequence[Dict[str, Any]]): Review dictionaries.
+
+    Returns:
+        Dict[str, Any]: Sentiment score distribution (see summarize_scores).
+    """
+    return summarize_scores(reviews, SentimentScorer().score_reviews(reviews))
@@ -0,0 +1,375 @@
+"""
+Tolerant parsing and schema validation of structured LLM answers.
+
+An answer that is fenced, wrapped in prose, has trailing commas or was cut
+off mid-object is recovered to the largest valid JSON object it contains.
+The recovered object is validated section by section against a schema:
+invalid list items are dropped, and only sections that are missing or have
+no valid content are requested again with a short targeted repair request,
+instead of regenerating the whole answer.
+"""
+
+import json
+import logging
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from .llm_client import chat_completion, response_content
+except ImportError:
+    # Run directly as a script by server.js
+    from llm_client import chat_completion, response_content
+
+logger = logging.getLogger(__name__)
+
+_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)\s*```', re.DOTALL)
+_CLOSERS = {'{': '}', '[': ']'}
+# Truncation points tried, latest first, before giving up on an answer
+MAX_RECOVERY_ATTEMPTS = 200
+
+SEVERITIES = ('low', 'medium', 'high')
+
+# Section specs: 'list' sections hold objects with required (and optional)
+# fields or plain strings; 'string' sections hold text; 'mapping' sections
+# map a product label to a list of strings.
+ANALYSIS_SCHEMA = {
+    'top_strengths': {'type': 'list', 'fields': {'feature': str, 'listing_advice': str},
+                      'optional': {'example_quote': str}},
+    'buyer_personas': {'type': 'list', 'fields': {'persona': str, 'description': str}},
+    'negative_trends': {'type': 'list', 'fields': {'issue': str, 'seller_fix': str, 'severity': str},
+                        'enums': {'severity': SEVERITIES}},
+    'undocumented_features': {'type': 'list', 'fields': {'feature': str, 'quote': str}},
+    'standout_quotes': {'type': 'list', 'items': str},
+}
+
+COMPARISON_SCHEMA = {
+    'product_advantages': {'type': 'list', 'fields': {'feature': str, 'better_product': str, 'summary': str},
+                           'optional': {'quote': str}},
+    'critical_weaknesses': {'type': 'list', 'fields': {'feature': str, 'worse_product': str, 'issue': str,
+                                                       'severity': str},
+                            'enums': {'severity': SEVERITIES}},
+    'shared_strengths': {'type': 'list', 'items': str},
+    'unique_selling_points': {'type': 'mapping'},
+    'buyer_recommendation': {'type': 'string'},
+}
+
+MATRIX_COMPARISON_SCHEMA = {
+    'comparison_matrix': {'type': 'list', 'fields': {'feature': str, 'scores': dict, 'best_product': str,
+                                                     'summary': str}},
+    'critical_weaknesses': COMPARISON_SCHEMA['critical_weaknesses'],
+    'shared_strengths': COMPARISON_SCHEMA['shared_strengths'],
+    'unique_selling_points': COMPARISON_SCHEMA['unique_selling_points'],
+    'buyer_recommendation': COMPARISON_SCHEMA['buyer_recommendation'],
+}
+
+# Called with the repair request text and the valid sections so far; returns the answer text
+RepairCallable = Callable[[str, Dict[str, Any]], Optional[str]]
+
+
+def _strip_trailing_commas(text: str) -> str:
+    """Remove commas directly before a closing bracket, outside of strings."""
+    out = []
+    in_string = escape = False
+    for c in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif c == '\\':
+                escape = True
+            elif c == '"':
+                in_string = False
+        elif c == '"':
+            in_string = True
+        elif c in '}]':
+            while out and out[-1] in ' \t\r\n':
+                out.pop()
+            if out and out[-1] == ',':
+                out.pop()
+        out.append(c)
+    return ''.join(out)
+
+
+def _truncation_candidates(text: str) -> List[str]:
+    """
+    Close a cut-off JSON object at every point where a value just ended.
+
+    Returns candidate documents, latest cut first.
+    """
+    cuts = []
+    stack: List[str] = []
+    in_string = escape = False
+    for i, c in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif c == '\\':
+                escape = True
+            elif c == '"':
+                in_string = False
+                cuts.append((i + 1, ''.join(reversed(stack))))
+        elif c == '"':
+            in_string = True
+        elif c in _CLOSERS:
+            stack.append(_CLOSERS[c])
+            cuts.append((i + 1, ''.join(reversed(stack))))
+        elif c in '}]':
+            if not stack:
+                break
+            stack.pop()
+            if not stack:
+                break
+            cuts.append((i + 1, ''.join(reversed(stack))))
+        elif c == ',':
+            cuts.append((i, ''.join(reversed(stack))))
+    return [text[:end] + closers for end, closers in reversed(cuts[-MAX_RECOVERY_ATTEMPTS:])]
+
+
+def recover_json(content: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Recover the JSON object in an LLM answer.
+
+    Tolerates code fences (closed or not), text around the object, trailing
+    commas and answers cut off mid-object, in which case the object is closed
+    after the last complete value.
+
+    Args:
+        content (Optional[str]): Answer text.
+
+    Returns:
+        Optional[Dict[str, Any]]: The recovered object, or None if there is none.
+    """
+    if not content:
+        return None
+    fenced = _FENCE_RE.search(content)
+    text = fenced.group(1) if fenced else content
+    start = text.find('{')
+    if start < 0:
+        return None
+    text = text[start:]
+
+    decoder = json.JSONDecoder()
+    for candidate in (text, _strip_trailing_commas(text)):
+        try:
+            parsed, _ = decoder.raw_decode(candidate)
+        except ValueError:
+            continue
+        if isinstance(parsed, dict):
+            return parsed
+
+    for candidate in _truncation_candidates(_strip_trailing_commas(text)):
+        try:
+            parsed = json.loads(_strip_trailing_commas(candidate))
+        except ValueError:
+            continue
+        if isinstance(parsed, dict):
+            logger.info("Recovered a truncated JSON answer")
+            return parsed
+    return None
+
+
+def _valid_text(value: Any) -> bool:
+    return isinstance(value, str) and bool(value.strip())
+
+
+def _clean_item(item: Any, spec: Dict[str, Any]) -> Optional[Any]:
+    """Return a validated copy of a list item, or None if it does not match the spec."""
+    if spec.get('items') is str:
+        return item.strip() if _valid_text(item) else None
+    if not isinstance(item, dict):
+        return None
+    cleaned = dict(item)
+    for field, kind in spec['fields'].items():
+        value = item.get(field)
+        if kind is str:
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = str(value)
+            if not _valid_text(value):
+                return None
+            allowed = spec.get('enums', {}).get(field)
+            if allowed:
+                value = value.strip().lower()
+                if value not in allowed:
+                    return None
+        elif not isinstance(value, kind) or not value:
+            return None
+        cleaned[field] = value
+    for field, kind in spec.get('optional', {}).items():
+        if field in cleaned and not isinstance(cleaned[field], kind):
+            del cleaned[field]
+    return cleaned
+
+
+def validate_section(value: Any, spec: Dict[str, Any]) -> Tuple[Any, Optional[str]]:
+    """
+    Validate one section of an answer.
+
+    Args:
+        value (Any): Section value from the answer.
+        spec (Dict[str, Any]): Section spec from a schema.
+
+    Returns:
+        Tuple[Any, Optional[str]]: The cleaned value and None, or None and the problem.
+    """
+    kind = spec['type']
+    if kind == 'string':
+        return (value.strip(), None) if _valid_text(value) else (None, "expected a non-empty string")
+    if kind == 'mapping':
+        if not isinstance(value, dict):
+            return None, "expected an object of string lists"
+        cleaned = {key: [point for point in points if _valid_text(point)]
+                   for key, points in value.items() if isinstance(points, list)}
+        return (cleaned, None) if cleaned else (None, "expected an object of string lists")
+
+    if not isinstance(value, list):
+        return None, "expected a list"
+    cleaned = [item for item in (_clean_item(item, spec) for item in value) if item is not None]
+    if value and not cleaned:
+        return None, "no item matches the schema"
+    return cleaned, None
+
+
+def validate_output(data: Dict[str, Any], schema: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Validate an answer against a schema, keeping every valid section.
+
+    Args:
+        data (Dict[str, Any]): Parsed answer.
+        schema (Dict[str, Dict[str, Any]]): Section specs.
+
+    Returns:
+        Tuple[Dict[str, Any], Dict[str, str]]: The answer with valid sections cleaned
+        and invalid ones removed, and the problem of each missing or invalid section.
+    """
+    result = {key: value for key, value in data.items() if key not in schema}
+    problems = {}
+    for section, spec in schema.items():
+        if section not in data:
+            problems[section] = "missing"
+            continue
+        cleaned, problem = validate_section(data[section], spec)
+        if problem:
+            problems[section] = problem
+        else:
+            result[section] = cleaned
+    return result, problems
+
+
+def describe_section(spec: Dict[str, Any]) -> str:
+    """Describe the expected shape of a section for a repair request."""
+    if spec['type'] == 'string':
+        return '"string"'
+    if spec['type'] == 'mapping':
+        return '{"<product label>": ["string"]}'
+    if spec.get('items') is str:
+        return '["string"]'
+    fields = []
+    for field, kind in list(spec['fields'].items()) + list(spec.get('optional', {}).items()):
+        allowed = spec.get('enums', {}).get(field)
+        shape = " | ".join(allowed) if allowed else ('object' if kind is dict else 'string')
+        fields.append(f'"{field}": "{shape}"')
+    return '[{' + ", ".join(fields) + '}]'
+
+
+def build_repair_request(schema: Dict[str, Dict[str, Any]], problems: Dict[str, str]) -> str:
+    """
+    Build the follow-up request asking only for the missing or invalid sections.
+
+    Args:
+        schema (Dict[str, Dict[str, Any]]): Section specs.
+        problems (Dict[str, str]): Problem of each section to repair.
+
+    Returns:
+        str: Request text.
+    """
+    lines = ["Some sections of your previous answer were missing or did not match the schema:"]
+    lines.extend(f'- "{section}": {problem}' for section, problem in problems.items())
+    lines.append("Respond only with a JSON object containing these keys and nothing else, "
+                 "without repeating the sections that were valid:")
+    lines.extend(f'"{section}": {describe_section(schema[section])}' for section in problems)
+    return "\n".join(lines)
+
+
+def _empty_value(spec: Dict[str, Any]) -> Any:
+    return {'list': [], 'mapping': {}, 'string': ''}[spec['type']]
+
+
+def complete_structured_output(content: Optional[str], schema: Dict[str, Dict[str, Any]],
+                               repair: Optional[RepairCallable] = None,
+                               max_repairs: int = 1) -> Tuple[Optional[Dict[str, Any]], List[str], List[str]]:
+    """
+    Recover, validate and if needed repair a structured answer.
+
+    Args:
+        content (Optional[str]): Answer text.
+        schema (Dict[str, Dict[str, Any]]): Section specs.
+        repair (Optional[RepairCallable]): Sends a repair request; without it nothing is re-requested.
+        max_repairs (int): Maximum number of repair requests.
+
+    Returns:
+        Tuple[Optional[Dict[str, Any]], List[str], List[str]]: The result (None if nothing
+        could be recovered), the sections filled in by repairs, and the sections that are
+        still invalid. Invalid sections are left empty and listed under ``incomplete_sections``.
+    """
+    data = recover_json(content)
+    result, problems = validate_output(data or {}, schema)
+    recovered = data is not None
+    repaired: List[str] = []
+
+    for _ in range(max_repairs if repair else 0):
+        if not problems:
+            break
+        logger.info(f"Requesting repair of sections: {', '.join(problems)}")
+        patch = recover_json(repair(build_repair_request(schema, problems), result))
+        if patch is None:
+            break
+        fixed, problems = validate_output({key: patch[key] for key in problems if key in patch},
+                                          {key: schema[key] for key in problems})
+        result.update(fixed)
+        repaired.extend(fixed)
+        recovered = True
+
+    if not recovered:
+        return None, repaired, list(problems)
+    for section in problems:
+        result[section] = _empty_value(schema[section])
+    if problems:
+        result['incomplete_sections'] = list(problems)
+    return result, repaired, list(problems)
+
+
+def chat_repair(system_prompt: str, prompt: str, model: str, temperature: Optional[float] = None,
+                **client_kwargs) -> RepairCallable:
+    """
+    Utility function to build a repair callable that continues the original conversation.
+
+    The repair call sends the original prompt, the valid sections as the previous
+    answer and the repair request, so the model answers from the same context.
+
+    Args:
+        system_prompt (str): System prompt of the original request.
+        prompt (str): User prompt of the original request.
+        model (str): Model name.
+        temperature (Optional[float]): Sampling temperature of the original request.
+        **client_kwargs: Options forwarded to AsyncLLMClient (api_key, base_url, timeout, ...).
+
+    Returns:
+        RepairCallable: Callable returning the repair answer text, or None if the call failed.
+    """
+    def repair(request: str, partial: Dict[str, Any]) -> Optional[str]:
+        payload = {
+            'model': model,
+            'messages': [
+                {'role': 'system', 'content': system_prompt},
+                {'role': 'user', 'content': prompt},
+                {'role': 'assistant', 'content': json.dumps(partial, ensure_ascii=False)},
+                {'role': 'user', 'content': request},
+            ]
+        }
+        if temperature is not None:
+            payload['temperature'] = temperature
+        try:
+            return response_content(chat_completion(payload, **client_kwargs))
+        except Exception as e:
+            logger.error(f"Repair request failed: {e}")
+            return None
+    return repair
@@ -0,0 +1,152 @@
+"""
+Tokenizer and term counter for review text.
+
+Counts unigrams and n-grams over an iterable of reviews without concatenating
+them into one string. Tokens are counted with collections.Counter and stop
+words are removed from the finished counts, so filtering costs one lookup per
+distinct term rather than one per token.
+"""
+
+import re
+from collections import Counter
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+TOKEN_RE = re.compile(r"\b[a-z]{3,}\b")
+
+STOP_WORDS = frozenset({
+    "the", "and", "but", "for", "with", "about", "are", "was", "were", "this",
+    "that", "these", "those", "its", "has", "have", "had", "not", "you",
+    "your", "they", "them", "their", "there", "then", "than", "from", "into",
+    "out", "all", "any", "can", "could", "would", "should", "will", "just",
+    "very", "really", "also", "one", "get", "got", "what", "when", "which",
+    "who", "how", "our", "his", "her", "she", "him", "been", "being", "more",
+    "most", "some", "such", "only", "other", "after", "before", "over", "too",
+    "did", "does", "doing", "because", "while", "where", "here", "now", "use",
+    "used", "using", "even", "much", "well", "still", "way", "off", "let",
+    "may", "might", "must", "each", "both", "few", "own", "same", "yet", "ive",
+    "dont", "didnt", "doesnt", "isnt", "wasnt", "read", "stars", "star",
+    "reviewed", "united", "states", "product", "products", "item", "amazon"
+})
+
+Ngram = Tuple[str, ...]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase a text and split it into word tokens of three or more letters."""
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+def iter_ngrams(tokens: Sequence[str], n: int) -> Iterator[Ngram]:
+    """Yield consecutive n-grams from a token sequence."""
+    if n == 1:
+        return ((token,) for token in tokens)
+    return zip(*(tokens[i:] for i in range(n)))
+
+
+class TermCounter:
+    """
+    Streaming unigram/n-gram counter over review texts.
+    """
+
+    def __init__(self, max_n: int = 2, stop_words: Optional[Iterable[str]] = None):
+        """
+        Initialize the counter.
+
+        Args:
+            max_n (int): Largest n-gram size to count.
+            stop_words (Iterable[str], optional): Words to ignore. Defaults to STOP_WORDS.
+        """
+        self.max_n = max_n
+        self.stop_words = STOP_WORDS if stop_words is None else frozenset(stop_words)
+        self.documents = 0
+        self._counts: Dict[int, Counter] = {n: Counter() for n in range(1, max_n + 1)}
+
+    def update(self, text: str) -> None:
+        """Count the terms of one text."""
+        tokens = tokenize(text)
+        if not tokens:
+            return
+        self.documents += 1
+        self._counts[1].update(tokens)
+        for n in range(2, self.max_n + 1):
+            self._counts[n].update(iter_ngrams(tokens, n))
+
+    def update_many(self, texts: Iterable[str], chunk_size: int = 1024) -> "TermCounter":
+        """
+        Count the terms of every text in an iterable.
+
+        Texts are tokenized in chunks and each chunk is fed to the counters in a
+        single Counter.update call, which keeps the per-review overhead low
+        without holding the whole corpus in memory.
+
+        Args:
+            texts (Iterable[str]): Review texts or titles.
+            chunk_size (int): Number of texts tokenized per batch.
+
+        Returns:
+            TermCounter: The counter itself, for chaining.
+        """
+        iterator = iter(texts)
+        while True:
+            batch = list(islice(iterator, chunk_size))
+            if not batch:
+                return self
+            chunk = [tokens for tokens in map(tokenize, batch) if tokens]
+            self.documents += len(chunk)
+            self._counts[1].update(chain.from_iterable(chunk))
+            for n in range(2, self.max_n + 1):
+                self._counts[n].update(chain.from_iterable(iter_ngrams(tokens, n) for tokens in chunk))
+
+    def most_common(self, limit: int = 5, n: int = 1, min_count: int = 1) -> List[Tuple[str, int]]:
+        """
+        Return the most frequent terms, excluding stop words.
+
+        Args:
+            limit (int): Maximum number of terms to return.
+            n (int): N-gram size.
+            min_count (int): Minimum number of occurrences.
+
+        Returns:
+            List[Tuple[str, int]]: (term, count) pairs, most frequent first. N-grams
+            are joined with spaces.
+        """
+        stop_words = self.stop_words
+        # Pull candidates in growing batches so stop words are filtered lazily
+        # instead of sorting the full vocabulary
+        batch = limit * 4
+        counts = self._counts[n]
+        while True:
+            candidates = counts.most_common(batch)
+            results: List[Tuple[str, int]] = []
+            for key, count in candidates:
+                if count < min_count:
+                    break
+                words = (key,) if n == 1 else key
+                if any(word in stop_words for word in words):
+                    continue
+                results.append((' '.join(words), count))
+                if len(results) == limit:
+                    return results
+            if len(candidates) < batch or (candidates and candidates[-1][1] < min_count):
+                return results
+            batch *= 4
+
+
+def top_terms(texts: Iterable[str], limit: int = 5, n: int = 1, min_count: int = 1,
+              stop_words: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Utility function to get the most common terms across texts.
+
+    Args:
+        texts (Iterable[str]): Review texts or titles.
+        limit (int): Maximum number of terms to return.
+        n (int): N-gram size.
+        min_count (int): Minimum number of occurrences.
+        stop_words (Iterable[str], optional): Words to ignore. Defaults to STOP_WORDS.
+
+    Returns:
+        List[str]: Most common terms, most frequent first.
+    """
+    counter = TermCounter(max_n=n, stop_words=stop_words).update_many(texts)
+    return [term for term, _ in counter.most_common(limit, n=n, min_count=min_count)]
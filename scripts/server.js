@@ -13,6 +13,10 @@ const { spawn } = require('child_process');
 // Port to run the server on
 const PORT = 8000;
 
+// SQLite store every analysis is written to, queried by the /api/products endpoints
+const PRODUCT_DB = path.join(__dirname, '..', '.cache', 'products.sqlite3');
+const PRODUCT_STORE_SCRIPT = path.join(__dirname, 'python', 'product_store.py');
+
 // MIME types for different file extensions
 const MIME_TYPES = {
   '.html': 'text/html',
@@ -35,7 +39,7 @@ const MIME_TYPES = {
  */
 function runPythonScript(productUrl, outputFile) {
   return new Promise((resolve, reject) => {
-    const command = `python main.py "${productUrl}" -o ${outputFile}`;
+    const command = `python main.py "${productUrl}" -o ${outputFile} --db "${PRODUCT_DB}"`;
     console.log(`Executing: ${command}`);
     
     exec(command, (error, stdout, stderr) => {
@@ -118,13 +122,82 @@ function parseRequestBody(req) {
   });
 }
 
+/**
+ * Runs a Python script that reads a JSON job from stdin and writes JSON to stdout
+ * @param {string} scriptPath - Path of the Python script
+ * @param {string[]} args - Extra command line arguments
+ * @param {Object} input - The job, sent to the script's stdin as JSON
+ * @returns {Promise<Object>} - Exit code, stdout and stderr of the script
+ */
+function runPythonJson(scriptPath, args, input) {
+  return new Promise((resolve, reject) => {
+    const python = process.platform === 'win32' ? 'python' : 'python3';
+    const child = spawn(python, [scriptPath, ...args]);
+    let stdout = '';
+    let stderr = '';
+    
+    child.stdout.on('data', chunk => { stdout += chunk.toString(); });
+    child.stderr.on('data', chunk => { stderr += chunk.toString(); });
+    child.on('error', reject);
+    child.on('close', code => resolve({ code, stdout, stderr }));
+    
+    child.stdin.end(JSON.stringify(input));
+  });
+}
+
+/**
+ * Parses the last non-empty line of a script's stdout as JSON
+ * @param {string} stdout - The script output
+ * @returns {Object} - The parsed JSON
+ */
+function parseLastJsonLine(stdout) {
+  const lines = stdout.split('\n').filter(line => line.trim() !== '');
+  if (lines.length === 0) {
+    throw new Error('No output from script');
+  }
+  return JSON.parse(lines[lines.length - 1]);
+}
+
+/**
+ * Answers a /api/products request from the product store; the route and its
+ * query parameters are checked by product_store.py
+ * @param {string} pathname - Request path, /api/products[/ASIN[/reviews|/prices]]
+ * @param {Object} query - Parsed query string
+ * @returns {Promise<Object>} - HTTP status and the JSON body
+ */
+async function queryProductStore(pathname, query) {
+  const { stdout, stderr } = await runPythonJson(PRODUCT_STORE_SCRIPT, ['--db', PRODUCT_DB, 'api'],
+                                                 { path: pathname, query });
+  if (stderr && stderr.trim() !== '') {
+    console.log('Product store log:', stderr);
+  }
+  return parseLastJsonLine(stdout);
+}
+
 /**
  * Runs the DeepSeek AI analysis script
+ * @param {Object} [productData] - Product data to analyze in memory; without it the
+ *   script falls back to the shared review.json/response.json files
  * @returns {Promise<Object>} The analysis results
  */
-function runDeepSeekAnalysis() {
+function runDeepSeekAnalysis(productData) {
+  const scriptPath = path.join(__dirname, 'python', 'deepseek_api.py');
+  
+  if (productData) {
+    console.log(`Running DeepSeek Analysis script on request data: ${scriptPath}`);
+    return runPythonJson(scriptPath, ['--stdin'], productData).then(({ code, stdout, stderr }) => {
+      if (stderr && stderr.trim() !== '') {
+        console.warn(`DeepSeek Analysis log: ${stderr}`);
+      }
+      try {
+        return parseLastJsonLine(stdout);
+      } catch (parseErr) {
+        throw new Error(`Failed to run DeepSeek analysis (exit code ${code}): ${parseErr.message}`);
+      }
+    });
+  }
+  
   return new Promise((resolve, reject) => {
-    const scriptPath = path.join(__dirname, 'python', 'deepseek_api.py');
     const responsePath = path.join(__dirname, '..', 'response.json');
     
     console.log(`Running DeepSeek Analysis script: ${scriptPath}`);
@@ -178,6 +251,64 @@ function runDeepSeekAnalysis() {
   });
 }
 
+/**
+ * Runs the DeepSeek analysis script in streaming mode and forwards each
+ * completed insight to the client as NDJSON while the answer is generated
+ * @param {http.ServerResponse} res - The HTTP response to stream into
+ * @param {Object} [productData] - Product data to analyze in memory instead of review.json
+ */
+function streamDeepSeekAnalysis(res, productData) {
+  const scriptPath = path.join(__dirname, 'python', 'deepseek_api.py');
+  const python = process.platform === 'win32' ? 'python' : 'python3';
+  
+  console.log(`Streaming DeepSeek Analysis script: ${scriptPath}`);
+  res.writeHead(200, {
+    'Content-Type': 'application/x-ndjson',
+    'Cache-Control': 'no-cache'
+  });
+  
+  const child = spawn(python, productData ? [scriptPath, '--stream', '--stdin'] : [scriptPath, '--stream']);
+  if (productData) {
+    child.stdin.end(JSON.stringify(productData));
+  }
+  let pending = '';
+  let finished = false;
+  
+  child.stdout.on('data', chunk => {
+    pending += chunk.toString();
+    const lines = pending.split('\n');
+    pending = lines.pop();
+    lines.forEach(line => {
+      // Only forward event lines; other output is script logging
+      try {
+        const event = JSON.parse(line);
+        if (event && event.type) {
+          finished = finished || event.type === 'done' || event.type === 'error';
+          res.write(JSON.stringify(event) + '\n');
+        }
+      } catch (parseErr) {
+        if (line.trim()) console.log(`DeepSeek Analysis stdout: ${line}`);
+      }
+    });
+  });
+  
+  child.stderr.on('data', chunk => {
+    console.warn(`DeepSeek Analysis warnings: ${chunk}`);
+  });
+  
+  child.on('close', code => {
+    if (!finished) {
+      res.write(JSON.stringify({ type: 'error', error: `DeepSeek analysis exited with code ${code}` }) + '\n');
+    }
+    res.end();
+  });
+  
+  // Stop generating (and paying for) tokens nobody will read
+  res.on('close', () => {
+    if (child.exitCode === null) child.kill();
+  });
+}
+
 // Create the HTTP server
 const server = http.createServer(async (req, res) => {
   const parsedUrl = url.parse(req.url);
@@ -232,8 +363,9 @@ const server = http.createServer(async (req, res) => {
   
   // Handle the run-deepseek-analysis endpoint to run the DeepSeek script
   if (pathname === '/run-deepseek-analysis' && req.method === 'POST') {
-    // Handle DeepSeek analysis request
-    runDeepSeekAnalysis()
+    // Handle DeepSeek analysis request; the product data may come in the request body
+    const body = await parseRequestBody(req).catch(() => ({}));
+    runDeepSeekAnalysis(body.product)
       .then(result => {
         res.writeHead(200, { 'Content-Type': 'application/json' });
         res.end(JSON.stringify(result));
@@ -246,35 +378,31 @@ const server = http.createServer(async (req, res) => {
     return;
   }
   
+  // Handle the streaming variant of the DeepSeek endpoint
+  if (pathname === '/run-deepseek-analysis-stream' && req.method === 'POST') {
+    const body = await parseRequestBody(req).catch(() => ({}));
+    streamDeepSeekAnalysis(res, body.product);
+    return;
+  }
+  
   // Handle the new comparison endpoint
   if (pathname === '/run-comparison-analysis' && req.method === 'POST') {
     try {
       const body = await parseRequestBody(req);
       console.log('Received request for comparison analysis');
       
-      if (!body.product_A || !body.product_B) {
+      // Either a product_A/product_B pair or a `products` list of two or more for an N-way comparison
+      const isMultiProduct = Array.isArray(body.products);
+      if (isMultiProduct ? body.products.length < 2 : (!body.product_A || !body.product_B)) {
         res.statusCode = 400;
         res.setHeader('Content-Type', 'application/json');
         res.end(JSON.stringify({
           success: false,
-          error: 'Both products are required for comparison'
+          error: isMultiProduct ? 'At least two products are required for comparison' : 'Both products are required for comparison'
         }));
         return;
       }
       
-      // Create a temporary file to store the comparison prompt data
-      const comparisonDataPath = path.join(__dirname, 'comparison_data.json');
-      fs.writeFileSync(comparisonDataPath, JSON.stringify(body, null, 2));
-      console.log('Saved comparison data to comparison_data.json');
-
-      // Generate the comparison prompt
-      const comparisonPrompt = generateComparisonPrompt(body.product_A, body.product_B);
-      
-      // Save the prompt to a file for debugging
-      const promptPath = path.join(__dirname, 'comparison_prompt.txt');
-      fs.writeFileSync(promptPath, comparisonPrompt);
-      console.log('Saved comparison prompt to comparison_prompt.txt');
-
       // Check if the comparison_analyzer.py exists, if not create it
       const scriptPath = path.join(__dirname, 'python', 'comparison_analyzer.py');
       if (!fs.existsSync(scriptPath)) {
@@ -282,88 +410,49 @@ const server = http.createServer(async (req, res) => {
         ensureComparisonAnalyzerScript();
       }
       
-      console.log('Running comparison analysis with DeepSeek API');
-      const python = process.platform === 'win32' ? 'python' : 'python3';
+      // Products travel over stdin and the result over stdout, so concurrent
+      // comparisons never share files. Python builds every prompt, fitting the
+      // reviews of each product into its token budget.
+      const job = isMultiProduct
+        ? { products: body.products }
+        : { product_A: body.product_A, product_B: body.product_B };
       
-      // Run the comparison script directly (synchronously for simplicity)
-      const { error, status, stdout, stderr } = require('child_process').spawnSync(
-        python, 
-        [scriptPath], 
-        { encoding: 'utf8' }
-      );
+      console.log('Running comparison analysis with DeepSeek API');
+      const { code, stdout, stderr } = await runPythonJson(scriptPath, ['--stdin'], job);
+      if (stderr && stderr.trim() !== '') {
+        console.log('Comparison analysis log:', stderr);
+      }
       
-      if (error) {
-        console.error('Error running comparison script:', error);
+      let resultData;
+      try {
+        resultData = parseLastJsonLine(stdout);
+      } catch (parseError) {
+        console.error('Error parsing comparison result:', parseError);
         res.statusCode = 500;
         res.setHeader('Content-Type', 'application/json');
         res.end(JSON.stringify({
           success: false,
-          error: 'Failed to run comparison analysis script: ' + error.message
+          error: 'Failed to parse comparison result: ' + parseError.message
         }));
         return;
       }
       
-      if (status !== 0) {
-        console.error('Comparison script returned non-zero status:', status);
-        console.error('stderr:', stderr);
-        console.error('stdout:', stdout);
+      if (code !== 0) {
+        console.error('Comparison script returned non-zero status:', code);
         res.statusCode = 500;
         res.setHeader('Content-Type', 'application/json');
         res.end(JSON.stringify({
           success: false,
-          error: 'Comparison analysis script failed with status ' + status
+          error: resultData.error || 'Comparison analysis script failed with status ' + code
         }));
         return;
       }
       
       console.log('Comparison analysis completed successfully');
-      console.log('stdout:', stdout);
-      
-      // Try to read the result file
-      const resultPath = path.join(__dirname, 'comparison_result.json');
-      if (fs.existsSync(resultPath)) {
-        try {
-          console.log('Reading comparison_result.json');
-          const resultData = JSON.parse(fs.readFileSync(resultPath, 'utf8'));
-          res.statusCode = 200;
-          res.setHeader('Content-Type', 'application/json');
-          res.end(JSON.stringify(resultData));
-          return;
-        } catch (parseError) {
-          console.error('Error parsing comparison result:', parseError);
-          res.statusCode = 500;
-          res.setHeader('Content-Type', 'application/json');
-          res.end(JSON.stringify({
-            success: false,
-            error: 'Failed to parse comparison result: ' + parseError.message
-          }));
-          return;
-        }
-      } else {
-        // Try to parse the output directly
-        try {
-          console.log('Trying to parse stdout as JSON');
-          const jsonMatch = stdout.match(/\{[\s\S]*\}/);
-          if (jsonMatch) {
-            const analysisData = JSON.parse(jsonMatch[0]);
-            res.statusCode = 200;
-            res.setHeader('Content-Type', 'application/json');
-            res.end(JSON.stringify(analysisData));
-            return;
-          }
-        } catch (parseError) {
-          console.error('Error parsing stdout as JSON:', parseError);
-        }
-        
-        console.error('No comparison_result.json file found and could not parse stdout');
-        res.statusCode = 500;
-        res.setHeader('Content-Type', 'application/json');
-        res.end(JSON.stringify({
-          success: false,
-          error: 'No comparison result generated'
-        }));
-        return;
-      }
+      res.statusCode = 200;
+      res.setHeader('Content-Type', 'application/json');
+      res.end(JSON.stringify(resultData));
+      return;
     } catch (error) {
       console.error('Error in comparison analysis endpoint:', error);
       res.statusCode = 500;
@@ -376,6 +465,22 @@ const server = http.createServer(async (req, res) => {
     return;
   }
   
+  // Handle product store queries: /api/products, /api/products/ASIN,
+  // /api/products/ASIN/reviews?min_rating=4&since=2025-01-01 and /api/products/ASIN/prices
+  if ((pathname === '/api/products' || pathname.startsWith('/api/products/')) && req.method === 'GET') {
+    res.setHeader('Content-Type', 'application/json');
+    try {
+      const { status, body } = await queryProductStore(pathname, querystring.parse(parsedUrl.query || ''));
+      res.statusCode = status;
+      res.end(JSON.stringify(body));
+    } catch (error) {
+      console.error('Error querying the product store:', error);
+      res.statusCode = 500;
+      res.end(JSON.stringify({ error: 'Product store query failed: ' + error.message }));
+    }
+    return;
+  }
+  
   // Handle static file requests
   // Get the path from the URL
   let filePath = path.join(__dirname, '..', parsedUrl.pathname);
@@ -450,102 +555,6 @@ Press Ctrl+C to stop the server
   `);
 });
 
-/**
- * Generates the comparison prompt for DeepSeek
- * @param {Object} productA - Product A data
- * @param {Object} productB - Product B data
- * @returns {string} The formatted prompt
- */
-function generateComparisonPrompt(productA, productB) {
-  const productATitle = productA.product_details?.description || 'Product A';
-  const productBTitle = productB.product_details?.description || 'Product B';
-  
-  // Format product A reviews
-  const productAReviews = formatReviewsForPrompt(productA.review_data?.reviews || []);
-  
-  // Format product B reviews
-  const productBReviews = formatReviewsForPrompt(productB.review_data?.reviews || []);
-  
-  // Create the prompt
-  return `You are an intelligent assistant comparing two similar Amazon products based on customer feedback and product data. Your goal is to extract clear, actionable differences that help a seller:
-
-    Position their product better
-    Understand competitive weaknesses
-    Identify features to emphasize, improve, or de-emphasize
-
-PRODUCT A: ${productATitle}
-Price: ${productA.product_details?.price || 'N/A'}
-Average Rating: ${productA.review_data?.analysis?.average_rating || 'N/A'}
-Specifications: ${JSON.stringify(productA.product_details?.specifications || {})}
-
-PRODUCT A REVIEWS:
-${productAReviews}
-
-PRODUCT B: ${productBTitle}
-Price: ${productB.product_details?.price || 'N/A'}
-Average Rating: ${productB.review_data?.analysis?.average_rating || 'N/A'}
-Specifications: ${JSON.stringify(productB.product_details?.specifications || {})}
-
-PRODUCT B REVIEWS:
-${productBReviews}
-
-Output a structured JSON with the following schema
-{
-  "product_advantages": [
-    {
-      "feature": "string (e.g., 'Battery Life')",
-      "better_product": "A or B",
-      "summary": "string (why this product wins here)",
-      "quote": "string (optional review quote that supports it)"
-    }
-  ],
-  "critical_weaknesses": [
-    {
-      "feature": "string (e.g., 'Build Quality')",
-      "worse_product": "A or B",
-      "issue": "string (what customers complained about)",
-      "severity": "low | medium | high"
-    }
-  ],
-  "shared_strengths": [
-    "string", "string", "string"
-  ],
-  "unique_selling_points": {
-    "product_A": [
-      "string (selling point unique to A)"
-    ],
-    "product_B": [
-      "string (selling point unique to B)"
-    ]
-  },
-  "buyer_recommendation": "string (short recommendation on which buyer would prefer A vs B, with reasoning)"
-}
-
-Focus on what matters to buyers, not spec-sheet trivia.
-Use review-backed insights, not assumptions.
-Be blunt but fair. If one product clearly wins on something, say it.
-If a product is better for a certain audience or use case, highlight that in the buyer_recommendation`;
-}
-
-/**
- * Formats reviews for the comparison prompt
- * @param {Array} reviews - The reviews array
- * @returns {string} Formatted reviews text
- */
-function formatReviewsForPrompt(reviews) {
-  if (!reviews || reviews.length === 0) {
-    return 'No reviews available.';
-  }
-  
-  // Limit to 5 reviews to keep prompt size reasonable
-  const limitedReviews = reviews.slice(0, 5);
-  
-  return limitedReviews.map(review => {
-    return `Review by ${review.reviewer_name || 'Anonymous'} (${review.rating} stars):
-${review.text?.substring(0, 300) || 'No text'} ${review.text?.length > 300 ? '...' : ''}`;
-  }).join('\n\n');
-}
-
 /**
  * Parses DeepSeek output to extract JSON
  * @param {string} output - Raw output from DeepSeek
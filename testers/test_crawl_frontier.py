@@ -0,0 +1,88 @@
+import logging
+import tempfile
+from pathlib import Path
+
+import main
+from scripts.python.crawl_frontier import BloomFilter, CrawlFrontier
+from scripts.python.crawl_journal import CrawlJournal
+
+
+def asin(n):
+    return f"B{n:09d}"
+
+
+# Each product lists the next three as similar, with the best rated first-crawled
+GRAPH = {asin(n): [{"asin": asin(m), "rating": 4.0 + (m % 3) / 10, "review_count": 100 * m}
+                   for m in range(n + 1, n + 4)] + [{"asin": asin(0)}, {"title": "no asin"}]
+         for n in range(50)}
+
+
+def test_bloom_filter():
+    """
+    Test that the Bloom filter has no false negatives and stays near its error rate.
+    """
+    bloom = BloomFilter(capacity=20000, error_rate=0.01)
+    items = [asin(n) for n in range(20000)]
+    # A new item can collide with earlier ones, so a few adds report "already present"
+    assert sum(bloom.add(item) for item in items) > 20000 * 0.98
+    assert all(item in bloom for item in items)
+    assert not bloom.add(items[0])
+    false_positives = sum(asin(n) in bloom for n in range(20000, 40000))
+    assert false_positives < 20000 * 0.02
+    # About 1.2 bytes per ID at 1%
+    assert bloom.memory_bytes < 20000 * 2
+
+def test_crawl_frontier():
+    """
+    Test frontier ordering, bounded expansion, and a crawl that never processes a product twice.
+    """
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    logger = logging.getLogger(__name__)
+
+    frontier = CrawlFrontier([f"https://www.amazon.com/dp/{asin(0)}?th=1", asin(0), "not a product"],
+                             max_depth=2, max_breadth=2)
+    assert len(frontier) == 1
+    seed = frontier.pop()
+    assert seed.asin == asin(0) and seed.depth == 0
+    # Only the two best scored neighbours are queued; the seed itself is not queued again
+    assert frontier.expand(seed, GRAPH[asin(0)]) == 2
+    # 4.0 stars from 300 reviews outranks 4.2 stars from 200
+    first = frontier.pop()
+    assert first.asin == asin(3) and first.depth == 1
+    assert frontier.pop().asin == asin(2)
+
+    processed = []
+
+    def fake_process_product(url, journal=None, **options):
+        product = url.rsplit("/", 1)[-1]
+        processed.append(product)
+        return {"url": url, "similar_products": GRAPH[product]}
+
+    original = main.process_product
+    main.process_product = fake_process_product
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with CrawlJournal(str(Path(temp_dir) / "crawl.jsonl")) as journal:
+                frontier = CrawlFrontier([asin(0), asin(1)], max_depth=2, max_breadth=3)
+                results = main.process_crawl(frontier, journal)
+    finally:
+        main.process_product = original
+
+    logger.info(f"Crawled {processed}")
+    assert len(processed) == len(set(processed)) == len(results)
+    # Seeds first, then breadth-first by depth; nothing past depth 2
+    assert processed[:2] == [asin(0), asin(1)]
+    # Depth 1 adds 2, 3 and 4; depth 2 adds 5, 6 and 7
+    assert set(processed) == {asin(n) for n in range(8)}
+
+    limited = CrawlFrontier([asin(n) for n in range(10)], max_products=3)
+    assert [limited.pop() is not None for _ in range(4)] == [True, True, True, False]
+
+if __name__ == "__main__":
+    test_bloom_filter()
+    test_crawl_frontier()
@@ -0,0 +1,117 @@
+import logging
+import tempfile
+from pathlib import Path
+
+import main
+from scripts.python.crawl_journal import PRODUCT_STAGE, CrawlJournal
+
+URL = "https://www.amazon.com/dp/B0ABCDEF12"
+
+
+def page_reviews(page):
+    return [{"rating": 4.0, "reviewer": f"Buyer {page}-{i}", "title": f"Page {page}",
+             "text": f"Review {i} on page {page}"} for i in range(2)]
+
+
+def test_crawl_journal():
+    """
+    Test journal replay, a torn last line, and a crawl resumed after a crash mid-pagination.
+    """
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    logger = logging.getLogger(__name__)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "crawl.jsonl"
+        with CrawlJournal(str(path)) as journal:
+            journal.record_stage("B0ABCDEF12", "product_details", {"price": "$10"})
+            journal.record_page("B0ABCDEF12", 1, page_reviews(1))
+            journal.record_page("B0ABCDEF12", 3, page_reviews(3))
+        # A crash in the middle of a write leaves a torn line behind
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"type": "stage", "asin": "B0ABCD')
+
+        with CrawlJournal(str(path)) as journal:
+            assert journal.is_done("B0ABCDEF12", "product_details")
+            assert journal.load_output("B0ABCDEF12", "product_details") == {"price": "$10"}
+            assert not journal.is_done("B0ABCDEF12", "reviews")
+            # Page 2 is missing, so the fetch resumes there
+            next_page, reviews = journal.resume_reviews("B0ABCDEF12")
+            assert next_page == 2 and reviews == page_reviews(1)
+            # The first record after the crash is not merged into the torn line
+            journal.record_stage("B0OTHER123", "product_details", {"price": "$5"})
+
+        with CrawlJournal(str(path)) as journal:
+            assert journal.is_done("B0OTHER123", "product_details")
+            assert journal.is_done("B0ABCDEF12", "product_details")
+        assert path.read_text(encoding='utf-8').endswith('\n')
+
+    calls = []
+
+    def fake_details(url):
+        calls.append("details")
+        return {"description": "Test Product", "price": "$10.00"}
+
+    def fake_reviews(url, max_pages=3, start_page=1, on_page=None, previous_reviews=None):
+        calls.append(("reviews", start_page))
+        reviews = list(previous_reviews or [])
+        for page in range(start_page, max_pages + 1):
+            if page == 3 and len(calls) < 3:
+                raise RuntimeError("CAPTCHA")
+            on_page(page, page_reviews(page))
+            reviews.extend(page_reviews(page))
+        return {"reviews": reviews, "analysis": {"total_reviews": len(reviews)}}
+
+    def fake_summary(reviews, api_key=None):
+        calls.append("summary")
+        return {"summary": f"{len(reviews)} reviews"}
+
+    originals = (main.extract_product_details, main.extract_and_analyze_reviews, main.generate_ai_summary)
+    main.extract_product_details = fake_details
+    main.extract_and_analyze_reviews = fake_reviews
+    main.generate_ai_summary = fake_summary
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = str(Path(temp_dir) / "crawl.jsonl")
+            with CrawlJournal(path) as journal:
+                first = main.process_batch([URL], journal, max_review_pages=4, skip_similar=True)
+                assert first[0]["review_data"] == {}
+                assert not journal.is_done("B0ABCDEF12", PRODUCT_STAGE)
+                # The interrupted product keeps the journal around for a restart
+                assert journal.unfinished() == {"B0ABCDEF12"}
+
+            # Restart: details are reused and the reviews resume at page 3
+            with CrawlJournal(path) as journal:
+                second = main.process_batch([URL], journal, max_review_pages=4, skip_similar=True)
+                assert journal.is_done("B0ABCDEF12", PRODUCT_STAGE)
+                assert journal.unfinished() == set()
+            logger.info(f"Stage calls: {calls}")
+            assert calls.count("details") == 1
+            assert ("reviews", 3) in calls
+            assert len(second[0]["review_data"]["reviews"]) == 8
+            assert second[0]["ai_summary"] == {"summary": "8 reviews"}
+
+            # A third run finds the product complete and does no work at all
+            calls.clear()
+            with CrawlJournal(path) as journal:
+                third = main.process_batch([URL], journal, max_review_pages=4, skip_similar=True)
+            assert calls == [] and third == second
+
+            # A finished crawl's journal is removed, so the next crawl fetches everything again
+            journal = CrawlJournal(path)
+            journal.remove()
+            assert not Path(path).exists() and not journal.output_dir.exists()
+            calls.clear()
+            with CrawlJournal(path) as journal:
+                assert not journal.is_done("B0ABCDEF12", PRODUCT_STAGE)
+            main.process_batch([URL], max_review_pages=4, skip_similar=True)
+            assert calls[:2] == ["details", ("reviews", 1)]
+    finally:
+        main.extract_product_details, main.extract_and_analyze_reviews, main.generate_ai_summary = originals
+
+if __name__ == "__main__":
+    test_crawl_journal()
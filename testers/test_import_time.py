@@ -0,0 +1,54 @@
+import logging
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+# Entry points spawned per request by server.js or run from the command line
+ENTRY_POINTS = ["main", "scripts.python.deepseek_api", "scripts.python.comparison_analyzer"]
+# Generous cold-start budget per entry point; the eager imports used to cost 200-650 ms
+IMPORT_BUDGET_MS = 300
+# Heavy dependencies that must only load when a scrape or API call actually happens
+LAZY_MODULES = ["openai", "httpx", "bs4", "requests", "dotenv"]
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def import_time_ms(module):
+    """Return the cumulative import time of a module in a fresh interpreter, from `-X importtime`."""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               cwd=REPO_ROOT, capture_output=True, text=True, timeout=60)
+    assert completed.returncode == 0, completed.stderr
+    for line in completed.stderr.splitlines():
+        match = re.match(r"import time:\s*\d+\s*\|\s*(\d+)\s*\|\s*(\S+)$", line)
+        if match and match.group(2) == module:
+            return int(match.group(1)) / 1000
+    raise AssertionError(f"No import time reported for {module}")
+
+
+def test_import_time():
+    """
+    Test that CLI entry points import within the start-up budget and defer heavy dependencies.
+    """
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    logger = logging.getLogger(__name__)
+
+    for module in ENTRY_POINTS:
+        elapsed = import_time_ms(module)
+        logger.info(f"import {module}: {elapsed:.1f} ms")
+        assert elapsed < IMPORT_BUDGET_MS, f"import {module} took {elapsed:.1f} ms"
+
+    check = ("import sys\n" + "".join(f"import {module}\n" for module in ENTRY_POINTS) +
+             f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))")
+    completed = subprocess.run([sys.executable, "-c", check], cwd=REPO_ROOT,
+                               capture_output=True, text=True, timeout=60)
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip() == "", f"Imported eagerly: {completed.stdout.strip()}"
+
+if __name__ == "__main__":
+    test_import_time()
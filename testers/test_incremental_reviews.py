@@ -0,0 +1,116 @@
+import logging
+import re
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import main
+from scripts.python import review_analyzer
+from scripts.python.product_store import ProductStore
+from scripts.python.refresh_scheduler import changed_fields, product_snapshot
+from scripts.python.review_analyzer import ReviewAnalyzer
+from scripts.python.scraper import AmazonScraper
+
+URL = "https://www.amazon.com/dp/B0ABCDEF12"
+REVIEWS_PER_PAGE = 10
+MAX_PAGES = 50
+
+
+def make_review(n):
+    return {"reviewer_name": f"Buyer {n}", "title": f"Review {n}", "rating": float(1 + n % 5),
+            "date": f"Reviewed in the United States on May {1 + n % 28}, 2025",
+            "text": f"Review number {n}, still working after {n} days.", "verified_purchase": True,
+            "helpful_votes": 0}
+
+
+def test_incremental_reviews():
+    """
+    Test that daily incremental refreshes fetch only the pages with new reviews and return just those.
+    """
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    logger = logging.getLogger(__name__)
+    # Review pages sorted by most recent, as requested with sortBy=recent
+    catalog = [make_review(n) for n in reversed(range(400))]
+    fetched = []
+
+    def fetch_page(self, url):
+        match = re.search(r"pageNumber=(\d+)", url)
+        if not match:
+            return None
+        fetched.append(url)
+        page = int(match.group(1))
+        next_link = "<ul><li class='a-last'><a href='#'>Next</a></li></ul>" if page * REVIEWS_PER_PAGE < len(catalog) else ""
+        return f"<p>{page}</p>{next_link}"
+
+    def parse_review_page(self, html_content):
+        page = int(re.search(r"<p>(\d+)</p>", html_content).group(1))
+        return [dict(review) for review in catalog[(page - 1) * REVIEWS_PER_PAGE:page * REVIEWS_PER_PAGE]]
+
+    originals = (AmazonScraper.fetch_page, ReviewAnalyzer._parse_review_page, review_analyzer.time,
+                 main.extract_product_details, main.generate_ai_summary)
+    AmazonScraper.fetch_page = fetch_page
+    ReviewAnalyzer._parse_review_page = parse_review_page
+    review_analyzer.time = SimpleNamespace(sleep=lambda seconds: None, perf_counter=time.perf_counter)
+    main.extract_product_details = lambda url: {"description": "Test Product", "specifications": {}, "price": "$10.00"}
+    main.generate_ai_summary = lambda reviews, api_key=None: {"summary": f"{len(reviews)} reviews"}
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = ProductStore(str(Path(temp_dir) / "products.sqlite3"))
+            options = dict(max_review_pages=MAX_PAGES, skip_similar=True, store=store)
+
+            # The first crawl fetches every page
+            first = main.process_product(URL, incremental=True, **options)
+            full_fetches = len(fetched)
+            assert full_fetches == 40
+            assert first["review_data"]["incremental"] == {"known_reviews": 0, "new_reviews": 400}
+            previous = product_snapshot(first)
+
+            # A week of daily refreshes with a few new reviews a day
+            next_review = 400
+            incremental_fetches = 0
+            for day, new_count in enumerate([3, 12, 0, 5, 1, 0, 8]):
+                new_reviews = [make_review(n) for n in range(next_review, next_review + new_count)]
+                next_review += new_count
+                catalog[:0] = list(reversed(new_reviews))
+
+                fetched.clear()
+                result = main.process_product(URL, incremental=True, **options)
+                incremental_fetches += len(fetched)
+                returned = {review["title"] for review in result["review_data"]["reviews"]}
+                assert returned == {review["title"] for review in new_reviews}, day
+                assert result["review_data"]["analysis"]["total_reviews"] == new_count
+                # Pages with new reviews, then the first page of known ones
+                assert len(fetched) == -(-new_count // REVIEWS_PER_PAGE) + 1
+
+                snapshot = product_snapshot(result)
+                assert "rating" not in snapshot and snapshot["review_count"] == next_review
+                assert changed_fields(previous, snapshot) == (["review_count"] if new_count else [])
+                previous = snapshot
+
+            product = store.product("B0ABCDEF12")
+            assert product["review_count"] == next_review == len(store.known_fingerprints("B0ABCDEF12"))
+            # The stored analysis covers every review, not just the last refresh's new ones,
+            # and keeps the summary of the last full crawl
+            latest = store.latest_analysis("B0ABCDEF12")
+            analysis = latest["review_analysis"]
+            assert analysis["total_reviews"] == sum(analysis["rating_counts"].values()) == product["review_count"]
+            assert analysis["average_rating"] == product["rating"]
+            assert latest["ai_summary"] == {"summary": "400 reviews"}
+            assert store.load_result("B0ABCDEF12")["review_data"]["analysis"] == analysis
+            store.close()
+    finally:
+        (AmazonScraper.fetch_page, ReviewAnalyzer._parse_review_page, review_analyzer.time,
+         main.extract_product_details, main.generate_ai_summary) = originals
+
+    saved = 1 - incremental_fetches / (7 * full_fetches)
+    logger.info(f"Incremental refreshes fetched {incremental_fetches} review pages instead of {7 * full_fetches} ({saved:.0%} fewer)")
+    assert saved > 0.9
+
+if __name__ == "__main__":
+    test_incremental_reviews()
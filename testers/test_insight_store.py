@@ -0,0 +1,100 @@
+import json
+import logging
+import tempfile
+from pathlib import Path
+
+import scripts.python.deepseek_api as deepseek_api
+from scripts.python.insight_store import InsightStore, extract_asin, split_new_reviews
+from scripts.python.review_dedupe import review_fingerprint
+
+
+def make_reviews(start, count):
+    return [{"rating": 5.0, "reviewer": f"Buyer {i}", "date": "2024-05-01", "title": f"Review {i}",
+             "text": f"Review number {i}, the battery lasts all week."} for i in range(start, start + count)]
+
+
+def test_insight_store():
+    """
+    Test the per-ASIN insight store and an incremental refresh that only sends new reviews.
+    """
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    logger = logging.getLogger(__name__)
+
+    assert extract_asin("https://www.amazon.com/Some-Product/dp/B0ABCDEF12?th=1") == "B0ABCDEF12"
+    assert extract_asin("https://www.amazon.com/product-reviews/B0ABCDEF12/") == "B0ABCDEF12"
+    assert extract_asin("https://example.com/item") is None
+
+    reviews = make_reviews(0, 3)
+    known = [review_fingerprint(review) for review in reviews[:2]]
+    assert split_new_reviews(reviews, known) == reviews[2:]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = InsightStore(str(Path(temp_dir) / "insights.sqlite3"))
+        assert store.get("B0ABCDEF12") is None
+
+        calls = []
+        failed_batches = []
+
+        def fake_analyze_all_reviews(data, batch_token_budget=None, use_cache=True):
+            calls.append(("full", len(data["review_data"]["reviews"])))
+            analysis = {"top_strengths": [{"feature": "Battery", "listing_advice": "Lead with it"}],
+                        "buyer_personas": [], "negative_trends": [], "undocumented_features": [],
+                        "standout_quotes": []}
+            if failed_batches:
+                analysis["unanalyzed_reviews"] = failed_batches.pop()
+            return json.dumps(analysis)
+
+        def fake_get_deepseek_analysis(prompt, use_cache=True):
+            calls.append(("refresh", prompt.count("Review number")))
+            assert "PREVIOUS ANALYSIS (covers 40 earlier reviews)" in prompt
+            previous = json.loads(prompt.split("PREVIOUS ANALYSIS (covers 40 earlier reviews):\n")[1].split("\n")[0])
+            previous["standout_quotes"] = ["The battery lasts all week."]
+            return json.dumps(previous)
+
+        originals = (deepseek_api.analyze_all_reviews, deepseek_api.get_deepseek_analysis,
+                     deepseek_api.get_insight_store)
+        deepseek_api.analyze_all_reviews = fake_analyze_all_reviews
+        deepseek_api.get_deepseek_analysis = fake_get_deepseek_analysis
+        deepseek_api.get_insight_store = lambda: store
+        try:
+            data = {"url": "https://www.amazon.com/dp/B0ABCDEF12",
+                    "review_data": {"reviews": make_reviews(0, 40)}}
+            # A first analysis with a failed batch is returned but not stored, so the
+            # reviews it left out are not marked as covered
+            failed_batches.append(10)
+            partial = json.loads(deepseek_api.refresh_analysis(data, use_cache=False))
+            assert partial["unanalyzed_reviews"] == 10
+            assert store.get("B0ABCDEF12") is None
+            calls.clear()
+
+            first = json.loads(deepseek_api.refresh_analysis(data, use_cache=False))
+            assert calls == [("full", 40)]
+            assert len(store.get("B0ABCDEF12")["fingerprints"]) == 40
+
+            # Nothing new: the stored insights are returned without an API call
+            assert json.loads(deepseek_api.refresh_analysis(data, use_cache=False)) == first
+            assert len(calls) == 1
+
+            # 5 new reviews: only they are sent, with the previous insights
+            data["review_data"]["reviews"] = make_reviews(0, 45)
+            refreshed = json.loads(deepseek_api.refresh_analysis(data, use_cache=False))
+            logger.info(f"Calls: {calls}")
+            assert calls[1] == ("refresh", 5)
+            assert refreshed["standout_quotes"] == ["The battery lasts all week."]
+            assert len(store.get("B0ABCDEF12")["fingerprints"]) == 45
+
+            # full=True re-analyzes every review
+            deepseek_api.refresh_analysis(data, full=True, use_cache=False)
+            assert calls[2] == ("full", 45)
+        finally:
+            (deepseek_api.analyze_all_reviews, deepseek_api.get_deepseek_analysis,
+             deepseek_api.get_insight_store) = originals
+            store.close()
+
+if __name__ == "__main__":
+    test_insight_store()
@@ -0,0 +1,92 @@
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+from scripts.python import llm_cache
+from scripts.python.llm_cache import ResponseCache, get_response_cache, make_cache_key
+
+
+def test_llm_cache():
+    """
+    Test cache keys, TTL expiry, LRU eviction at the size limit, the disable switch and counters under threads.
+    """
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    logger = logging.getLogger(__name__)
+
+    # Every part of the request changes the key
+    key = make_cache_key("deepseek-chat", "system", "user", 0.2)
+    assert key == make_cache_key("deepseek-chat", "system", "user", 0.2)
+    variants = [make_cache_key("deepseek-reasoner", "system", "user", 0.2),
+                make_cache_key("deepseek-chat", "other system", "user", 0.2),
+                make_cache_key("deepseek-chat", "system", "other user", 0.2),
+                make_cache_key("deepseek-chat", "system", "user", 0.7),
+                make_cache_key("deepseek-chat", "system", "user")]
+    assert len(set(variants + [key])) == len(variants) + 1
+
+    clock = [1000.0]
+    original_time = llm_cache.time
+    llm_cache.time = SimpleNamespace(time=lambda: clock[0])
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = ResponseCache(str(Path(temp_dir) / "cache.sqlite3"), ttl_seconds=60, max_bytes=100)
+
+            # Entries expire after the TTL
+            cache.put("a", {"answer": 1})
+            clock[0] += 59
+            assert cache.get("a") == {"answer": 1}
+            clock[0] += 2
+            assert cache.get("a") is None
+            assert cache.stats()["entries"] == 0
+
+            # Over max_bytes, the least recently used entries go first
+            for name in ("b", "c", "d"):
+                cache.put(name, {"text": name * 20})
+                clock[0] += 1
+            assert cache.get("b") is not None
+            clock[0] += 1
+            cache.put("e", {"text": "e" * 20})
+            assert cache.get("c") is None
+            assert cache.get("b") is not None and cache.get("e") is not None
+            assert cache.stats()["bytes"] <= 100
+
+            # Hits and misses stay consistent under concurrent lookups
+            cache.hits = cache.misses = 0
+            lookups = 200
+
+            def look_up():
+                for i in range(lookups):
+                    cache.get("b" if i % 2 else "missing")
+
+            threads = [threading.Thread(target=look_up) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            stats = cache.stats()
+            logger.info(f"Cache stats after concurrent lookups: {stats}")
+            assert stats["hits"] == stats["misses"] == 8 * lookups // 2
+            cache.close()
+    finally:
+        llm_cache.time = original_time
+
+    # LLM_CACHE_DISABLED bypasses the cache
+    previous = os.environ.get("LLM_CACHE_DISABLED")
+    os.environ["LLM_CACHE_DISABLED"] = "1"
+    try:
+        assert get_response_cache() is None
+    finally:
+        if previous is None:
+            del os.environ["LLM_CACHE_DISABLED"]
+        else:
+            os.environ["LLM_CACHE_DISABLED"] = previous
+
+if __name__ == "__main__":
+    test_llm_cache()
@@ -0,0 +1,152 @@
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import asyncio
+
+from scripts.python.json_stream import JSONStreamParser, iter_events
+from scripts.python.llm_client import AsyncLLMClient, run_chat_completions, chat_completion, response_content
+
+STREAMED_ANALYSIS = {
+    "top_strengths": [{"feature": "Battery", "listing_advice": "Lead with \"all-day\" battery, {not} [specs]"}],
+    "negative_trends": [{"issue": "Strap", "severity": "high"}, {"issue": "App", "severity": "low"}],
+    "unique_selling_points": {"product_A": ["Cheaper"]},
+    "buyer_recommendation": "Pick A"
+}
+
+
+class StubChatHandler(BaseHTTPRequestHandler):
+    """
+    Minimal chat-completions stub. The first request is rate limited with a
+    Retry-After header; later requests echo the user prompt back.
+    """
+    lock = threading.Lock()
+    requests_seen = 0
+    in_flight = 0
+    max_in_flight = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        cls = type(self)
+        with cls.lock:
+            cls.requests_seen += 1
+            first = cls.requests_seen == 1
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            if first:
+                self._send(429, {"error": "rate limited"}, {"Retry-After": "0"})
+                return
+            time.sleep(0.05)
+            prompt = body["messages"][-1]["content"]
+            self._send(200, {"choices": [{"message": {"role": "assistant", "content": f"echo: {prompt}"}}]})
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubStreamHandler(BaseHTTPRequestHandler):
+    """
+    Chat-completions stub that streams STREAMED_ANALYSIS as server-sent events,
+    a few characters per chunk.
+    """
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        assert body["stream"] is True
+        content = "```json\n" + json.dumps(STREAMED_ANALYSIS) + "\n```"
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        for start in range(0, len(content), 7):
+            chunk = {"choices": [{"delta": {"content": content[start:start + 7]}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_llm_client():
+    """
+    Test the async LLM client against a local chat-completions stub server.
+    """
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    logger = logging.getLogger(__name__)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubChatHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    logger.info(f"Stub chat-completions server listening on {base_url}")
+
+    try:
+        payloads = [{"messages": [{"role": "user", "content": f"prompt {i}"}]} for i in range(12)]
+        results = run_chat_completions(payloads, api_key="test", base_url=base_url,
+                                       max_concurrency=3, timeout=5, backoff_base=0.01)
+
+        # Every request succeeds in order, even the one that was rate limited first
+        assert [response_content(result) for result in results] == [f"echo: prompt {i}" for i in range(12)]
+        assert StubChatHandler.max_in_flight <= 3
+
+        single = chat_completion({"messages": [{"role": "user", "content": "hello"}]}, base_url=base_url)
+        assert response_content(single) == "echo: hello"
+
+        print(f"Requests served: {StubChatHandler.requests_seen}, max in flight: {StubChatHandler.max_in_flight}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_stream_chat_completion():
+    """
+    Test streaming a JSON answer and parsing its insights incrementally.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubStreamHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    async def run():
+        parser = JSONStreamParser()
+        events = []
+        async with AsyncLLMClient(api_key="test", base_url=base_url, timeout=5) as client:
+            async for delta in client.stream_chat_completion({"messages": [{"role": "user", "content": "go"}]}):
+                events.extend(parser.feed(delta))
+        return parser, events
+
+    try:
+        parser, events = asyncio.run(run())
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # Every insight arrives once, in document order, and replaying the result matches
+    assert events == iter_events(STREAMED_ANALYSIS)
+    assert events[0] == (("top_strengths",), 0, STREAMED_ANALYSIS["top_strengths"][0])
+    assert events[-1] == (("buyer_recommendation",), None, "Pick A")
+    assert parser.done
+    assert parser.result() == STREAMED_ANALYSIS
+
+if __name__ == "__main__":
+    test_llm_client()
+    test_stream_chat_completion()
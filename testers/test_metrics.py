@@ -0,0 +1,86 @@
+import logging
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import main
+from scripts.python.metrics import METRICS, collect_timings, count, in_current_context, timed
+
+CALLS = 20000
+
+
+def test_metrics():
+    """
+    Test stage timers, counters, the Prometheus export, per-product timings and the overhead per timed stage.
+    """
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    logger = logging.getLogger(__name__)
+    METRICS.reset()
+
+    @timed("parse_reviews")
+    def parse():
+        time.sleep(0.01)
+
+    with collect_timings() as timings:
+        with timed("fetch_ttfb"):
+            time.sleep(0.02)
+        # Stages on pool threads count towards the product when run in its context
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            for future in [executor.submit(in_current_context(parse)) for _ in range(2)]:
+                future.result()
+    # Outside collect_timings, stages only reach the process-wide totals
+    parse()
+
+    product_timings = timings.as_dict()
+    assert 20 <= product_timings["fetch_ttfb"] < 200
+    assert 20 <= product_timings["parse_reviews"] < 200
+    assert METRICS.timer("stage_seconds", stage="parse_reviews")[0] == 3
+
+    count("cache_hits", cache="llm")
+    count("cache_hits", cache="llm")
+    count("selector_misses", field='price "main"')
+    assert METRICS.counter("cache_hits", cache="llm") == 2
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "metrics.prom"
+        METRICS.write_prometheus(str(path))
+        exposition = path.read_text(encoding="utf-8")
+    assert "# TYPE amazon_analyzer_cache_hits_total counter" in exposition
+    assert 'amazon_analyzer_cache_hits_total{cache="llm"} 2' in exposition
+    assert 'amazon_analyzer_selector_misses_total{field="price \\"main\\""} 1' in exposition
+    assert "# TYPE amazon_analyzer_stage_seconds summary" in exposition
+    assert 'amazon_analyzer_stage_seconds_count{stage="parse_reviews"} 3' in exposition
+
+    # The result of a product carries its stage timings
+    originals = (main.extract_product_details, main.extract_and_analyze_reviews, main.generate_ai_summary)
+    main.extract_product_details = lambda url: {"description": "Test Product", "price": "$10.00"}
+    main.extract_and_analyze_reviews = lambda url, max_pages=3: {"reviews": [{"rating": 5.0, "text": "Great"}]}
+    main.generate_ai_summary = lambda reviews, api_key=None: {"summary": "1 review"}
+    try:
+        result = main.process_product("https://www.amazon.com/dp/B0ABCDEF12", skip_similar=True)
+    finally:
+        main.extract_product_details, main.extract_and_analyze_reviews, main.generate_ai_summary = originals
+    assert {"product_details", "reviews", "ai_summary", "total"} <= set(result["timings"])
+    assert METRICS.counter("products") == 1
+
+    # Overhead of one timed stage, best of three runs
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(CALLS):
+            with timed("overhead"):
+                pass
+        best = min(best, (time.perf_counter() - start) / CALLS)
+    logger.info(f"Timed stage overhead: {best * 1e6:.2f} us")
+    # Under 1% of a 1 ms stage; fetches and LLM calls take hundreds of milliseconds
+    assert best < 10e-6
+    METRICS.reset()
+
+if __name__ == "__main__":
+    test_metrics()
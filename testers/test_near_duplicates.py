@@ -0,0 +1,101 @@
+import logging
+
+from scripts.python.near_duplicates import (_DENSIFY_OFFSET, MinHashLSH, NearDuplicateIndex,
+                                            find_near_duplicate_clusters)
+
+TEMPLATE = ("I received this product at a discount in exchange for my honest review. "
+            "The build quality is excellent and it works exactly as described in the listing.")
+
+
+def test_near_duplicate_clusters():
+    """
+    Test that templated reviews with small edits are clustered together.
+    """
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    logger = logging.getLogger(__name__)
+
+    reviews = [
+        {'title': "Five stars", 'text': TEMPLATE, 'rating': 5.0},
+        {'title': "Five stars", 'text': TEMPLATE.replace("excellent", "great"), 'rating': 5.0},
+        {'title': "Five stars!", 'text': TEMPLATE + " Would buy again.", 'rating': 5.0},
+        {'title': "Broke quickly", 'text': "The handle snapped after two weeks and support never replied to my emails.", 'rating': 1.0},
+        {'title': "Great", 'text': "Great product!", 'rating': 5.0}
+    ]
+
+    clusters = find_near_duplicate_clusters(reviews)
+    logger.info(f"Near-duplicate clusters: {clusters}")
+    assert clusters == [[0, 1, 2]]
+
+    # Short texts have no signature, so they are never flagged
+    assert MinHashLSH().signature("Great product!") is None
+
+
+def test_short_text_signatures():
+    """
+    Test the densified one-permutation signatures of texts with only a few shingles.
+    """
+    lsh = MinHashLSH()
+    # Six words make four shingles, so 60 of the 64 bins are filled from a neighbour
+    signature = lsh.signature("battery died after two short weeks")
+    assert len(signature) == lsh.num_perm
+    assert sum(1 for value in signature if value < _DENSIFY_OFFSET) == 4
+    assert all(value >= 0 for value in signature)
+    assert signature == lsh.signature("Battery died after two SHORT weeks!")
+    assert lsh.signature("only five words here now") is None
+
+    # Densified bins follow their neighbours, so unrelated short texts do not match
+    other = lsh.signature("screen cracked on the very first day")
+    assert lsh.similarity(signature, other) == 0.0
+    assert 0.0 < lsh.similarity(signature, lsh.signature("the battery died after two short weeks of use")) < 1.0
+    assert lsh.cluster(["battery died after two short weeks", "screen cracked on the very first day",
+                        "battery died after two short weeks"]) == [[0, 2]]
+
+
+def test_near_duplicate_index():
+    """
+    Test the incremental index against the batch clustering and its limit on indexed reviews.
+    """
+    reviews = [{'title': "Five stars", 'text': TEMPLATE.replace("excellent", word), 'rating': 5.0}
+               for word in ("excellent", "great", "solid", "superb")]
+    reviews.append({'title': "Broke", 'text': "The handle snapped after two weeks and support never replied.",
+                    'rating': 1.0})
+
+    index = NearDuplicateIndex()
+    assert [index.add(review) for review in reviews] == [False, True, True, True, False]
+    assert index.clusters() == find_near_duplicate_clusters(reviews) == [[0, 1, 2, 3]]
+    assert index.rating(4) == 1.0 and index.sample(4)[0] == "Broke"
+
+    # Past max_entries, reviews are matched against the indexed ones but not indexed themselves
+    bounded = NearDuplicateIndex(max_entries=2)
+    copy = {'title': "Broke", 'text': "The handle snapped after two weeks and support never replied.",
+            'rating': 2.0}
+    assert not bounded.add(reviews[0]) and not bounded.add(reviews[4])
+    assert bounded.add(reviews[1])
+    assert bounded.add(copy)
+    # Two later reviews that only resemble each other are not clustered
+    late = {'title': "Meh", 'text': "The strap is too short for my wrist and the clasp feels loose.", 'rating': 3.0}
+    assert not bounded.add(late) and not bounded.add(dict(late))
+    assert [bounded.indexed(i) for i in range(6)] == [True, True, False, False, False, False]
+    assert len(bounded._signatures) == len(bounded._samples) == 2
+    assert bounded.sample(4) == ('', '') and bounded.rating(5) == 3.0
+    assert bounded.clusters() == [[0, 2], [1, 3]]
+
+    # Linking two clusters merges the later one and reports its root
+    linked = NearDuplicateIndex()
+    words = [f"w{n}" for n in range(70)]
+    # Both share their first 30 words with the linking review, and little with each other
+    first, second = " ".join(words[:50]), " ".join(words[:30] + words[50:])
+    assert not linked.add({'text': first}) and not linked.add({'text': second})
+    assert linked.merged_roots == []
+    assert linked.add({'text': " ".join(words)})
+    assert linked.merged_roots == [1] and linked.clusters() == [[0, 1, 2]]
+
+if __name__ == "__main__":
+    test_near_duplicate_clusters()
+    test_short_text_signatures()
+    test_near_duplicate_index()
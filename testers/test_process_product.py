@@ -0,0 +1,66 @@
+import logging
+import threading
+import time
+
+import main
+
+STAGE_SECONDS = 0.3
+
+
+def test_process_product_stages():
+    """
+    Test that independent stages run concurrently, the summary waits for reviews,
+    and a failing stage does not affect the others.
+    """
+    logger = logging.getLogger(__name__)
+    events = []
+    lock = threading.Lock()
+
+    def record(name):
+        with lock:
+            events.append((name, time.perf_counter()))
+
+    def fake_details(url):
+        time.sleep(STAGE_SECONDS)
+        record("details")
+        return {"description": "Test Product", "price": "$10.00", "specifications": {}}
+
+    def fake_reviews(url, max_pages=3):
+        time.sleep(STAGE_SECONDS)
+        record("reviews")
+        return {"reviews": [{"rating": 5.0, "text": "Great"}], "analysis": {"average_rating": 5.0, "total_reviews": 1}}
+
+    def fake_summary(reviews, api_key=None):
+        record("summary")
+        return {"summary": f"{len(reviews)} review"}
+
+    def failing_similar(url):
+        time.sleep(STAGE_SECONDS)
+        raise RuntimeError("similar products unavailable")
+
+    originals = (main.extract_product_details, main.extract_and_analyze_reviews,
+                 main.generate_ai_summary, main.find_similar_products)
+    main.extract_product_details = fake_details
+    main.extract_and_analyze_reviews = fake_reviews
+    main.generate_ai_summary = fake_summary
+    main.find_similar_products = failing_similar
+    try:
+        start = time.perf_counter()
+        result = main.process_product("https://www.amazon.com/dp/B0ABCDEF12")
+        elapsed = time.perf_counter() - start
+    finally:
+        (main.extract_product_details, main.extract_and_analyze_reviews,
+         main.generate_ai_summary, main.find_similar_products) = originals
+
+    logger.info(f"process_product took {elapsed:.2f}s for three {STAGE_SECONDS}s stages")
+    # Close to the slowest stage rather than the sum of all three
+    assert elapsed < 2 * STAGE_SECONDS
+    order = [name for name, _ in events]
+    assert order.index("summary") > order.index("reviews")
+    assert result["product_details"]["description"] == "Test Product"
+    assert result["ai_summary"] == {"summary": "1 review"}
+    # The failed stage keeps its empty default
+    assert result["similar_products"] == []
+
+if __name__ == "__main__":
+    test_process_product_stages()
@@ -0,0 +1,94 @@
+import copy
+import json
+import logging
+import subprocess
+import sys
+from pathlib import Path
+
+from scripts.python.comparison_analyzer import generate_matrix_prompt, run_comparison
+from scripts.python.product_digest import build_product_digest, digest_cache_key, product_label
+
+
+def make_product(name, price, good, bad):
+    """Build a product result with reviews praising `good` and criticizing `bad`."""
+    reviews = [{"rating": 5.0, "title": "Love it", "text": f"The {good} is excellent. Really happy with the {good}."}
+               for _ in range(4)]
+    reviews += [{"rating": 1.0, "title": "Disappointed", "text": f"The {bad} broke after a week. Terrible {bad}."}
+                for _ in range(2)]
+    return {
+        "url": f"https://www.amazon.com/dp/{name}",
+        "product_details": {
+            "description": f"{name} Wireless Headphones About this item long marketing text",
+            "price": price,
+            "specifications": {"Brand": name, "Color": "Black"}
+        },
+        "review_data": {
+            "reviews": reviews,
+            "analysis": {"average_rating": 3.7, "total_reviews": 6, "rating_counts": {"5_star": 4, "1_star": 2}}
+        }
+    }
+
+
+def test_product_digest():
+    """
+    Test product digests and the N-way comparison matrix prompt offline.
+    """
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    logger = logging.getLogger(__name__)
+
+    products = [make_product(name, f"${20 + i}.99", good, bad) for i, (name, good, bad) in enumerate([
+        ("Acme", "battery life", "ear cushion"),
+        ("Bolt", "sound quality", "charging port"),
+        ("Crest", "noise cancelling", "headband hinge"),
+    ])]
+
+    digest = build_product_digest(products[0])
+    assert digest["title"] == "Acme Wireless Headphones"
+    assert digest["price"] == "$20.99"
+    assert digest["rating_stats"]["reviews_digested"] == 6
+    assert any("battery" in strength.lower() for strength in digest["strengths"])
+    assert any("cushion" in complaint.lower() for complaint in digest["complaints"])
+
+    # The cache key follows the product data, so changed reviews mean a fresh digest
+    changed = copy.deepcopy(products[0])
+    assert digest_cache_key(changed) == digest_cache_key(products[0])
+    changed["review_data"]["reviews"].append({"rating": 3.0, "text": "Okay."})
+    assert digest_cache_key(changed) != digest_cache_key(products[0])
+
+    assert [product_label(i) for i in (0, 1, 25, 26, 27)] == ["A", "B", "Z", "AA", "AB"]
+
+    prompt = generate_matrix_prompt([build_product_digest(product) for product in products])
+    logger.info(f"Matrix prompt for {len(products)} products: {len(prompt)} characters")
+    for label, name in zip("ABC", ("Acme", "Bolt", "Crest")):
+        assert f"Product {label}: {name} Wireless Headphones" in prompt
+    assert "(A, B, C)" in prompt
+    # Raw reviews are not repeated in the prompt
+    assert prompt.count("Really happy with the battery life") <= 1
+
+def test_comparison_stdin():
+    """
+    Test the in-memory comparison entry point and the stdin/stdout protocol on invalid jobs.
+    """
+    for job in ({"product_A": make_product("Acme", "$1", "battery", "strap")}, {"products": []}):
+        try:
+            run_comparison(job, use_cache=False)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"Invalid job accepted: {job}")
+
+    script = Path(__file__).resolve().parent.parent / "scripts" / "python" / "comparison_analyzer.py"
+    completed = subprocess.run([sys.executable, str(script), "--stdin"], input=json.dumps({"products": [{}]}),
+                               capture_output=True, text=True, timeout=60)
+    # stdout carries only the JSON reply; logging goes to stderr
+    assert completed.returncode == 1
+    assert json.loads(completed.stdout) == {"success": False, "error": "At least two products are needed for a comparison"}
+
+if __name__ == "__main__":
+    test_product_digest()
+    test_comparison_stdin()
@@ -0,0 +1,148 @@
+import contextlib
+import io
+import json
+import logging
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import main
+from scripts.python import product_store
+from scripts.python.product_store import ProductStore, api_query, parse_crawl_time, parse_price, parse_review_date
+
+URL = "https://www.amazon.com/Some-Product/dp/B0ABCDEF12"
+
+
+def make_result(price, reviews, specs=None):
+    return {
+        "url": URL,
+        "product_details": {"description": "Test Product", "specifications": specs or {"Color": "Black"},
+                            "image_url": "https://example.com/image.jpg", "price": price},
+        "review_data": {
+            "reviews": reviews,
+            "analysis": {"average_rating": 4.0, "total_reviews": len(reviews)}
+        },
+        "ai_summary": {"summary": f"{len(reviews)} reviews"},
+        "similar_products": [{"asin": "B000000099"}]
+    }
+
+
+def make_reviews(start, count):
+    return [{"reviewer_name": f"Buyer {i}", "title": f"Review {i}", "rating": float(1 + i % 5),
+             "date": f"Reviewed in the United States on May {1 + i % 28}, 2025",
+             "text": f"Review number {i}.", "verified_purchase": i % 2 == 0, "helpful_votes": i}
+            for i in range(start, start + count)]
+
+
+def test_product_store():
+    """
+    Test storing results, content-hash dedupe, indexed review queries, the query CLI and writes from process_product.
+    """
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    logger = logging.getLogger(__name__)
+
+    assert parse_review_date("Reviewed in the United States on May 1, 2025") == "2025-05-01"
+    assert parse_review_date("yesterday") is None
+    assert parse_price("$1,158.17") == 1158.17
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = str(Path(temp_dir) / "products.sqlite3")
+        store = ProductStore(path)
+        assert store.save_result(make_result("$10.00", make_reviews(0, 20)), crawled=1000.0) == "B0ABCDEF12"
+        # Same content again: no new price snapshot, review or analysis
+        store.save_result(make_result("$10.00", make_reviews(0, 20)), crawled=2000.0)
+        # A price change and 10 new reviews, 5 of them already known
+        store.save_result(make_result("$8.50", make_reviews(15, 10), {"Color": "Red"}), crawled=3000.0)
+
+        product = store.product("B0ABCDEF12")
+        assert product["first_crawled"] == 1000.0 and product["last_crawled"] == 3000.0
+        assert product["specifications"] == {"Color": "Red"}
+        assert [(row["crawled"], row["amount"]) for row in store.price_history("B0ABCDEF12")] == [(1000.0, 10.0), (3000.0, 8.5)]
+        assert sum(store.rating_counts("B0ABCDEF12").values()) == 25
+        assert store.latest_analysis("B0ABCDEF12")["ai_summary"] == {"summary": "10 reviews"}
+        assert store._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0] == 2
+
+        positive = store.reviews("B0ABCDEF12", min_rating=4.0, since="2025-05-10")
+        assert positive and all(review["rating"] >= 4.0 and review["review_date"] >= "2025-05-10" for review in positive)
+        assert [review["review_date"] for review in positive] == sorted((review["review_date"] for review in positive), reverse=True)
+        assert len(store.reviews("B0ABCDEF12", limit=10, offset=20)) == 5
+
+        # Review lookups use the indexes instead of scanning the table
+        plan = " ".join(row[3] for row in store._conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM reviews WHERE asin = ? AND rating >= ? ORDER BY review_date DESC",
+            ("B0ABCDEF12", 4.0)))
+        logger.info(f"Review query plan: {plan}")
+        assert "USING INDEX" in plan and "SCAN reviews" not in plan
+
+        result = store.load_result("B0ABCDEF12")
+        assert result["product_details"]["price"] == "$8.50"
+        assert result["similar_products"] == [{"asin": "B000000099"}]
+        assert len(result["review_data"]["reviews"]) == 25
+        store.close()
+
+        # Existing JSON files import, and the CLI answers with one JSON document per call
+        review_file = Path(temp_dir) / "review.json"
+        review_file.write_text(json.dumps(make_result("$9.00", make_reviews(100, 3))), encoding="utf-8")
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            assert product_store.main(["--db", path, "import", str(review_file)]) == 0
+            assert product_store.main(["--db", path, "reviews", "B0ABCDEF12", "--max-rating", "2", "--limit", "3"]) == 0
+            assert product_store.main(["--db", path, "product", "B000000000"]) == 1
+        imported, low, missing = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert imported == {"imported": 1}
+        assert len(low) == 3 and all(review["rating"] <= 2.0 for review in low)
+        assert "error" in missing
+
+        # server.js requests: each route only takes its own query parameters
+        store = ProductStore(path)
+        status, products = api_query(store, "/api/products", {"since": "1970-01-02", "limit": "5"})
+        assert status == 200 and [product["asin"] for product in products] == ["B0ABCDEF12"]
+        assert parse_crawl_time("1500.5") == 1500.5
+        status, reviews = api_query(store, "/api/products/B0ABCDEF12/reviews",
+                                    {"min_rating": "4", "since": "2025-05-10", "limit": "3", "offset": "1"})
+        assert status == 200 and len(reviews) == 3 and all(review["rating"] >= 4.0 for review in reviews)
+        status, result = api_query(store, "/api/products/B0ABCDEF12", {"limit": ["50", "2"]})
+        assert status == 200 and len(result["review_data"]["reviews"]) == 2
+        assert api_query(store, "/api/products", {"offset": "20"})[0] == 400
+        assert api_query(store, "/api/products/B0ABCDEF12", {"min_rating": "4"})[0] == 400
+        assert api_query(store, "/api/products/B0ABCDEF12/prices", {"limit": "3"})[0] == 400
+        assert api_query(store, "/api/products/B0ABCDEF12/reviews", {"since": "last week"})[0] == 400
+        assert api_query(store, "/api/products/B0ABCDEF12/ratings", {})[0] == 404
+        assert api_query(store, "/api/products/B000000000", {})[0] == 404
+        store.close()
+        # The way server.js runs it: request on stdin, status and body on the last stdout line
+        request = json.dumps({"path": "/api/products/B0ABCDEF12/prices", "query": {}})
+        completed = subprocess.run([sys.executable, product_store.__file__, "--db", path, "api"],
+                                   input=request, capture_output=True, text=True, check=True)
+        response = json.loads(completed.stdout.strip().splitlines()[-1])
+        assert response["status"] == 200 and [row["price"] for row in response["body"]] == ["$10.00", "$8.50", "$9.00"]
+
+        # process_product writes its result to the store
+        originals = (main.extract_product_details, main.extract_and_analyze_reviews, main.generate_ai_summary)
+        main.extract_product_details = lambda url: {"description": "Other Product", "specifications": {}, "price": "$5.00"}
+        main.extract_and_analyze_reviews = lambda url, max_pages=3: {"reviews": make_reviews(200, 2),
+                                                                      "analysis": {"total_reviews": 2}}
+        main.generate_ai_summary = lambda reviews, api_key=None: {"summary": "2 reviews"}
+        store = ProductStore(path)
+        try:
+            main.process_product("https://www.amazon.com/dp/B0OTHER123", skip_similar=True, store=store)
+        finally:
+            main.extract_product_details, main.extract_and_analyze_reviews, main.generate_ai_summary = originals
+        assert store.product("B0OTHER123")["price"] == "$5.00"
+        assert [product["asin"] for product in store.products()] == ["B0OTHER123", "B0ABCDEF12"]
+        store.close()
+
+        # Every table is there for other tools reading the file directly
+        with sqlite3.connect(path) as conn:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert {"products", "price_snapshots", "specs", "reviews", "analyses"} <= tables
+
+if __name__ == "__main__":
+    test_product_store()
@@ -0,0 +1,87 @@
+import logging
+import pstats
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import main
+from scripts.python.crawl_journal import CrawlJournal
+from scripts.python.profiling import StageProfiler
+
+URLS = [f"https://www.amazon.com/dp/B{n:09d}" for n in range(5)]
+
+
+def slow_parse(html):
+    """Stand-in for an extractor that became slow after a page template change."""
+    return sorted(html.split(), key=lambda word: word[::-1])
+
+
+def test_stage_profiler():
+    """
+    Test per-stage reports for every Nth product of a batch, with profiled stages run one at a time.
+    """
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    logger = logging.getLogger(__name__)
+    intervals = []
+    lock = threading.Lock()
+
+    def timed_stage(func):
+        def run(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with lock:
+                    intervals.append((start, time.perf_counter()))
+        return run
+
+    html = " ".join(f"word{n}" for n in range(20000))
+    stubs = {
+        "extract_product_details": timed_stage(lambda url: {"description": str(len(slow_parse(html)))}),
+        "extract_and_analyze_reviews": timed_stage(lambda url, max_pages=3, **resume: {"reviews": [{"text": "Great"}] * 3}),
+        "generate_ai_summary": timed_stage(lambda reviews, api_key=None: {"summary": "Great"}),
+        "find_similar_products": timed_stage(lambda url: [{"asin": "B000000099"}]),
+    }
+    originals = {name: getattr(main, name) for name in stubs}
+    for name, stub in stubs.items():
+        setattr(main, name, stub)
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            profiler = StageProfiler(str(Path(temp_dir) / "profiles"), every=2)
+            with CrawlJournal(str(Path(temp_dir) / "crawl.jsonl")) as journal:
+                main.process_batch(URLS, journal, profiler=profiler)
+
+            reports = Path(temp_dir) / "profiles"
+            profiled = sorted(path.name for path in reports.iterdir())
+            logger.info(f"Profiled products: {profiled}")
+            # The 1st, 3rd and 5th product
+            assert profiled == ["0001_B000000000", "0003_B000000002", "0005_B000000004"]
+
+            product = reports / profiled[0]
+            for stage in ("product_details", "reviews", "ai_summary", "similar_products"):
+                for suffix in (".pstats", ".txt", ".alloc.txt", ".collapsed"):
+                    assert (product / f"{stage}{suffix}").exists(), f"{stage}{suffix}"
+
+            stats = pstats.Stats(str(product / "product_details.pstats"))
+            assert any(function[2] == "slow_parse" for function in stats.stats)
+            assert "slow_parse" in (product / "product_details.txt").read_text(encoding="utf-8")
+            assert "peak traced memory" in (product / "product_details.alloc.txt").read_text(encoding="utf-8")
+            for line in (product / "product_details.collapsed").read_text(encoding="utf-8").splitlines():
+                stack, samples = line.rsplit(" ", 1)
+                assert int(samples) > 0 and ";" in stack
+    finally:
+        for name, original in originals.items():
+            setattr(main, name, original)
+
+    # Stages of the profiled products never overlap
+    first_product = sorted(intervals)[:4]
+    assert all(end <= next_start for (_, end), (next_start, _) in zip(first_product, first_product[1:]))
+
+if __name__ == "__main__":
+    test_stage_profiler()
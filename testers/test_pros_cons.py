@@ -0,0 +1,82 @@
+import logging
+
+from scripts.python.pros_cons import ProsConsExtractor, extract_pros_cons, split_sentences
+
+REVIEWS = [
+    (5, "The battery life is amazing and lasts three days. Setup took two minutes with the app."),
+    (5, "Amazing battery life on a single charge. The screen is sharp even in sunlight."),
+    (4, "Battery life is excellent for the price. The strap feels cheap but it is fine."),
+    (5, "Sharp screen and amazing battery life. Syncing with my phone works every time."),
+    (4, "Great battery life overall. The heart rate readings match my chest strap."),
+    (1, "The strap broke after one week of normal wear. Customer support never answered my emails."),
+    (2, "Strap broke within a month and the buckle scratched my wrist. Battery life was fine though."),
+    (1, "Bluetooth keeps disconnecting from my phone every hour. The strap broke on day three."),
+    (2, "Customer support ignored my warranty claim completely. Bluetooth disconnects constantly during runs."),
+    (3, "Average watch overall. Battery life is decent and the strap is okay."),
+]
+
+
+def make_reviews():
+    return [{"rating": float(rating), "title": "", "text": text, "helpful_votes": n % 3}
+            for n, (rating, text) in enumerate(REVIEWS)]
+
+
+def test_pros_cons():
+    """
+    Test that pros come from positive reviews, cons from negative ones and that key points are stable.
+    """
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    logger = logging.getLogger(__name__)
+
+    assert split_sentences("Works great.Really happy! Read more") == ["Works great.", "Really happy!"]
+
+    reviews = make_reviews()
+    extractor = ProsConsExtractor().fit(reviews)
+    pros, cons = extractor.pros(3), extractor.cons(3)
+    logger.info(f"Pros: {pros}")
+    logger.info(f"Cons: {cons}")
+    assert pros == ["Amazing battery life on a single charge.",
+                    "Sharp screen and amazing battery life.",
+                    "The screen is sharp even in sunlight."]
+    assert cons == ["The strap broke after one week of normal wear.",
+                    "Customer support ignored my warranty claim completely.",
+                    "Bluetooth disconnects constantly during runs."]
+
+    # Every pro is a sentence of a positive review and every con one of a negative review
+    positive_text = " ".join(text for rating, text in REVIEWS if rating >= 4)
+    negative_text = " ".join(text for rating, text in REVIEWS if rating <= 2)
+    assert all(pro in positive_text and pro not in negative_text for pro in pros)
+    assert all(con in negative_text and con not in positive_text for con in cons)
+    assert extract_pros_cons(reviews, limit=3) == (pros, cons)
+    assert len(extractor.pros(1)) == 1 and len(extractor.cons(10)) <= 10
+
+    key_points = extractor.key_points(5)
+    logger.info(f"Key points: {key_points}")
+    assert key_points == [
+        '"Battery life" comes up in 7 of 10 reviews (70%), mostly in positive reviews.',
+        '"Strap" comes up in 6 of 10 reviews (60%), with mixed opinions.',
+        '"Amazing" comes up in 3 of 10 reviews (30%), mostly in positive reviews.',
+        '"Broke" comes up in 3 of 10 reviews (30%), mostly in negative reviews.',
+        '"Customer support" comes up in 2 of 10 reviews (20%), mostly in negative reviews.',
+    ]
+
+    # Same output on a refit, on a new extractor and whatever the review order
+    extractor.fit(reviews)
+    assert extractor.key_points(5) == key_points
+    assert (extractor.pros(3), extractor.cons(3)) == (pros, cons)
+    shuffled = ProsConsExtractor().fit(list(reversed(make_reviews())))
+    assert shuffled.key_points(5) == key_points
+    assert (shuffled.pros(3), shuffled.cons(3)) == (pros, cons)
+
+    # Without negative reviews there are no cons
+    only_positive = ProsConsExtractor().fit(review for review in reviews if review["rating"] >= 4)
+    assert only_positive.pros(3) and only_positive.cons(3) == []
+    assert ProsConsExtractor().fit([]).key_points() == []
+
+if __name__ == "__main__":
+    test_pros_cons()
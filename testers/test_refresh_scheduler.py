@@ -0,0 +1,103 @@
+import logging
+import math
+import tempfile
+from pathlib import Path
+
+import main
+from scripts.python.refresh_scheduler import RefreshScheduler, changed_fields, estimate_change_rate, product_snapshot
+
+HOUR = 3600.0
+# Products 0 and 1 change price every hour; the other 18 never change
+PRODUCTS = [f"B{n:09d}" for n in range(20)]
+FAST = set(PRODUCTS[:2])
+
+
+def product_result(asin, now):
+    price = f"${10 + int(now // HOUR) % 7}.99" if asin in FAST else "$10.99"
+    return {"url": f"https://www.amazon.com/dp/{asin}",
+            "product_details": {"description": asin, "price": price, "specifications": {"Color": "Black"}},
+            "review_data": {"analysis": {"average_rating": 4.5, "total_reviews": 120}}}
+
+
+def test_refresh_scheduler():
+    """
+    Test change detection, rate estimation, and that scheduling catches more changes
+    than a fixed round-robin refresh with the same request budget.
+    """
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    logger = logging.getLogger(__name__)
+
+    before = product_snapshot(product_result(PRODUCTS[0], 0))
+    assert changed_fields(before, product_snapshot(product_result(PRODUCTS[0], HOUR))) == ["price"]
+    assert changed_fields(None, before) == []
+
+    checks = [{"time": i * HOUR, "changed": i % 2 == 0} for i in range(11)]
+    # 5 changes in 10 hourly intervals
+    assert math.isclose(estimate_change_rate(checks), -math.log(5.5 / 10.5) / HOUR)
+    assert estimate_change_rate(checks[:1]) is None
+
+    budget_per_hour, hours = 4, 48
+
+    # Fixed cron: round-robin through the catalogue at the same budget
+    last_seen, cron_changes, position = {}, 0, 0
+    for hour in range(hours):
+        for _ in range(budget_per_hour):
+            asin = PRODUCTS[position % len(PRODUCTS)]
+            position += 1
+            snapshot = product_snapshot(product_result(asin, hour * HOUR))
+            cron_changes += bool(changed_fields(last_seen.get(asin), snapshot))
+            last_seen[asin] = snapshot
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        scheduler = RefreshScheduler(str(Path(temp_dir) / "watchlist.sqlite3"), min_interval=HOUR,
+                                     max_interval=7 * 24 * HOUR)
+        try:
+            for asin in PRODUCTS:
+                scheduler.watch(f"https://www.amazon.com/dp/{asin}", now=0)
+            assert scheduler.watch("https://example.com/item") is None
+
+            scheduled_changes = 0
+            for hour in range(hours):
+                now = hour * HOUR
+                for entry in scheduler.due(budget_per_hour, now):
+                    scheduled_changes += bool(scheduler.record(entry["asin"], product_result(entry["asin"], now), now))
+            assert len(scheduler.due(100, now=0)) == 0
+
+            # Static products back off, fast ones stay near the minimum interval
+            assert scheduler.next_interval(PRODUCTS[0]) < 2 * HOUR
+            assert scheduler.next_interval(PRODUCTS[-1]) > 24 * HOUR
+
+            # A failed refresh is retried soon without counting as a check
+            checks_before = len(scheduler.history(PRODUCTS[5]))
+            assert scheduler.record(PRODUCTS[5], None, now=hours * HOUR) == []
+            assert len(scheduler.history(PRODUCTS[5])) == checks_before
+
+            # A refresh run processes at most the budget, and only due products
+            refreshed = []
+
+            def fake_process_product(url, **options):
+                refreshed.append(url)
+                return product_result(url.rsplit("/", 1)[-1], hours * HOUR)
+
+            original = main.process_product
+            main.process_product = fake_process_product
+            try:
+                scheduler.watch(f"https://www.amazon.com/dp/{PRODUCTS[0]}?th=1")
+                results = main.refresh_watched(scheduler, budget=1)
+            finally:
+                main.process_product = original
+            assert len(results) == len(refreshed) == 1
+        finally:
+            scheduler.close()
+
+    logger.info(f"Changes caught in {hours} h at {budget_per_hour} refreshes/h: "
+                f"fixed cron {cron_changes}, scheduler {scheduled_changes}")
+    assert scheduled_changes > 2 * cron_changes
+
+if __name__ == "__main__":
+    test_refresh_scheduler()
@@ -0,0 +1,88 @@
+import gzip
+import logging
+import tempfile
+from pathlib import Path
+
+import main
+from scripts.python.crawl_journal import CrawlJournal
+from scripts.python.result_writer import ResultWriter, read_results, rotated_segments
+
+URLS = [f"https://www.amazon.com/dp/B{n:09d}" for n in range(6)]
+
+
+def page_reviews(url, page):
+    return [{"rating": 5.0, "title": f"Page {page}", "text": f"Review {i} of {url}"} for i in range(3)]
+
+
+def test_result_writer():
+    """
+    Test streamed product and review lines, gzip output, size rotation and torn lines.
+    """
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    logger = logging.getLogger(__name__)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "results.jsonl"
+        with ResultWriter(str(path), max_bytes=300) as writer:
+            for n in range(10):
+                writer.write_product({"url": URLS[0], "product_details": {"price": f"${n}.99"}})
+            # Lines are visible before the writer is closed
+            assert len(list(read_results(str(path)))) == 10
+        segments = rotated_segments(path)
+        assert segments and segments[0].name == "results.1.jsonl"
+        assert all(segment.stat().st_size >= 300 for segment in segments)
+        records = list(read_results(str(path)))
+        assert [record["product_details"]["price"] for record in records] == [f"${n}.99" for n in range(10)]
+        assert all(record["type"] == "product" for record in records)
+
+        # A crash mid-write leaves a torn line, which readers skip
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"type": "product", "url": "https://www.amaz')
+        assert len(list(read_results(str(path)))) == 10
+
+        gz_path = Path(temp_dir) / "results.jsonl.gz"
+        writer = ResultWriter(str(gz_path), reviews=True)
+        writer.write_reviews(URLS[0], 1, page_reviews(URLS[0], 1))
+        # Readable mid-stream, before the gzip trailer is written
+        assert len(list(read_results(str(gz_path)))) == 3
+        writer.close()
+        with gzip.open(gz_path, 'rt', encoding='utf-8') as f:
+            assert len(f.readlines()) == 3
+
+    def fake_process_product(url, journal=None, writer=None, **options):
+        result = {"url": url, "review_data": {"reviews": []}}
+        for page in (1, 2):
+            writer.write_reviews(url, page, page_reviews(url, page))
+            result["review_data"]["reviews"].extend(page_reviews(url, page))
+        writer.write_product(result)
+        return result
+
+    original = main.process_product
+    main.process_product = fake_process_product
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = str(Path(temp_dir) / "batch.jsonl.gz")
+            with CrawlJournal(str(Path(temp_dir) / "crawl.jsonl")) as journal, \
+                    ResultWriter(path, reviews=True) as writer:
+                results = main.process_batch(URLS, journal, writer=writer)
+            # Streamed results are not kept in memory
+            assert results == []
+            records = list(read_results(path))
+    finally:
+        main.process_product = original
+
+    products = [record for record in records if record["type"] == "product"]
+    reviews = [record for record in records if record["type"] == "review"]
+    logger.info(f"Streamed {len(products)} products and {len(reviews)} reviews")
+    assert [product["url"] for product in products] == URLS
+    assert len(reviews) == len(URLS) * 6
+    # Each product's reviews precede its product line
+    assert records[6]["type"] == "product" and records[6]["url"] == URLS[0]
+
+if __name__ == "__main__":
+    test_result_writer()
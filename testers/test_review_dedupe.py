@@ -0,0 +1,51 @@
+import logging
+from scripts.python.review_dedupe import ReviewDeduplicator, review_fingerprint, dedupe_reviews
+
+def test_review_dedupe():
+    """
+    Test review fingerprinting and duplicate filtering with sample reviews.
+    """
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    logger = logging.getLogger(__name__)
+    logger.info("Testing review deduplication with sample reviews")
+    
+    review = {
+        'reviewer_name': "John Doe",
+        'title': "Great product, highly recommend!",
+        'rating': 5.0,
+        'date': "January 1, 2023",
+        'text': "This product exceeded my expectations. It's well-made, durable, and works exactly as described.",
+        'verified_purchase': True,
+        'helpful_votes': 10
+    }
+    
+    # The same review scraped again with different whitespace/casing
+    repeated = dict(review, title="  great product,   HIGHLY recommend! ", helpful_votes=12)
+    other = dict(review, reviewer_name="Jane Smith")
+    
+    assert review_fingerprint(review) == review_fingerprint(repeated)
+    assert review_fingerprint(review) != review_fingerprint(other)
+    
+    # Duplicates across "pages" are dropped and counted
+    deduplicator = ReviewDeduplicator()
+    page_1 = deduplicator.filter([review, other])
+    page_2 = deduplicator.filter([repeated])
+    assert len(page_1) == 2
+    assert page_2 == []
+    assert deduplicator.duplicates_dropped == 1
+    assert 'fingerprint' in page_1[0]
+    
+    # Memory stays bounded: oldest fingerprints are evicted first
+    bounded = ReviewDeduplicator(max_entries=1)
+    bounded.filter([dict(review), dict(other)])
+    assert len(bounded) == 1
+    
+    print(f"Unique reviews: {len(dedupe_reviews([dict(review), dict(repeated), dict(other)]))}")
+
+if __name__ == "__main__":
+    test_review_dedupe()
@@ -0,0 +1,153 @@
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import scripts.python.deepseek_api as deepseek_api
+from scripts.python.prompt_budget import estimate_tokens, select_reviews, truncate_to_tokens
+from scripts.python.review_mapreduce import chunk_reviews, merge_partial_analyses, map_reduce, parse_json_content
+
+
+class StubMapReduceHandler(BaseHTTPRequestHandler):
+    """
+    Chat-completions stub answering map prompts with a partial analysis and the
+    reduce prompt with a merged one.
+    """
+    lock = threading.Lock()
+    prompts = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        prompt = body["messages"][-1]["content"]
+        with type(self).lock:
+            type(self).prompts.append(prompt)
+        if prompt.startswith("FAIL"):
+            content = "Sorry, I cannot help with that."
+        elif prompt.startswith("REDUCE"):
+            content = json.dumps({"top_strengths": [{"feature": "merged"}], "partials": prompt.count("feature")})
+        else:
+            content = "```json\n" + json.dumps({"top_strengths": [{"feature": prompt}]}) + "\n```"
+        data = json.dumps({"choices": [{"message": {"role": "assistant", "content": content}}]}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_review_mapreduce():
+    """
+    Test review batching, local merging, and a map-reduce run against a stub server.
+    """
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    logger = logging.getLogger(__name__)
+
+    reviews = [{"rating": 5, "text": "word " * 100} for _ in range(10)]
+    batches = chunk_reviews(reviews, token_budget=300)
+    assert sum(len(batch) for batch in batches) == 10
+    assert all(len(batch) == 2 for batch in batches)
+    # A review over the budget still gets a batch of its own
+    assert len(chunk_reviews([{"text": "x" * 10000}], token_budget=10)) == 1
+
+    merged = merge_partial_analyses([
+        {"top_strengths": [{"feature": "Battery"}], "standout_quotes": ["Great"]},
+        {"top_strengths": [{"feature": "Screen"}, {"feature": "battery"}], "standout_quotes": ["great", "Meh"]},
+    ])
+    assert [item["feature"] for item in merged["top_strengths"]] == ["Battery", "Screen"]
+    assert merged["standout_quotes"] == ["Great", "Meh"]
+
+    assert parse_json_content('Here you go: {"a": 1} hope it helps') == {"a": 1}
+    assert parse_json_content("not json") is None
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubMapReduceHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    logger.info(f"Stub chat-completions server listening on {base_url}")
+
+    try:
+        result, failed = map_reduce([f"batch {i}" for i in range(5)], lambda partials: "REDUCE " + json.dumps(partials),
+                                    "system", api_key="test", base_url=base_url, max_concurrency=2, use_cache=False)
+        assert result == {"top_strengths": [{"feature": "merged"}], "partials": 5}
+        assert failed == []
+        assert len(StubMapReduceHandler.prompts) == 6
+
+        # A single batch needs no reduce call
+        single, failed = map_reduce(["only"], lambda partials: "REDUCE", "system", api_key="test",
+                                    base_url=base_url, use_cache=False)
+        assert single == {"top_strengths": [{"feature": "only"}]} and failed == []
+        assert len(StubMapReduceHandler.prompts) == 7
+
+        # Failed map calls are reported, and the reduce call only sees the others
+        prompts = ["batch 0", "FAIL 1", "batch 2", "FAIL 3"]
+        result, failed = map_reduce(prompts, lambda partials: "REDUCE " + json.dumps(partials), "system",
+                                    api_key="test", base_url=base_url, use_cache=False)
+        assert failed == [1, 3] and result["partials"] == 2
+        everything, failed = map_reduce(["FAIL 0", "FAIL 1"], lambda partials: "REDUCE", "system",
+                                        api_key="test", base_url=base_url, use_cache=False)
+        assert everything is None and failed == [0, 1]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_partial_analysis():
+    """
+    Test that analyze_all_reviews marks an analysis as partial when review batches fail.
+    """
+    data = {"url": "https://www.amazon.com/dp/B0ABCDEF12",
+            "review_data": {"reviews": [{"rating": 5, "text": f"Review {i}: " + "fine " * 100} for i in range(6)]}}
+    analysis = {"top_strengths": [], "buyer_personas": [], "negative_trends": [],
+                "undocumented_features": [], "standout_quotes": []}
+    batches = []
+
+    def fake_map_reduce(map_prompts, reduce_prompt, system_prompt, **kwargs):
+        batches.append(len(map_prompts))
+        return dict(analysis), [1]
+
+    original = deepseek_api.map_reduce
+    deepseek_api.map_reduce = fake_map_reduce
+    try:
+        result = json.loads(deepseek_api.analyze_all_reviews(data, batch_token_budget=300, use_cache=False))
+    finally:
+        deepseek_api.map_reduce = original
+    # Three batches of two reviews, the second of which failed
+    assert batches == [3]
+    assert result["unanalyzed_reviews"] == 2
+
+def test_prompt_budget():
+    """
+    Test token estimation, truncation and stratified review selection offline.
+    """
+    long_text = "This one sentence keeps going. " * 1000
+    assert estimate_tokens(long_text) > 5000
+    truncated = truncate_to_tokens(long_text, 100)
+    assert estimate_tokens(truncated) <= 100
+    assert truncated.endswith("going. ...")
+
+    reviews = [{"rating": 5, "title": f"Great {i}", "text": f"Works great, review number {i}.",
+                "helpful_votes": i} for i in range(50)]
+    reviews += [{"rating": 1, "title": "Broke", "text": "Broke after a week.", "helpful_votes": 3}]
+    reviews += [{"rating": 1, "title": "Broke", "text": "Broke after a week.", "helpful_votes": 3}]
+    reviews += [{"rating": 3, "title": "Long", "text": long_text, "helpful_votes": 0}]
+
+    selected = select_reviews(reviews, token_budget=120)
+    assert sum(estimate_tokens(review["text"]) for review in selected) <= 120
+    # Minority ratings are represented, the duplicate is dropped and helpful reviews come first
+    assert [review["rating"] for review in selected].count(1) == 1
+    assert any(review["rating"] == 5 and review["helpful_votes"] == 49 for review in selected)
+    # The input reviews are not modified by truncation
+    assert reviews[-1]["text"] == long_text
+    assert not select_reviews([], token_budget=100)
+
+if __name__ == "__main__":
+    test_review_mapreduce()
+    test_partial_analysis()
+    test_prompt_budget()
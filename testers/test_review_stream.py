@@ -0,0 +1,177 @@
+import itertools
+import logging
+import random
+import re
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from scripts.python import review_analyzer
+from scripts.python.near_duplicates import NearDuplicateIndex, find_near_duplicate_clusters
+from scripts.python.review_analyzer import ReviewAnalyzer, analyze_product_reviews
+from scripts.python.review_dedupe import dedupe_reviews
+from scripts.python.review_stream import ReviewAccumulator
+from scripts.python.scraper import AmazonScraper
+
+URL = "https://www.amazon.com/dp/B0ABCDEF12"
+REVIEWS_PER_PAGE = 10
+WORDS = [f"word{n}" for n in range(3000)]
+
+
+def make_reviews(count, seed=0, start=0):
+    """Generate reviews, with every seventh one a copy of an earlier review."""
+    rnd = random.Random(seed)
+    reviews = []
+    for n in range(start, start + count):
+        if reviews and n % 7 == 0:
+            review = dict(rnd.choice(reviews), review_id=f"R{n}")
+        else:
+            review = {
+                "review_id": f"R{n}",
+                "title": f"Review {n}",
+                "text": " ".join(rnd.choice(WORDS) for _ in range(60)),
+                "rating": float(rnd.randint(1, 5)),
+                "verified_purchase": rnd.random() < 0.8,
+                "helpful_votes": rnd.randint(0, 3),
+                "date": f"2026-0{rnd.randint(1, 9)}-1{rnd.randint(0, 9)}",
+            }
+        reviews.append(review)
+    return reviews
+
+
+def make_linked_reviews(seed=7):
+    """
+    Generate six pairs of unrelated reviews, their six linking reviews and ten more positive reviews.
+
+    Each positive review of a pair is one of the most helpful, and only joins the
+    cluster of the earlier neutral review once the review linking the two arrives.
+    """
+    rnd = random.Random(seed)
+
+    def words(count):
+        return " ".join(f"w{rnd.randrange(10 ** 6)}" for _ in range(count))
+
+    def review(text, rating, votes):
+        return {"title": "", "text": text, "rating": float(rating), "helpful_votes": votes, "date": "2026-01-01"}
+
+    parts = [(words(33), words(20), words(20)) for _ in range(6)]
+    earlier = [review(f"{shared} {first}", 3, 0) for shared, first, _ in parts]
+    helpful = [review(f"{shared} {second}", 5, 100 + n) for n, (shared, _, second) in enumerate(parts)]
+    links = [review(f"{shared} {first} {second}", 3, 0) for shared, first, second in parts]
+    others = [review(words(40), 5, 10 + n) for n in range(10)]
+    return earlier, helpful, links, others
+
+
+def expected_top_positive(reviews):
+    """Top positive reviews of a list, with each near-duplicate cluster counted once."""
+    repeated = {i for members in find_near_duplicate_clusters(reviews) for i in members[1:]}
+    candidates = [(review["helpful_votes"], review["date"], -i, review) for i, review in enumerate(reviews)
+                  if review["rating"] >= 4.0 and i not in repeated]
+    return [review for *_, review in sorted(candidates, key=lambda item: item[:3], reverse=True)[:5]]
+
+
+def test_review_stream():
+    """
+    Test lazy review page fetching, the streaming analysis and its bounded memory.
+    """
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    logger = logging.getLogger(__name__)
+    fetched = []
+
+    def fetch_page(self, url):
+        match = re.search(r"pageNumber=(\d+)", url)
+        if not match:
+            # Only the paginated review URL format is served
+            return None
+        fetched.append(url)
+        page = int(match.group(1))
+        return f"<p>{page}</p><ul><li class='a-last'><a href='#'>Next</a></li></ul>"
+
+    def parse_review_page(self, html_content):
+        page = int(re.search(r"<p>(\d+)</p>", html_content).group(1))
+        return make_reviews(REVIEWS_PER_PAGE, seed=page, start=(page - 1) * REVIEWS_PER_PAGE)
+
+    originals = (AmazonScraper.fetch_page, ReviewAnalyzer._parse_review_page, review_analyzer.time)
+    AmazonScraper.fetch_page = fetch_page
+    ReviewAnalyzer._parse_review_page = parse_review_page
+    review_analyzer.time = SimpleNamespace(sleep=lambda seconds: None, perf_counter=time.perf_counter)
+    try:
+        # A consumer that stops early only pays for the pages it read
+        stream = ReviewAnalyzer().iter_reviews(URL, max_pages=20)
+        assert len(list(itertools.islice(stream, 5))) == 5
+        stream.close()
+        assert len(fetched) == 1
+
+        fetched.clear()
+        reviews, analysis = analyze_product_reviews(URL, max_review_pages=20, max_reviews=25)
+        assert len(reviews) == 25 and analysis["total_reviews"] == 25
+        assert len(fetched) == 3
+
+        # A sample of the reviews is returned, the analysis covers all of them
+        fetched.clear()
+        sample, sampled_analysis = analyze_product_reviews(URL, max_review_pages=8, keep_reviews=12)
+        assert len(fetched) == 8
+        assert len(sample) == 12
+        pages = [parse_review_page(None, f"<p>{page}</p>") for page in range(1, 9)]
+        assert sampled_analysis["total_reviews"] == len(dedupe_reviews(itertools.chain(*pages)))
+    finally:
+        AmazonScraper.fetch_page, ReviewAnalyzer._parse_review_page, review_analyzer.time = originals
+
+    # The streaming analysis matches the analysis of a list
+    reviews = make_reviews(300, seed=42)
+    analyzer = ReviewAnalyzer()
+    assert analyzer.analyze_sentiment(iter(reviews)) == analyzer.analyze_sentiment(reviews)
+    index = NearDuplicateIndex()
+    for review in reviews:
+        index.add(review)
+    clusters = index.clusters()
+    assert clusters and clusters == find_near_duplicate_clusters(reviews)
+    logger.info(f"{len(clusters)} near-duplicate clusters in {len(reviews)} reviews")
+
+    # Six of the most helpful reviews later join an earlier review's cluster
+    earlier, helpful, links, others = make_linked_reviews()
+    reviews = earlier + helpful + links + others
+    assert len(find_near_duplicate_clusters(reviews)) == 6
+    expected = expected_top_positive(reviews)
+    assert [review["helpful_votes"] for review in expected] == [19, 18, 17, 16, 15]
+    assert analyzer.analyze_sentiment(reviews)["top_positive_reviews"] == expected
+    # Also when they join after every weaker review arrived
+    reviews = earlier + helpful + others + links
+    top_positive = analyzer.analyze_sentiment(reviews)["top_positive_reviews"]
+    assert len(top_positive) == 5 and top_positive == expected_top_positive(reviews)
+    # And past the index limit, where only the indexed reviews can still join a cluster
+    accumulator = ReviewAccumulator(keep=0, index_entries=len(earlier + helpful) + 2)
+    top_positive = accumulator.extend(reviews).analysis()["top_positive_reviews"]
+    assert [review["helpful_votes"] for review in top_positive] == [19, 18, 17, 16, 15]
+    # Whatever the index limit, the lists match a sort over the accumulator's own clusters
+    for index_entries in (20, 100, 1000):
+        reviews = make_reviews(400, seed=index_entries)
+        accumulator = ReviewAccumulator(keep=0, index_entries=index_entries).extend(reviews)
+        repeated = {i for members in accumulator._near_duplicates.clusters() for i in members[1:]}
+        for kind, eligible in (("positive", lambda rating: rating >= 4.0), ("negative", lambda rating: rating <= 2.0)):
+            ranked = sorted(((review["helpful_votes"], review["date"], -i, review) for i, review in enumerate(reviews)
+                             if eligible(review["rating"]) and i not in repeated),
+                            key=lambda item: item[:3], reverse=True)
+            assert accumulator.analysis()[f"top_{kind}_reviews"] == [review for *_, review in ranked[:5]]
+
+    # Memory stays flat as the number of reviews doubles
+    peaks = []
+    for total in (1000, 2000):
+        tracemalloc.start()
+        accumulator = ReviewAccumulator(keep=10, seed=1, index_entries=200)
+        for page in range(total // 100):
+            accumulator.extend(make_reviews(100, seed=page, start=page * 100))
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        assert len(accumulator) == total and len(accumulator.reviews) == 10
+    logger.info(f"Peak memory for 1000 and 2000 reviews: {peaks[0] / 1024:.0f} KiB, {peaks[1] / 1024:.0f} KiB")
+    # A list of the 1000 extra reviews alone would take about 1 MiB
+    assert peaks[1] - peaks[0] < 256 * 1024
+
+if __name__ == "__main__":
+    test_review_stream()
@@ -0,0 +1,60 @@
+import logging
+from scripts.python.sentiment_lexicon import SentimentScorer, analyze_text_sentiment
+
+def score(text):
+    """Score the first sentence of text."""
+    return SentimentScorer().score_sentences(text)[0]
+
+def test_sentiment_scorer():
+    """
+    Test lexicon sentiment scoring, including negation and rating mismatches.
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    assert score("This is great") > 0
+    assert score("This is not great") < 0
+    
+    # A 5-star review that is really a complaint
+    reviews = [{'title': "Five stars", 'rating': 5.0,
+                'text': "Stopped working after a week. Total junk, I had to return it."}]
+    sentiment = analyze_text_sentiment(reviews)
+    assert sentiment['label_counts']['negative'] == 1
+    assert sentiment['rating_mismatches'][0]['review_index'] == 0
+    
+    # A positive 5-star review is not a mismatch
+    reviews = [{'title': "Love it", 'rating': 5.0, 'text': "Great cooker, works perfectly."}]
+    sentiment = analyze_text_sentiment(reviews)
+    assert sentiment['label_counts']['positive'] == 1
+    assert sentiment['rating_mismatches'] == []
+
+def test_negation_scope():
+    """
+    Test that a negation flips the words it reaches and nothing past its scope.
+    """
+    # Negated negative words turn positive
+    assert score("not bad at all") > 0
+    assert score("Never disappointed") > 0
+    
+    # Negation also covers an intensified word
+    assert score("not very good") < 0
+    assert score("very good") > score("good") > 0
+    
+    # Negation stops at a clause boundary, with or without punctuation
+    assert score("No problems, great battery") > 0
+    assert score("No problems but great battery") > 0
+    assert score("Not cheap, but great quality") > 0
+    assert score("Great, but not durable") < score("Great and durable")
+    
+    # Negation reaches past filler words up to NEGATION_SCOPE
+    assert score("not the best") < 0
+    
+    # Clause punctuation alone carries no sentiment
+    assert score(", ; :") == 0.0
+
+if __name__ == "__main__":
+    test_sentiment_scorer()
+    test_negation_scope()
+    print("All sentiment tests passed")
@@ -0,0 +1,91 @@
+import json
+import logging
+
+from scripts.python.structured_output import (ANALYSIS_SCHEMA, MATRIX_COMPARISON_SCHEMA, build_repair_request,
+                                              complete_structured_output, recover_json, validate_output)
+
+
+def test_recover_json():
+    """
+    Test recovery of fenced, chatty, trailing-comma and truncated answers.
+    """
+    assert recover_json('```json\n{"a": [1, 2,], "b": "x"}\n``` Let me know!') == {"a": [1, 2], "b": "x"}
+    assert recover_json('Here is the analysis: {"a": 1} {"b": 2}') == {"a": 1}
+    # Brackets and escaped quotes inside strings do not confuse the recovery
+    assert recover_json('{"a": "x \\" {[ y", "b": ["q", "r') == {"a": 'x " {[ y', "b": ["q"]}
+    # An unclosed fence cut off mid-item keeps every complete value; the unfinished string is dropped
+    truncated = ('```json\n{"top_strengths": [{"feature": "Battery", "listing_advice": "Lead with it"}, '
+                 '{"feature": "Screen", "listing_advice": "Sharp displ')
+    assert recover_json(truncated) == {"top_strengths": [{"feature": "Battery", "listing_advice": "Lead with it"},
+                                                         {"feature": "Screen"}]}
+    assert recover_json("I could not analyze these reviews.") is None
+    assert recover_json(None) is None
+
+def test_structured_output():
+    """
+    Test schema validation and targeted repair of missing or invalid sections.
+    """
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    logger = logging.getLogger(__name__)
+
+    answer = {
+        "top_strengths": [{"feature": "Battery", "listing_advice": "Lead with it"}, "not an object"],
+        "buyer_personas": "Commuters",
+        "negative_trends": [{"issue": "Hinge", "seller_fix": "Add a warning", "severity": "HIGH"},
+                            {"issue": "Color", "seller_fix": "Better photos", "severity": "critical"}],
+        "standout_quotes": ["Love it", ""],
+        "error": "kept as is"
+    }
+    result, problems = validate_output(answer, ANALYSIS_SCHEMA)
+    assert result["top_strengths"] == [{"feature": "Battery", "listing_advice": "Lead with it"}]
+    assert result["negative_trends"] == [{"issue": "Hinge", "seller_fix": "Add a warning", "severity": "high"}]
+    assert result["standout_quotes"] == ["Love it"]
+    assert result["error"] == "kept as is"
+    assert problems == {"buyer_personas": "expected a list", "undocumented_features": "missing"}
+
+    request = build_repair_request(ANALYSIS_SCHEMA, problems)
+    logger.info(f"Repair request:\n{request}")
+    assert '"buyer_personas": [{"persona": "string", "description": "string"}]' in request
+    assert "top_strengths" not in request
+
+    requests = []
+
+    def repair(request, partial):
+        requests.append(request)
+        # The valid sections are sent back as the previous answer
+        assert "top_strengths" in partial and "buyer_personas" not in partial
+        return '```json\n{"buyer_personas": [{"persona": "Commuter", "description": "Needs long battery life"}], ' \
+               '"undocumented_features": [{"feature": "Fold flat"}]}\n```'
+
+    result, repaired, incomplete = complete_structured_output(json.dumps(answer), ANALYSIS_SCHEMA, repair=repair)
+    assert len(requests) == 1
+    assert repaired == ["buyer_personas"]
+    # The repaired section is still invalid after the single allowed repair, so it is left empty and flagged
+    assert incomplete == ["undocumented_features"]
+    assert result["undocumented_features"] == [] and result["incomplete_sections"] == ["undocumented_features"]
+    assert result["buyer_personas"][0]["persona"] == "Commuter"
+
+    # A valid answer needs no repair call
+    matrix = {
+        "comparison_matrix": [{"feature": "Sound", "scores": {"A": 4, "B": 3}, "best_product": "A", "summary": "Richer"}],
+        "critical_weaknesses": [],
+        "shared_strengths": ["Comfort"],
+        "unique_selling_points": {"A": ["ANC"], "B": []},
+        "buyer_recommendation": "A for commuters, B for the gym."
+    }
+    result, repaired, incomplete = complete_structured_output(json.dumps(matrix), MATRIX_COMPARISON_SCHEMA,
+                                                              repair=lambda request, partial: requests.append(request))
+    assert result == matrix and not repaired and not incomplete
+    assert len(requests) == 1
+
+    # Nothing recoverable and no repair: the caller falls back to its error handling
+    assert complete_structured_output("Sorry, something went wrong.", ANALYSIS_SCHEMA)[0] is None
+
+if __name__ == "__main__":
+    test_recover_json()
+    test_structured_output()
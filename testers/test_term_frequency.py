@@ -0,0 +1,61 @@
+import logging
+
+from scripts.python.ai_summarizer import ReviewSummarizer
+from scripts.python.term_frequency import TermCounter, top_terms
+
+TEXTS = [
+    "Battery life is great and the battery life lasts all day.",
+    "Great battery life, and the screen is bright.",
+    "The screen is bright but the charger broke.",
+    "Battery life could be better. The charger works with this product.",
+]
+
+
+def test_term_frequency():
+    """
+    Test term and bigram counts, stop-word filtering, bigram preference and limits on a fixed set of reviews.
+    """
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    logger = logging.getLogger(__name__)
+
+    counter = TermCounter().update_many(TEXTS, chunk_size=3)
+    assert counter.documents == 4
+    assert counter.most_common(6) == [("battery", 4), ("life", 4), ("great", 2), ("screen", 2),
+                                      ("bright", 2), ("charger", 2)]
+    assert counter.most_common(2, n=2) == [("battery life", 4), ("screen bright", 2)]
+    assert counter.most_common(10, n=2, min_count=2) == [("battery life", 4), ("screen bright", 2)]
+
+    # Chunked and one-at-a-time counting agree
+    single = TermCounter()
+    for text in TEXTS:
+        single.update(text)
+    assert single.most_common(20) == counter.most_common(20)
+    assert single.most_common(20, n=2) == counter.most_common(20, n=2)
+
+    # Stop words and words under three letters never show up
+    terms = top_terms(TEXTS, limit=50)
+    assert not {"the", "and", "with", "this", "product", "is", "be"} & set(terms)
+    assert top_terms(TEXTS, limit=3) == ["battery", "life", "great"]
+    assert top_terms(TEXTS, limit=3, stop_words=[]) == ["the", "battery", "life"]
+    assert top_terms(TEXTS, limit=2, n=2) == ["battery life", "screen bright"]
+    assert top_terms(TEXTS, limit=10, min_count=2) == ["battery", "life", "great", "screen", "bright", "charger"]
+
+    # Repeated bigrams come first, then single words not already part of one
+    summarizer = ReviewSummarizer()
+    common = summarizer._extract_common_words(TEXTS, limit=4, ngram=2)
+    logger.info(f"Common terms: {common}")
+    assert common == ["battery life", "screen bright", "great", "charger"]
+    assert summarizer._extract_common_words(TEXTS, limit=2, ngram=2) == ["battery life", "screen bright"]
+    assert summarizer._extract_common_words(TEXTS, limit=3) == ["battery", "life", "great"]
+    # A bigram seen once is not a phrase
+    assert summarizer._extract_common_words(TEXTS[2], limit=3, ngram=2) == ["screen", "bright", "charger"]
+    assert summarizer._extract_common_words("", limit=3) == []
+    assert summarizer._extract_common_words("The and but.", limit=3, ngram=2) == []
+
+if __name__ == "__main__":
+    test_term_frequency()